@@ -0,0 +1,40 @@
+"""Bilibili 弹幕发送器
+
+包结构：
+    danmu.core     发送核心（网络、调度、任务），不依赖界面
+    danmu.storage  配置与常用直播间的存储
+    danmu.gui      Tk 图形界面，只在用到时才导入 tkinter / PIL
+    danmu.cli      无界面的命令行入口
+
+常用的 SenderJob、RoomStore 等名称可以直接从 danmu 导入，
+对应的子模块在第一次访问时才加载。界面的 App、main 只能从 danmu.gui 导入，
+这样遍历 dir(danmu) 的工具（如 unittest 的测试发现）不会导入 tkinter / PIL。
+"""
+import importlib
+
+# 名称 -> 所在模块，第一次访问时才导入
+_LAZY = {
+    "SenderJob": "danmu.core",
+    "SendEngine": "danmu.core",
+    "DanmuClient": "danmu.core",
+    "send_danmu": "danmu.core",
+    "RoomStore": "danmu.storage",
+    "ConfigStore": "danmu.storage",
+    "load_config": "danmu.storage",
+    "save_config": "danmu.storage",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
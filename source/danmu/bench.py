@@ -0,0 +1,255 @@
+"""发送路径的性能测试，对本地模拟服务器发送弹幕并统计延迟、速率、CPU 和内存
+
+    python -m danmu.bench --jobs 1 10 100 --duration 5 --interval 0.5
+    python -m danmu.bench --jobs 100 --latency 0.05 --json result.json
+    python -m danmu.bench --jobs --encoding 100000   只比较请求编码的开销
+
+模拟服务器在单独的进程中运行，它的 CPU 占用不会算进测试结果。
+每个并发数单独测一轮，全部任务共用一个 SendEngine 和一个 DanmuClient，
+与图形界面和命令行的实际用法相同。
+--encoding 比较逐条编码整个表单（DanmuClient.send）和预编码模板（SenderJob）的 CPU 和内存分配。
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+from .core import DanmuClient, SendEngine, SenderJob, encode_form
+
+ROOM_BASE = 100000  # 测试用直播间ID的起始值
+
+
+class TimedClient(DanmuClient):
+    """记录每次发送耗时的客户端"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.errors = 0
+        self._samples_lock = threading.Lock()
+
+    def send_template(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().send_template(*args, **kwargs)
+        except Exception:
+            with self._samples_lock:
+                self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._samples_lock:
+                self.latencies.append(elapsed)
+
+
+def percentile(values, fraction):
+    """已排序列表的百分位数（最近秩法），列表为空时返回 0"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+def rss_bytes():
+    """当前进程的常驻内存，无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource  # Windows 上没有该模块
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux 上单位是 KB
+
+
+@contextlib.contextmanager
+def mock_server(latency=0.0, jitter=0.0):
+    """在子进程中启动模拟服务器，返回发送接口地址"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-m", "danmu.mockserver", "--latency", str(latency), "--jitter", str(jitter)]
+    process = subprocess.Popen(command, cwd=root, stdout=subprocess.PIPE, text=True)
+    try:
+        url = process.stdout.readline().strip()
+        if not url:
+            raise RuntimeError("模拟服务器启动失败")
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def server_stats(url):
+    """读取模拟服务器的统计信息"""
+    stats_url = url.rsplit("/msg/send", 1)[0] + "/stats"
+    with urllib.request.urlopen(stats_url, timeout=5) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def run_once(url, jobs, duration, interval, workers=None, trace_memory=False):
+    """以 jobs 个并发任务运行 duration 秒，返回统计结果"""
+    workers = workers or min(64, max(4, jobs))
+    urllib.request.urlopen(url.rsplit("/msg/send", 1)[0] + "/reset", data=b"", timeout=5).close()
+    engine = SendEngine(max_workers=workers)
+    client = TimedClient(url, pool_size=workers)
+    senders = [
+        SenderJob(str(ROOM_BASE + i), "bench", "bench", f"bench-{i}", [f"测试弹幕 {i}"],
+                  interval=interval, engine=engine, client=client)
+        for i in range(jobs)
+    ]
+    engine.start()
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = rss_bytes()
+    lags = []
+    scheduled_rate = 0.0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for job in senders:
+        job.start()
+    time.sleep(duration)
+    for job in senders:
+        stats = job.stats()
+        if stats:
+            lags.append(stats["mean_lag"])
+            scheduled_rate += stats["achieved_rate"]
+        job.stop()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    rss_after = rss_bytes()
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    engine.shutdown(wait=True)
+    client.close()
+
+    latencies = sorted(client.latencies)
+    sends = len(latencies)
+    received = server_stats(url)["received"]
+    return {
+        "jobs": jobs,
+        "workers": workers,
+        "duration": wall,
+        "sends": sends,
+        "errors": client.errors,
+        "received": received,
+        "target_rate": jobs / interval,
+        "achieved_rate": scheduled_rate,                      # 调度器统计的实际发送速率之和
+        "server_rate": received / wall if wall else 0.0,     # 服务器端收到的速率，含开始时立即发送的一条
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p90": percentile(latencies, 0.90),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": latencies[-1] if latencies else 0.0,
+        "mean_lag": sum(lags) / len(lags) if lags else 0.0,
+        "cpu_seconds": cpu,
+        "cpu_percent": cpu / wall * 100 if wall else 0.0,
+        "cpu_per_send_us": cpu / sends * 1e6 if sends else 0.0,
+        "rss_bytes": rss_after,
+        "rss_growth_bytes": rss_after - rss_before if rss_after is not None and rss_before is not None else None,
+        "tracemalloc_peak_bytes": peak,
+    }
+
+
+def bench_encoding(iterations, messages=("测试弹幕", "第二条弹幕", "hello world")):
+    """比较两种请求编码方式，返回 [{"method", "cpu_per_send_us", "alloc_per_send_bytes"}]"""
+    client = DanmuClient("http://127.0.0.1/msg/send")
+    args = ("100000", "csrf-token-value", "csrf-token-value", "sessdata-value", "#FFFFFF", 25, 1)
+    template = client.compile(*args)
+
+    def full_form(message):
+        client._headers_for(args[3])
+        return encode_form(args[0], message, args[1], args[2], args[4], args[5], args[6])
+
+    methods = (("逐条编码", full_form), ("预编码模板", template.body))
+    results = []
+    for name, encode in methods:
+        count = len(messages)
+        start = time.process_time()
+        for i in range(iterations):
+            encode(messages[i % count])
+        cpu = time.process_time() - start
+        # 单独统计每次调用的临时内存峰值
+        samples = min(iterations, 1000)
+        tracemalloc.start()
+        allocated = 0
+        for i in range(samples):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            encode(messages[i % count])
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        results.append({
+            "method": name,
+            "iterations": iterations,
+            "cpu_per_send_us": cpu / iterations * 1e6,
+            "alloc_per_send_bytes": allocated / samples,
+        })
+    return results
+
+
+def format_encoding_table(results):
+    rows = [("编码方式", "CPU/条 us", "临时内存/条 B")]
+    for r in results:
+        rows.append((r["method"], f"{r['cpu_per_send_us']:.2f}", f"{r['alloc_per_send_bytes']:.0f}"))
+    widths = [max(len(row[i]) for row in rows) for i in range(3)]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def format_table(results):
+    """把结果排成文本表格"""
+    header = ("任务数", "发送", "错误", "目标/s", "实际/s", "p50 ms", "p90 ms", "p99 ms", "max ms", "调度延迟 ms", "CPU%", "CPU/条 us", "内存 MB")
+    rows = [header]
+    for r in results:
+        memory = r["tracemalloc_peak_bytes"] if r["tracemalloc_peak_bytes"] is not None else r["rss_bytes"]
+        rows.append((
+            str(r["jobs"]), str(r["sends"]), str(r["errors"]),
+            f"{r['target_rate']:.1f}", f"{r['achieved_rate']:.1f}",
+            f"{r['latency_p50'] * 1000:.1f}", f"{r['latency_p90'] * 1000:.1f}",
+            f"{r['latency_p99'] * 1000:.1f}", f"{r['latency_max'] * 1000:.1f}",
+            f"{r['mean_lag'] * 1000:.2f}", f"{r['cpu_percent']:.1f}", f"{r['cpu_per_send_us']:.0f}",
+            f"{memory / 1048576:.1f}" if memory is not None else "-",
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m danmu.bench", description="发送路径性能测试")
+    parser.add_argument("--jobs", type=int, nargs="*", default=[1, 10, 100], help="要测试的并发任务数，默认 1 10 100，不给出时不做发送测试")
+    parser.add_argument("--duration", type=float, default=5.0, help="每轮测试的时长（秒）")
+    parser.add_argument("--interval", type=float, default=0.5, help="每个任务的发送间隔（秒）")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟服务器的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="模拟服务器的随机附加延迟上限（秒）")
+    parser.add_argument("--workers", type=int, help="发送线程数，默认随任务数变化")
+    parser.add_argument("--trace-memory", action="store_true", help="用 tracemalloc 统计内存峰值（会拖慢测试）")
+    parser.add_argument("--encoding", type=int, default=0, metavar="N", help="另外比较 N 次请求编码的开销")
+    parser.add_argument("--json", help="把结果另存为 JSON 文件")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.jobs:
+        with mock_server(args.latency, args.jitter) as url:
+            for jobs in args.jobs:
+                print(f"正在测试 {jobs} 个任务……", file=sys.stderr, flush=True)
+                results.append(run_once(url, jobs, args.duration, args.interval, args.workers, args.trace_memory))
+        print(format_table(results))
+    encoding = bench_encoding(args.encoding) if args.encoding else []
+    if encoding:
+        print(format_encoding_table(encoding))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"send": results, "encoding": encoding}, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""无界面的命令行发送入口
+
+    python -m danmu.cli --room 123 --message 你好 --interval 5
+    python -m danmu.cli --job jobs.json --metrics-port 9108
+
+只导入发送核心，不导入 tkinter / PIL，可以在没有显示器的服务器或容器中运行。
+登录凭据和设置未在命令行给出时从配置文件中读取；开始发送前检查每个账号的登录凭据（同一账号只检查一次），
+无效时直接退出，使用本地模拟服务器时可以用 --nav-url 指向它的 /x/web-interface/nav 或用 --skip-check 跳过。
+弹幕在开始发送前检查一次：多行弹幕拆成多条，超长（或用 --split-long 切分）和含屏蔽词（配置中的 blocked_words）的弹幕不发送。
+导入本模块的耗时预算为 IMPORT_BUDGET 秒，可以用 --check-imports 检查。
+加上 --confirm 时同时连接各直播间的弹幕信息流，统计弹幕从发出到出现在直播间的送达延迟
+（--danmu-url 可以指向 python -m danmu.mockserver --danmu-ws 给出的本地信息流）。
+发送统计可以通过 --metrics-port（HTTP /metrics）或 --metrics-file 以 Prometheus 文本格式导出。
+给出 --journal 时把发送记录写入发送日志；进程崩溃后加上 --resume 重新运行，各直播间从日志中最后的位置继续发送，
+--export-history 把日志中的发送记录导出为 CSV 或 JSONL 文件。
+--profile cprofile|sample 对主线程和发送线程做性能分析，结束时把 pstats 或折叠栈文件写入 --profile-dir。
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from .core import playlist, profiling
+from .core.client import API_URL, DanmuClient
+from .core.credentials import NAV_URL, CredentialError, CredentialManager
+from .core.job import SenderJob, get_engine
+from .core.logs import FORMATS, setup_logging
+from .core.metrics import serve_metrics, write_metrics
+from .core.validate import MessageValidator
+from .storage.config import CONFIG_FILE, default_settings, load_config
+from .storage.config_store import ConfigStore
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BUDGET = 0.4  # 在新的解释器中 import danmu.cli 允许的最长耗时（秒），通常约 0.2 秒
+
+PLAY_MODES = ("single",) + playlist.MODES
+
+# 任务文件中每个任务可以使用的字段，与命令行参数一一对应
+JOB_KEYS = ("room", "messages", "csrf", "csrf_token", "sessdata", "interval", "color", "font_size", "mode", "play_mode", "count")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m danmu.cli", description="Bilibili 弹幕发送器（命令行版）")
+    parser.add_argument("--config", default=CONFIG_FILE, help="配置文件路径，默认 %(default)s")
+    parser.add_argument("--url", default=API_URL, help="发送接口地址，可指向本地模拟服务器")
+    parser.add_argument("--nav-url", dest="nav_url", default=NAV_URL, help="检查登录凭据的接口地址")
+    parser.add_argument("--skip-check", dest="skip_check", action="store_true", help="不检查登录凭据")
+    parser.add_argument("--room", help="直播间ID")
+    parser.add_argument("--message", dest="messages", action="append", help="弹幕内容，可重复给出多条")
+    parser.add_argument("--csrf")
+    parser.add_argument("--csrf-token", dest="csrf_token")
+    parser.add_argument("--sessdata")
+    parser.add_argument("--interval", type=float, help="发送间隔（秒）")
+    parser.add_argument("--color", help="弹幕颜色，如 #FFFFFF")
+    parser.add_argument("--font-size", dest="font_size", type=int)
+    parser.add_argument("--mode", type=int, help="弹幕模式 1-9")
+    parser.add_argument("--play-mode", dest="play_mode", choices=PLAY_MODES, help="发送方式，默认 single")
+    parser.add_argument("--split-long", dest="split_long", action="store_true", help="把超长的弹幕切成多条发送，默认不发送超长的弹幕")
+    parser.add_argument("--count", type=int, default=0, help="每个任务发送的条数，0 表示一直发送")
+    parser.add_argument("--confirm", action="store_true", help="连接直播间弹幕信息流，确认弹幕送达并统计送达延迟")
+    parser.add_argument("--danmu-url", dest="danmu_url", help="弹幕信息流地址，默认为 B 站的弹幕信息流")
+    parser.add_argument("--journal", help="发送日志目录，给出时记录每次发送的位置和结果")
+    parser.add_argument("--resume", action="store_true", help="从发送日志中上次没有正常停止的位置继续发送（需要 --journal）")
+    parser.add_argument("--export-history", dest="export_history", metavar="PATH",
+                        help="把发送日志中的发送记录导出为 .csv 或 .jsonl 文件后退出（需要 --journal）")
+    parser.add_argument("--profile", choices=profiling.MODES, help="性能分析：cprofile 输出 pstats 文件，sample 输出火焰图用的折叠栈文件")
+    parser.add_argument("--profile-dir", dest="profile_dir", default=profiling.PROFILE_DIR, help="性能分析结果目录，默认 %(default)s")
+    parser.add_argument("--profile-memory", dest="profile_memory", action="store_true", help="性能分析时同时用 tracemalloc 记录内存分配")
+    parser.add_argument("--job", help="任务文件（JSON 列表，每项的键与命令行参数相同，如 room、messages）")
+    parser.add_argument("--log-level", dest="log_level", default="INFO", choices=("DEBUG", "INFO", "WARNING", "ERROR"), help="日志级别，默认 %(default)s")
+    parser.add_argument("--log-format", dest="log_format", default="text", choices=FORMATS, help="日志格式，默认 %(default)s")
+    parser.add_argument("--metrics-port", dest="metrics_port", type=int, help="在该端口提供 HTTP /metrics（Prometheus 文本格式）")
+    parser.add_argument("--metrics-file", dest="metrics_file", help="定期把发送统计写入该文件（Prometheus 文本格式）")
+    parser.add_argument("--metrics-interval", dest="metrics_interval", type=float, default=5.0, help="写入统计文件的间隔（秒），默认 %(default)s")
+    parser.add_argument("--check-imports", action="store_true", help="检查导入耗时是否在预算内并退出")
+    return parser
+
+
+def measure_import_time():
+    """在新的解释器中测量 import danmu.cli 的耗时，返回 (秒数, 是否导入了 GUI 模块)"""
+    import subprocess
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import danmu.cli\n"
+        "print(time.perf_counter() - start)\n"
+        "print(int('tkinter' in sys.modules or 'PIL' in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1] == "1"
+
+
+def resolve_job(spec, config, client=None, engine=None, credentials=None, validator=None, journal=None):
+    """用配置文件中的房间和设置补全任务，返回 SenderJob"""
+    settings = dict(default_settings(), **config["settings"])
+    room_id = str(spec.get("room") or "")
+    if not room_id:
+        raise ValueError("缺少直播间ID")
+    room = config["common_rooms"][room_id] if room_id in config["common_rooms"] else {}
+    login = {}
+    for key in ("csrf", "csrf_token", "sessdata"):
+        login[key] = spec.get(key) or room.get(key, "")
+        if not login[key]:
+            raise ValueError(f"直播间 {room_id} 缺少 {key}")
+    play_mode = spec.get("play_mode") or "single"
+    messages = spec.get("messages") or spec.get("message") or []
+    if isinstance(messages, str):
+        messages = [messages]
+    if play_mode != "single":
+        messages = list(messages) + room.get("danmus", [])
+    if not messages:
+        raise ValueError(f"直播间 {room_id} 没有可发送的弹幕")
+    return SenderJob(
+        room_id, login["csrf"], login["csrf_token"], login["sessdata"], messages,
+        color=spec.get("color") or settings["color"],
+        font_size=int(spec.get("font_size") or settings["font_size"]),
+        mode=int(spec.get("mode") or settings["mode"]),
+        interval=float(spec.get("interval") or settings["time_step"]),
+        play_mode=play_mode,
+        weights=room.get("weights"),
+        count=int(spec.get("count") or 0),
+        engine=engine,
+        client=client,
+        credentials=credentials,
+        validator=validator,
+        journal=journal,
+    )
+
+
+def watch_delivery(jobs, url=None):
+    """为各任务的直播间连接弹幕信息流，返回 (DeliveryTracker, [DanmuReceiver])
+
+    送达延迟记入任务的发送统计（danmu_delivery_latency_seconds）；url 为 None 时连接 B 站的弹幕信息流。
+    """
+    from .core.receiver import DEFAULT_URL, DanmuReceiver, DeliveryTracker  # 只有 --confirm 时才用到
+    url = url or DEFAULT_URL
+    metrics = jobs[0].engine.metrics if jobs else None
+
+    def delivered(room_id, message, latency):
+        metrics.job(room_id).record_delivery(latency)
+        logger.debug("弹幕已送达", extra={"fields": {"room": room_id, "latency_ms": round(latency * 1000, 1)}})
+
+    tracker = DeliveryTracker(on_delivered=delivered)
+    receivers = {}
+    for job in jobs:
+        job.on_send = tracker.on_send
+        job.on_result = tracker.on_result
+        if job.room_id not in receivers:
+            receivers[job.room_id] = DanmuReceiver(job.room_id, on_danmu=tracker.received, url=url).start()
+    for receiver in receivers.values():
+        if not receiver.connected.wait(10):
+            logger.warning("连接弹幕信息流超时", extra={"fields": {"room": receiver.room_id}})
+    return tracker, list(receivers.values())
+
+
+def run_jobs(jobs, metrics_file=None, metrics_interval=5.0, tracker=None, resume=False):
+    """运行任务直到全部达到发送条数、因致命错误停止或被 Ctrl+C 中断
+
+    给出 metrics_file 时每隔 metrics_interval 秒写入一次发送统计，结束时再写入一次；
+    给出 tracker（DeliveryTracker）时定期把超时没有送达的弹幕记为丢失；
+    resume 为 True 时有发送日志的任务从日志中上次的位置继续。
+    返回退出码：有任务无法开始（弹幕没有通过检查等）时停止已经开始的任务并返回 1。
+    """
+    started = []
+    try:
+        for job in jobs:
+            point = job.journal.resume_point(job.room_id) if resume and job.journal is not None else None
+            if point is not None:
+                logger.info("从发送日志继续发送", extra={"fields": {"room": job.room_id, "position": point.position, "sent": point.sent}})
+            try:
+                job.start(point)
+            except ValueError as e:  # MessageError、CredentialError 都是 ValueError 的子类
+                print(f"直播间 {job.room_id}：{e}", file=sys.stderr)
+                return 1
+            started.append(job)
+        next_write = time.monotonic() + metrics_interval
+        while any(job.running for job in jobs):
+            time.sleep(0.1)
+            if tracker is not None:
+                tracker.expire()
+            if metrics_file and time.monotonic() >= next_write:
+                write_metrics(jobs[0].engine.metrics, metrics_file)
+                next_write += metrics_interval
+    except KeyboardInterrupt:
+        print("已停止发送弹幕")
+    finally:
+        # 没有开始的任务不停止，以免在发送日志中把它记为已停止、丢掉可以继续的位置
+        for job in started:
+            job.stop()
+        if metrics_file and jobs:
+            write_metrics(jobs[0].engine.metrics, metrics_file)
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        elapsed, gui_loaded = measure_import_time()
+        print(f"import danmu.cli 耗时 {elapsed * 1000:.1f} ms，预算 {IMPORT_BUDGET * 1000:.0f} ms")
+        if gui_loaded:
+            print("错误：导入了 tkinter 或 PIL")
+        return 0 if elapsed <= IMPORT_BUDGET and not gui_loaded else 1
+
+    setup_logging(args.log_level, args.log_format)
+    if (args.resume or args.export_history) and not args.journal:
+        parser.error("--resume 和 --export-history 需要 --journal")
+    journal = None
+    if args.journal:
+        from .core.journal import SendJournal  # 只有 --journal 时才用到
+        journal = SendJournal(args.journal)
+    profiler = profiling.Profiler(args.profile, args.profile_dir, memory=args.profile_memory).start() if args.profile else None
+    try:
+        if args.export_history:
+            print(f"已导出 {journal.export(args.export_history)} 条发送记录")
+            return 0
+        return run(parser, args, journal)
+    finally:
+        if journal is not None:
+            journal.close()
+        if profiler is not None:
+            for path in profiler.stop().write():
+                print(f"性能分析结果：{path}")
+
+
+def run(parser, args, journal=None):
+    """解析任务、检查登录凭据并运行，返回退出码"""
+    config = load_config(ConfigStore(args.config))
+    if args.job:
+        with open(args.job, "r", encoding="utf-8") as file:
+            specs = json.load(file)
+        if isinstance(specs, dict):
+            specs = [specs]
+    elif args.room:
+        specs = [{key: getattr(args, key) for key in JOB_KEYS}]
+    else:
+        parser.error("需要 --room 或 --job")
+
+    client = DanmuClient(args.url)
+    credentials = None if args.skip_check else CredentialManager(args.nav_url)
+    validator = MessageValidator(config["settings"].get("blocked_words", ()), split_long=args.split_long)
+    try:
+        jobs = [resolve_job(spec, config, client, credentials=credentials, validator=validator, journal=journal)
+                for spec in specs]
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    if credentials is not None:
+        # 在开始任何任务前检查所有账号，同一账号的多个直播间只请求一次
+        try:
+            for job in jobs:
+                credentials.require(job.sessdata)
+        except CredentialError as e:
+            print(f"直播间 {job.room_id}：{e}", file=sys.stderr)
+            return 1
+    tracker, receivers = watch_delivery(jobs, args.danmu_url) if args.confirm else (None, [])
+    server = serve_metrics(get_engine().metrics, args.metrics_port) if args.metrics_port is not None else None
+    try:
+        code = run_jobs(jobs, args.metrics_file, args.metrics_interval, tracker, args.resume)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if tracker is not None:
+            # 等最后几条弹幕出现在信息流中，最多 2 秒
+            deadline = time.monotonic() + 2.0
+            while tracker.pending and time.monotonic() < deadline:
+                time.sleep(0.05)
+            summary = tracker.snapshot()
+            print(f"送达 {summary['delivered']} 条，未确认 {summary['lost'] + summary['pending']} 条，"
+                  f"送达延迟 p50 {summary['latency_p50'] * 1000:.0f}ms p99 {summary['latency_p99'] * 1000:.0f}ms")
+        for receiver in receivers:
+            receiver.stop()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""发送核心：网络请求与发送逻辑，不导入 tkinter / PIL
+
+下面的名称可以直接从 danmu.core 导入，所在的子模块在第一次访问时才加载，
+只用到发送功能时不会导入信息流、发送日志、定时任务等模块。
+"""
+import importlib
+
+# 名称 -> 所在子模块，第一次访问时才导入
+_LAZY = {}
+for _module, _names in (
+    ("client", ("DanmuClient", "RequestTemplate", "API_URL", "USER_AGENT", "encode_form")),
+    ("engine", ("SendEngine",)),
+    ("scheduler", ("TickScheduler",)),
+    ("ratecontrol", ("RateController",)),
+    ("result", ("SendResult",)),
+    ("playlist", ("Playlist",)),
+    ("sender", ("get_client", "send_danmu", "send_template")),
+    ("job", ("PAUSED", "RUNNING", "STOPPED", "SenderJob", "get_engine")),
+    ("manager", ("JobManager",)),
+    ("credentials", ("NAV_URL", "CredentialError", "CredentialManager", "SessionStatus")),
+    ("validate", ("BlockedWords", "MessageError", "MessageValidator", "ValidationResult")),
+    ("receiver", ("DanmuReceiver", "DeliveryTracker")),
+    ("journal", ("JOURNAL_DIR", "ResumePoint", "SendJournal")),
+    ("history", ("HistoryEntry", "HistoryView", "SendHistory")),
+    ("profiling", ("Profiler",)),
+    ("timingwheel", ("Timer", "TimingWheel")),
+    ("campaign", ("CronExpression", "ScheduleManager")),
+    ("metrics", ("Histogram", "JobMetrics", "MetricsRegistry", "serve_metrics", "write_metrics")),
+    ("logs", ("StructuredFormatter", "setup_logging")),
+):
+    for _name in _names:
+        _LAZY[_name] = _module
+del _module, _names, _name
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,235 @@
+"""定时弹幕：指定时间发送、按 cron 表达式重复发送、或在开始发送后若干秒发送
+
+每条定时弹幕是一个可以直接保存在直播间信息中的字典（room["schedules"]）：
+    {"id": "…", "message": "…", "at": 时间戳}           在指定时间发送一次
+    {"id": "…", "message": "…", "cron": "*/10 * * * *"}  按 cron 表达式重复发送（本地时间）
+    {"id": "…", "message": "…", "offset": 30}            直播间每次开始发送后第 30 秒发送
+
+ScheduleManager 把它们放进 TimingWheel，到期时调用 on_fire(room_id, schedule)。
+"""
+import datetime
+import os
+import threading
+import time
+
+from .timingwheel import TimingWheel
+
+MISSED_GRACE = 60  # 启动时过期不超过该秒数的一次性定时弹幕仍然补发，更早的丢弃
+
+# cron 五个字段的取值范围：分 时 日 月 星期（0 为星期日）
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def new_schedule(message, at=None, cron=None, offset=None):
+    """创建一条定时弹幕，at / cron / offset 必须且只能给出一个"""
+    given = [(key, value) for key, value in (("at", at), ("cron", cron), ("offset", offset)) if value is not None]
+    if len(given) != 1:
+        raise ValueError("需要指定发送时间、cron 表达式或相对开始的秒数中的一个")
+    key, value = given[0]
+    if key == "cron":
+        CronExpression(value)  # 检查格式
+    elif key == "offset" and value < 0:
+        raise ValueError("相对开始的秒数不能为负数")
+    return {"id": os.urandom(6).hex(), "message": message, key: value}
+
+
+def parse_when(text, now=None):
+    """解析界面中输入的时间：+秒数、HH:MM、YYYY-MM-DD HH:MM 或 cron 表达式，返回 new_schedule 的关键字参数"""
+    text = text.strip()
+    if text.startswith("+"):
+        return {"offset": float(text[1:])}
+    if len(text.split()) == 5:
+        return {"cron": text}
+    now = now or datetime.datetime.now()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if not fmt.startswith("%Y"):
+            # 只给出时刻时取下一次到达该时刻的时间
+            parsed = now.replace(hour=parsed.hour, minute=parsed.minute, second=parsed.second, microsecond=0)
+            if parsed <= now:
+                parsed += datetime.timedelta(days=1)
+        return {"at": parsed.timestamp()}
+    raise ValueError(f"无法识别的时间：{text}")
+
+
+def describe(schedule):
+    """定时弹幕的时间说明，用于界面显示"""
+    if "at" in schedule:
+        return datetime.datetime.fromtimestamp(schedule["at"]).strftime("%Y-%m-%d %H:%M:%S")
+    if "cron" in schedule:
+        return f"cron {schedule['cron']}"
+    return f"开始后 {schedule['offset']:g} 秒"
+
+
+class CronExpression:
+    """五个字段的 cron 表达式，支持 *、*/n、a-b、a-b/n 和逗号分隔的列表"""
+
+    def __init__(self, text):
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式需要 5 个字段：{text}")
+        self.text = text
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, _CRON_FIELDS)
+        )
+        # 与 cron 相同：日和星期都有限制时满足其一即可
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, date):
+        weekday = (date.weekday() + 1) % 7
+        if self._any_day or self._any_weekday:
+            return date.day in self.days and weekday in self.weekdays
+        return date.day in self.days or weekday in self.weekdays
+
+    def next_after(self, moment):
+        """moment（datetime）之后第一次匹配的时间（精确到分钟），五年内没有时返回 None"""
+        moment = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                month = moment.month % 12 + 1
+                moment = moment.replace(year=moment.year + (month == 1), month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        return None
+
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        range_part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if range_part == "*":
+            start, end = low, high
+        elif "-" in range_part:
+            start, end = (int(value) for value in range_part.split("-", 1))
+        else:
+            start = end = int(range_part)
+            if step > 1:
+                end = high
+        if step <= 0 or start < low or end > high or start > end:
+            raise ValueError(f"cron 字段超出范围：{field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class ScheduleManager:
+    """按直播间管理定时弹幕，到期时在时间轮线程中调用 on_fire(room_id, schedule)
+
+    一次性的定时弹幕触发后调用 on_done(room_id, schedule)，调用方应把它从保存的信息中删除；
+    offset 类型的定时弹幕只在 trigger(room_id) 后才开始计时，停止发送时用 release(room_id) 取消。
+    """
+
+    def __init__(self, on_fire, on_done=None, wheel=None, clock=time.time):
+        self.on_fire = on_fire
+        self.on_done = on_done
+        self.clock = clock
+        self.wheel = wheel or TimingWheel(clock=clock)
+        self._timers = {}       # (room_id, schedule id) -> Timer
+        self._schedules = {}    # room_id -> {schedule id: schedule}
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.wheel.start()
+        return self
+
+    def stop(self):
+        self.wheel.stop()
+
+    def load(self, schedules):
+        """启动时载入 (room_id, schedule) 序列，返回丢弃的过期一次性定时弹幕列表"""
+        missed = []
+        now = self.clock()
+        for room_id, schedule in schedules:
+            if "at" in schedule and schedule["at"] < now - MISSED_GRACE:
+                missed.append((room_id, schedule))
+                continue
+            self.add(room_id, schedule)
+        return missed
+
+    def add(self, room_id, schedule):
+        """添加定时弹幕；offset 类型只登记，不计时"""
+        with self._lock:
+            self._schedules.setdefault(room_id, {})[schedule["id"]] = schedule
+        if "at" in schedule:
+            self._arm(room_id, schedule, schedule["at"])
+        elif "cron" in schedule:
+            self._arm_cron(room_id, schedule)
+
+    def remove(self, room_id, schedule_id):
+        """删除定时弹幕，返回是否存在"""
+        with self._lock:
+            schedule = self._schedules.get(room_id, {}).pop(schedule_id, None)
+            timer = self._timers.pop((room_id, schedule_id), None)
+        if timer is not None:
+            self.wheel.cancel(timer)
+        return schedule is not None
+
+    def remove_room(self, room_id):
+        for schedule_id in list(self._schedules.get(room_id, ())):
+            self.remove(room_id, schedule_id)
+
+    def schedules(self, room_id):
+        """直播间的定时弹幕列表"""
+        with self._lock:
+            return list(self._schedules.get(room_id, {}).values())
+
+    def trigger(self, room_id):
+        """直播间开始发送：offset 类型的定时弹幕从现在开始计时"""
+        now = self.clock()
+        for schedule in self.schedules(room_id):
+            if "offset" in schedule:
+                self._arm(room_id, schedule, now + schedule["offset"])
+
+    def release(self, room_id):
+        """直播间停止发送：取消还没有触发的 offset 类型定时弹幕"""
+        for schedule in self.schedules(room_id):
+            if "offset" in schedule:
+                with self._lock:
+                    timer = self._timers.pop((room_id, schedule["id"]), None)
+                if timer is not None:
+                    self.wheel.cancel(timer)
+
+    def next_fire(self, room_id, schedule_id):
+        """定时弹幕下一次触发的时间，没有计时时返回 None"""
+        timer = self._timers.get((room_id, schedule_id))
+        return timer.deadline if timer is not None else None
+
+    def _arm(self, room_id, schedule, deadline):
+        timer = self.wheel.schedule(deadline, self._fire, room_id, schedule)
+        with self._lock:
+            old = self._timers.get((room_id, schedule["id"]))
+            self._timers[(room_id, schedule["id"])] = timer
+        if old is not None:
+            self.wheel.cancel(old)
+
+    def _arm_cron(self, room_id, schedule):
+        moment = datetime.datetime.fromtimestamp(self.clock())
+        next_time = CronExpression(schedule["cron"]).next_after(moment)
+        if next_time is not None:
+            self._arm(room_id, schedule, next_time.timestamp())
+
+    def _fire(self, room_id, schedule):
+        with self._lock:
+            if self._schedules.get(room_id, {}).get(schedule["id"]) is not schedule:
+                return  # 已被删除
+            self._timers.pop((room_id, schedule["id"]), None)
+            if "at" in schedule:
+                del self._schedules[room_id][schedule["id"]]
+        try:
+            self.on_fire(room_id, schedule)
+        finally:
+            if "cron" in schedule and self._schedules.get(room_id, {}).get(schedule["id"]) is schedule:
+                self._arm_cron(room_id, schedule)
+            elif "at" in schedule and self.on_done is not None:
+                self.on_done(room_id, schedule)
@@ -0,0 +1,217 @@
+import http.client
+import queue
+import select
+import threading
+import time
+import urllib.parse
+
+from .result import SendResult
+
+API_URL = "https://api.live.bilibili.com/msg/send"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+
+# 复用的连接在服务器端被关闭时可能抛出的异常
+# 在发出请求时遇到说明服务器没有收到请求，换一条新连接重试一次；
+# 在等待响应时遇到则服务器可能已经处理了请求，只重试可以重复的 GET，发送弹幕的 POST 不重试，以免发出两条
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+def encode_form(room_id, message, csrf, csrf_token, color, font_size, mode, rnd=None):
+    """编码一条弹幕的完整表单（每次都重新编码所有字段）"""
+    data = {
+        "roomid": room_id,
+        "msg": message,
+        "rnd": int(time.time()) if rnd is None else rnd,  # 随机数
+        "color": int(color.lstrip('#'), 16),  # 弹幕颜色
+        "fontsize": font_size,                # 字体大小
+        "mode": mode,                         # 弹幕模式
+        "csrf": csrf,
+        "csrf_token": csrf_token
+    }
+    return urllib.parse.urlencode(data).encode("utf-8")
+
+
+class RequestTemplate:
+    """一个任务预编码好的请求：不变的表单字段和请求头只编码一次，
+    每次发送只拼接 msg 和 rnd，结果与 encode_form 完全相同
+
+    发送设置或登录信息变化时需要重新创建（SenderJob 会自动处理）。
+    """
+
+    __slots__ = ("room_id", "sessdata", "headers", "_prefix", "_suffix", "_messages", "_rnd")
+
+    MAX_CACHED_MESSAGES = 256  # 缓存编码结果的弹幕条数，轮播时同一条弹幕只编码一次
+
+    def __init__(self, room_id, csrf, csrf_token, sessdata, color, font_size, mode, headers):
+        self.room_id = room_id
+        self.sessdata = sessdata
+        self.headers = headers
+        quote = urllib.parse.quote_plus
+        self._prefix = f"roomid={quote(str(room_id))}&msg=".encode("ascii")
+        self._suffix = (f"&color={int(color.lstrip('#'), 16)}&fontsize={quote(str(font_size))}&mode={quote(str(mode))}"
+                        f"&csrf={quote(str(csrf))}&csrf_token={quote(str(csrf_token))}").encode("ascii")
+        self._messages = {}  # 弹幕 -> 编码后的 msg 字段
+        self._rnd = (None, b"")  # (rnd, 编码后的 rnd 字段)，整体替换，多个线程同时发送时也不会错配
+
+    def body(self, message, rnd=None):
+        """拼接一条弹幕的请求体"""
+        encoded = self._messages.get(message)
+        if encoded is None:
+            encoded = urllib.parse.quote_plus(message).encode("ascii")
+            if len(self._messages) >= self.MAX_CACHED_MESSAGES:
+                self._messages.clear()
+            self._messages[message] = encoded
+        if rnd is None:
+            rnd = int(time.time())
+        cached_rnd, rnd_bytes = self._rnd
+        if rnd != cached_rnd:
+            # rnd 每秒才变化一次，编码结果可以复用
+            rnd_bytes = b"&rnd=" + str(rnd).encode("ascii")
+            self._rnd = (rnd, rnd_bytes)
+        return b"".join((self._prefix, encoded, rnd_bytes, self._suffix))
+
+
+def _is_dropped(conn):
+    """空闲连接是否已被服务器关闭（空闲时套接字可读说明对方已关闭或发来了多余的数据）"""
+    sock = conn.sock
+    if sock is None:
+        return False  # 还没有连接，发送时才建立
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class DanmuClient:
+    """保持长连接的弹幕发送客户端，多个线程可共用同一个实例"""
+
+    def __init__(self, url=API_URL, timeout=10, pool_size=4):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme == "https":
+            self._connection_class = http.client.HTTPSConnection
+        elif parts.scheme == "http":
+            self._connection_class = http.client.HTTPConnection
+        else:
+            raise ValueError(f"不支持的地址：{url}")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += "?" + parts.query
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)  # 空闲连接池，后进先出优先复用最热的连接
+        self._static_headers = {
+            "User-Agent": USER_AGENT,
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Connection": "keep-alive",
+        }
+        self._headers_cache = {}  # sessdata -> 完整请求头，不变的部分只拼接一次
+        self._lock = threading.Lock()
+
+    def _headers_for(self, sessdata):
+        """获取某个 SESSDATA 对应的请求头"""
+        headers = self._headers_cache.get(sessdata)
+        if headers is None:
+            headers = dict(self._static_headers)
+            headers["Cookie"] = f"SESSDATA={sessdata}"
+            with self._lock:
+                self._headers_cache[sessdata] = headers
+        return headers
+
+    def _acquire(self):
+        """从连接池取出一条连接，丢弃已被服务器关闭的空闲连接，没有可用的连接时新建"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if not _is_dropped(conn):
+                return conn, True
+            conn.close()
+
+    def _connect(self):
+        return self._connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn):
+        """把连接放回连接池，池满时直接关闭"""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def post(self, body, sessdata):
+        """发送一次 POST 请求，返回 (状态码, 响应文本)"""
+        return self._post(body, self._headers_for(sessdata))
+
+    def get(self, sessdata):
+        """以某个 SESSDATA 发送一次 GET 请求，返回 (状态码, 响应文本)"""
+        return self._request("GET", None, self._headers_for(sessdata))
+
+    def _post(self, body, headers):
+        return self._request("POST", body, headers)
+
+    def _request(self, method, body, headers):
+        conn, reused = self._acquire()
+        try:
+            try:
+                conn.request(method, self.path, body=body, headers=headers)
+            except _STALE_ERRORS:
+                # 请求没有发出去，服务器不可能已经处理：复用的连接已被关闭，换一条新连接重试一次
+                if not reused:
+                    raise
+                conn.close()
+                conn, reused = self._connect(), False
+                conn.request(method, self.path, body=body, headers=headers)
+            try:
+                response = conn.getresponse()
+            except _STALE_ERRORS:
+                # 请求已经发出，服务器可能已经处理：只重试可以重复的 GET
+                if not reused or method != "GET":
+                    raise
+                conn.close()
+                conn = self._connect()
+                conn.request(method, self.path, body=body, headers=headers)
+                response = conn.getresponse()
+            text = response.read().decode("utf-8")
+        except BaseException:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, text
+
+    def send(self, room_id, message, csrf, csrf_token, sessdata, color, font_size, mode):
+        """发送一条弹幕，返回解析后的 SendResult；网络异常照常抛出
+
+        每次都重新编码整个表单，循环发送时应使用 compile 和 send_template。
+        """
+        body = encode_form(room_id, message, csrf, csrf_token, color, font_size, mode)
+        status, text = self.post(body, sessdata)
+        return SendResult.parse(text, status)
+
+    def compile(self, room_id, csrf, csrf_token, sessdata, color, font_size, mode):
+        """为一组固定的发送设置创建 RequestTemplate"""
+        return RequestTemplate(room_id, csrf, csrf_token, sessdata, color, font_size, mode, self._headers_for(sessdata))
+
+    def send_template(self, template, message):
+        """用预编码的模板发送一条弹幕，返回 SendResult；网络异常照常抛出"""
+        status, text = self._post(template.body(message), template.headers)
+        return SendResult.parse(text, status)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
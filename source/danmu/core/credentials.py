@@ -0,0 +1,150 @@
+"""登录凭据的有效性检查与缓存
+
+任务开始前用 SESSDATA 请求一次轻量的用户信息接口（nav），凭据无效时直接报错，不进入发送循环。
+检查结果按 SESSDATA 缓存，多个直播间使用同一个账号时只检查一次，
+同时发起的检查合并为一次请求，所有检查共用一个 DanmuClient 的连接池。
+发送时返回 -101（未登录）的任务会把缓存标记为无效，同一账号的其他直播间不必再等发送失败。
+"""
+import json
+import logging
+import threading
+import time
+
+from .client import DanmuClient
+from .result import CODE_NOT_LOGGED_IN, CODE_OK
+
+NAV_URL = "https://api.bilibili.com/x/web-interface/nav"
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialError(ValueError):
+    """登录凭据无效，任务不能开始"""
+
+
+class SessionStatus:
+    """一次凭据检查的结果；valid 为 None 表示无法确定（网络错误、风控等），不阻止发送"""
+
+    __slots__ = ("valid", "code", "message", "uname", "mid", "level", "checked_at")
+
+    def __init__(self, valid, code=None, message="", uname="", mid=None, level=None, checked_at=0.0):
+        self.valid = valid
+        self.code = code            # 接口错误码，请求失败时为 None
+        self.message = message
+        self.uname = uname          # 用户名
+        self.mid = mid              # 用户 UID
+        self.level = level          # 用户等级，决定单条弹幕的长度上限
+        self.checked_at = checked_at
+
+    @classmethod
+    def parse(cls, text, http_status=200, checked_at=0.0):
+        """解析 nav 接口的响应"""
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return cls(None, message=f"HTTP {http_status}", checked_at=checked_at)
+        if not isinstance(payload, dict):
+            return cls(None, message=f"HTTP {http_status}", checked_at=checked_at)
+        code = payload.get("code")
+        message = payload.get("message") or ""
+        data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+        if code == CODE_OK and data.get("isLogin"):
+            level = (data.get("level_info") or {}).get("current_level")
+            return cls(True, code, message, data.get("uname", ""), data.get("mid"), level, checked_at)
+        if code == CODE_NOT_LOGGED_IN or (code == CODE_OK and data.get("isLogin") is False):
+            return cls(False, CODE_NOT_LOGGED_IN, message or "账号未登录", checked_at=checked_at)
+        return cls(None, code, message, checked_at=checked_at)
+
+    def __repr__(self):
+        return f"SessionStatus(valid={self.valid!r}, code={self.code!r}, uname={self.uname!r})"
+
+
+class CredentialManager:
+    """按 SESSDATA 检查并缓存登录状态，可以在多个线程中同时使用
+
+    有效和无效的结果缓存 ttl 秒，无法确定的结果只缓存 retry_ttl 秒。
+    """
+
+    def __init__(self, url=NAV_URL, ttl=600.0, retry_ttl=30.0, client=None, clock=time.monotonic):
+        self.client = client or DanmuClient(url, pool_size=2)
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self.clock = clock
+        self.requests = 0           # 实际发出的检查请求数
+        self.hits = 0               # 命中缓存或合并到其他线程请求的检查数
+        self._cache = {}            # sessdata -> SessionStatus
+        self._pending = {}          # sessdata -> threading.Event，正在检查的凭据
+        self._lock = threading.Lock()
+
+    def cached(self, sessdata):
+        """未过期的缓存结果，没有时返回 None"""
+        status = self._cache.get(sessdata)
+        if status is None:
+            return None
+        ttl = self.ttl if status.valid is not None else self.retry_ttl
+        return status if self.clock() - status.checked_at < ttl else None
+
+    def check(self, sessdata, force=False):
+        """检查凭据，返回 SessionStatus；结果未过期时不发请求，force 为 True 时总是重新检查"""
+        if not sessdata:
+            return SessionStatus(False, CODE_NOT_LOGGED_IN, "缺少 SESSDATA", checked_at=self.clock())
+        while True:
+            with self._lock:
+                status = None if force else self.cached(sessdata)
+                if status is not None:
+                    self.hits += 1
+                    return status
+                event = self._pending.get(sessdata)
+                if event is None:
+                    event = self._pending[sessdata] = threading.Event()
+                    break
+            # 其他线程正在检查同一个凭据，等待它的结果
+            event.wait()
+            force = False
+        try:
+            status = self._fetch(sessdata)
+            with self._lock:
+                self.requests += 1
+                self._cache[sessdata] = status
+        finally:
+            with self._lock:
+                del self._pending[sessdata]
+            event.set()
+        return status
+
+    def require(self, sessdata):
+        """检查凭据，确定无效时抛出 CredentialError，返回 SessionStatus"""
+        status = self.check(sessdata)
+        if status.valid is False:
+            raise CredentialError(f"登录凭据无效（{status.code}）：{status.message}")
+        return status
+
+    def invalidate(self, sessdata, code=CODE_NOT_LOGGED_IN, message="账号未登录"):
+        """发送时发现凭据失效，把缓存标记为无效"""
+        with self._lock:
+            self._cache[sessdata] = SessionStatus(False, code, message, checked_at=self.clock())
+
+    def forget(self, sessdata=None):
+        """清除某个凭据的缓存，不指定时清除全部"""
+        with self._lock:
+            if sessdata is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(sessdata, None)
+
+    def close(self):
+        self.client.close()
+
+    def _fetch(self, sessdata):
+        now = self.clock()
+        try:
+            http_status, text = self.client.get(sessdata)
+        except Exception as e:
+            logger.warning("检查登录凭据失败", extra={"fields": {"error": e}})
+            return SessionStatus(None, message=str(e), checked_at=now)
+        status = SessionStatus.parse(text, http_status, now)
+        if status.valid is False:
+            logger.warning("登录凭据无效", extra={"fields": {"code": status.code, "message": status.message}})
+        else:
+            logger.debug("已检查登录凭据", extra={"fields": {"valid": status.valid, "uname": status.uname}})
+        return status
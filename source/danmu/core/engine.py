@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import profiling
+from .metrics import MetricsRegistry
+from .scheduler import TickScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    """事件循环内部的任务记录"""
+
+    def __init__(self, scheduler, controller):
+        self.scheduler = scheduler
+        self.controller = controller
+        self.wakeup = asyncio.Event()  # 间隔变化时唤醒正在等待的任务
+        self.task = None
+
+
+class SendEngine:
+    """在后台事件循环中以 asyncio 任务运行所有发送任务
+
+    Tk 主线程通过 submit / stop 提交和停止任务，这些方法是线程安全的。
+    每次发送都交给线程池执行，慢请求不会推迟下一次发送。
+    """
+
+    def __init__(self, max_workers=8, max_in_flight=2, metrics=None):
+        self.max_in_flight = max_in_flight  # 每个任务同时进行中的请求上限
+        self.metrics = metrics or MetricsRegistry()  # 各任务的计数器和直方图
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="danmu-send")
+        self._loop = None
+        self._thread = None
+        self._jobs = {}  # job_id -> _Job，只在事件循环线程中修改
+        self._lock = threading.Lock()
+        self._closing = False  # shutdown 进行中，不再接受 stop
+
+    def start(self):
+        """启动后台事件循环（重复调用无副作用）"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name="danmu-engine", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def _call(self, coro):
+        """在事件循环中执行协程并等待结果"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def submit(self, job_id, send, interval, controller=None):
+        """提交发送任务，send 为执行一次发送的无参函数；同 id 的旧任务会被替换
+
+        传入 RateController 时，send 应返回 SendResult，引擎据此调整间隔，
+        遇到致命错误时停止任务。
+        """
+        if interval <= 0:
+            raise ValueError("时间间隔必须大于0")
+        self._call(self._submit(job_id, send, interval, controller))
+        return job_id
+
+    def set_interval(self, job_id, interval):
+        """修改运行中任务的发送间隔，立即生效；返回任务是否存在"""
+        if interval <= 0:
+            raise ValueError("时间间隔必须大于0")
+        if self._loop is None:
+            return False
+        return self._call(self._set_interval(job_id, interval))
+
+    def stats(self, job_id):
+        """任务的调度统计（目标速率、实际速率、延迟等），任务不存在时返回 None"""
+        job = self._jobs.get(job_id)
+        return job.scheduler.stats() if job else None
+
+    def stop(self, job_id):
+        """立即停止任务，返回任务之前是否在运行
+
+        发送线程在任务发送完毕时也会调用 stop；shutdown 开始后直接返回，
+        以免等待一个已经停止的事件循环。
+        """
+        with self._lock:
+            if self._loop is None or self._closing:
+                return False
+            future = asyncio.run_coroutine_threadsafe(self._stop(job_id), self._loop)
+        return future.result()
+
+    def stop_all(self):
+        """停止所有任务"""
+        for job_id in self.running_jobs():
+            self.stop(job_id)
+
+    def is_running(self, job_id):
+        """任务是否正在运行"""
+        return job_id in self._jobs
+
+    def running_jobs(self):
+        """正在运行的任务 id 列表"""
+        return list(self._jobs)
+
+    def shutdown(self, wait=False):
+        """停止所有任务并关闭事件循环；wait 为 True 时等待进行中的请求完成"""
+        with self._lock:
+            if self._loop is None:
+                return
+            self._closing = True
+        self._call(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+        self._loop = None
+        self._thread = None
+        self._closing = False
+
+    async def _submit(self, job_id, send, interval, controller):
+        await self._stop(job_id)
+        loop = asyncio.get_running_loop()
+        if controller is not None:
+            controller.base_interval = interval
+            interval = controller.interval
+        job = _Job(TickScheduler(interval, clock=loop.time), controller)
+        job.task = loop.create_task(self._run_job(job_id, job, send))
+        self._jobs[job_id] = job
+
+    async def _set_interval(self, job_id, interval):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.controller is not None:
+            job.controller.base_interval = interval
+            interval = job.controller.interval
+        job.scheduler.interval = interval
+        job.wakeup.set()
+        return True
+
+    async def _stop(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.task.cancel()
+        await asyncio.wait([job.task])  # 等待任务真正退出，之后事件循环可以安全关闭
+        return True
+
+    async def _close(self):
+        """停止所有任务，并等待其他线程已经提交的 stop 执行完"""
+        for job_id in list(self._jobs):
+            await self._stop(job_id)
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks() if task is not current]
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _run_job(self, job_id, job, send):
+        """按固定截止时间触发发送，不等待上一次请求完成"""
+        loop = asyncio.get_running_loop()
+        scheduler = job.scheduler
+        metrics = self.metrics.job(job_id)
+        in_flight = set()
+        try:
+            while True:
+                delay = scheduler.next_delay()
+                if delay > 0:
+                    job.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(job.wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue  # 重新计算截止时间（可能被唤醒或因计时误差提前醒来）
+                lag = scheduler.tick()
+                if len(in_flight) < self.max_in_flight:
+                    metrics.record_attempt(lag)
+                    future = loop.run_in_executor(self._executor, self._timed_send, metrics, send)
+                    in_flight.add(future)
+                    future.add_done_callback(in_flight.discard)
+                    future.add_done_callback(lambda f: self._report_error(job_id, f))
+                    if job.controller is not None:
+                        future.add_done_callback(lambda f: self._observe(job_id, job, f))
+                else:
+                    metrics.record_skip()
+                    logger.warning("请求堆积，跳过本次发送", extra={"fields": {"job": job_id, "in_flight": len(in_flight)}})
+        finally:
+            if self._jobs.get(job_id) is job:
+                del self._jobs[job_id]
+
+    def _observe(self, job_id, job, future):
+        """把发送结果交给速率控制器，在事件循环线程中执行"""
+        if future.cancelled() or future.exception() is not None or self._jobs.get(job_id) is not job:
+            return
+        result = future.result()
+        if result is None:
+            return
+        controller = job.controller
+        interval = controller.observe(result)
+        if controller.stopped:
+            logger.warning("任务已停止", extra={"fields": {"job": job_id, "reason": controller.stop_reason}})
+            self._jobs.pop(job_id, None)
+            job.task.cancel()
+        elif interval != job.scheduler.interval:
+            job.scheduler.interval = interval
+            job.wakeup.set()
+
+    @staticmethod
+    def _timed_send(metrics, send):
+        """在线程池中执行一次发送并记录耗时和结果"""
+        profiler = profiling.active  # 没有进行性能分析时只多读一次模块属性
+        start = time.perf_counter()
+        try:
+            result = send() if profiler is None else profiler.run(send)
+        except BaseException:
+            metrics.record_error(time.perf_counter() - start)
+            raise
+        metrics.record_result(result, time.perf_counter() - start)
+        return result
+
+    @staticmethod
+    def _report_error(job_id, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("发送弹幕失败", extra={"fields": {"job": job_id, "error": future.exception()}})
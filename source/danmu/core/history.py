@@ -0,0 +1,187 @@
+"""最近发送记录的环形缓冲区，容量固定，任务运行多久内存都不变
+
+每列一个预先分配的 array（时间、延迟、错误码、状态、直播间编号），弹幕只保存对原字符串的引用，
+每条记录约 33 字节，不为每条记录创建对象。记录按序号 seq（从 0 递增）编号，
+位置为 seq % capacity，写满后新记录覆盖最早的记录。
+"""
+import array
+import bisect
+import collections.abc
+import math
+import threading
+import time
+
+CAPACITY = 200000  # 默认保存的记录条数
+
+# 发送状态
+OK = 0
+FILTERED = 1    # 接口返回成功但弹幕被屏蔽
+FAILED = 2      # 接口返回错误码
+ERROR = 3       # 网络错误或无法解析响应
+
+NO_CODE = -2 ** 31  # 没有错误码（网络错误）时存入的值
+
+
+class HistoryEntry:
+    """一条发送记录，只在显示时创建"""
+
+    __slots__ = ("seq", "timestamp", "room_id", "message", "code", "status", "latency")
+
+    def __init__(self, seq, timestamp, room_id, message, code, status, latency):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.room_id = room_id
+        self.message = message
+        self.code = code        # 接口错误码，没有时为 None
+        self.status = status
+        self.latency = latency  # 请求耗时（秒），未知时为 nan
+
+
+def status_of(result):
+    """SendResult 对应的发送状态"""
+    if result.ok:
+        return OK
+    if result.filtered:
+        return FILTERED
+    return ERROR if result.code is None else FAILED
+
+
+class SendHistory:
+    """固定容量的发送记录，可以在多个发送线程中同时写入"""
+
+    def __init__(self, capacity=CAPACITY):
+        if capacity <= 0:
+            raise ValueError("容量必须大于0")
+        self.capacity = capacity
+        self._timestamps = array.array("d", bytes(8 * capacity))
+        self._latencies = array.array("d", bytes(8 * capacity))
+        self._codes = array.array("i", bytes(4 * capacity))
+        self._statuses = array.array("b", bytes(capacity))
+        self._rooms = array.array("I", bytes(4 * capacity))
+        self._messages = [None] * capacity
+        self._room_ids = []         # 直播间编号 -> 直播间ID
+        self._room_index = {}       # 直播间ID -> 编号
+        self._total = 0             # 写入过的记录总数，也是下一条记录的序号
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self):
+        return self._total
+
+    @property
+    def oldest(self):
+        """还保留着的最早记录的序号"""
+        return max(0, self._total - self.capacity)
+
+    def record(self, room_id, message, result, latency, timestamp=None):
+        """记录一次发送的结果（send_danmu / send_template 的 history 参数）"""
+        self.add(room_id, message, result.code, status_of(result), latency, timestamp)
+
+    def add(self, room_id, message, code, status, latency=math.nan, timestamp=None):
+        """写入一条记录，返回它的序号"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            room = self._room_index.get(room_id)
+            if room is None:
+                room = self._room_index[room_id] = len(self._room_ids)
+                self._room_ids.append(room_id)
+            seq = self._total
+            i = seq % self.capacity
+            self._timestamps[i] = timestamp
+            self._latencies[i] = latency
+            self._codes[i] = NO_CODE if code is None else code
+            self._statuses[i] = status
+            self._rooms[i] = room
+            self._messages[i] = message
+            self._total = seq + 1
+        return seq
+
+    def load_records(self, records):
+        """载入发送日志（SendJournal.history）中的结果记录，延迟未知"""
+        for record in records:
+            code = record.get("code")
+            if record.get("ok"):
+                status = OK
+            elif code is None:
+                status = ERROR
+            else:
+                status = FILTERED if code == 0 else FAILED
+            self.add(record.get("room"), record.get("msg"), code, status, timestamp=record.get("t"))
+
+    def entry(self, seq):
+        """序号为 seq 的记录，已被覆盖或还不存在时返回 None"""
+        with self._lock:
+            if not self.oldest <= seq < self._total:
+                return None
+            i = seq % self.capacity
+            code = self._codes[i]
+            return HistoryEntry(seq, self._timestamps[i], self._room_ids[self._rooms[i]], self._messages[i],
+                                None if code == NO_CODE else code, self._statuses[i], self._latencies[i])
+
+    def rooms(self):
+        """出现过的直播间ID"""
+        with self._lock:
+            return list(self._room_ids)
+
+    def seqs(self, room_id, start=0, stop=None):
+        """直播间序号在 [start, stop) 内且仍然保留的记录序号（从旧到新）"""
+        with self._lock:
+            room = self._room_index.get(room_id)
+            if room is None:
+                return array.array("q")
+            stop = self._total if stop is None else min(stop, self._total)
+            capacity, rooms = self.capacity, self._rooms
+            return array.array("q", (seq for seq in range(max(start, self.oldest), stop) if rooms[seq % capacity] == room))
+
+
+class HistoryView(collections.abc.Sequence):
+    """发送记录序号的列表（最新的在前），可以只看一个直播间，直接作为 VirtualList 的 keys
+
+    refresh() 只扫描上次刷新之后的新记录并去掉已被覆盖的记录，不重新扫描整个缓冲区。
+    """
+
+    def __init__(self, history, room_id=None):
+        self.history = history
+        self.room_id = room_id
+        self._seqs = array.array("q")   # 过滤后的序号，从旧到新
+        self._oldest = 0
+        self._total = 0                 # 已经扫描到的序号
+        self.refresh()
+
+    def refresh(self):
+        """更新到最新的记录，返回新加入的条数（没有变化时为 0）"""
+        history = self.history
+        total, oldest = history.total, history.oldest
+        if total == self._total:
+            return 0
+        if self.room_id is None:
+            added = total - max(self._total, oldest)
+        else:
+            new = history.seqs(self.room_id, self._total, total)
+            added = len(new)
+            self._seqs.extend(new)
+            expired = bisect.bisect_left(self._seqs, oldest)
+            if expired:
+                del self._seqs[:expired]
+        self._total, self._oldest = total, oldest
+        return added
+
+    def __len__(self):
+        if self.room_id is None:
+            return self._total - self._oldest
+        return len(self._seqs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(index)
+        if self.room_id is None:
+            return self._total - 1 - index
+        return self._seqs[size - 1 - index]
@@ -0,0 +1,245 @@
+import logging
+import threading
+
+from .engine import SendEngine
+from .playlist import Playlist
+from .ratecontrol import RateController
+from .result import CODE_NOT_LOGGED_IN
+from .sender import get_client, send_template
+from .validate import MessageError
+
+logger = logging.getLogger(__name__)
+
+SINGLE = "single"  # 只发送一条弹幕内容
+
+# 任务状态
+RUNNING = "running"
+PAUSED = "paused"
+STOPPED = "stopped"
+
+# 修改这些属性时需要重新编码请求模板
+_TEMPLATE_FIELDS = frozenset(("room_id", "csrf", "csrf_token", "sessdata", "color", "font_size", "mode", "client"))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """进程内共享的发送引擎，第一次使用时创建"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SendEngine()
+    return _engine
+
+
+class SenderJob:
+    """一个直播间的循环发送任务，不依赖任何界面
+
+    messages 可以是单条弹幕、弹幕列表（直接引用，不复制）或 Playlist；
+    play_mode 为 "single" 时只发送第一条弹幕。
+    请求在第一次发送时编码为 RequestTemplate，之后每次只拼接弹幕内容；
+    修改颜色、字体大小、模式或登录信息时模板自动失效，下一次发送时重新编码。
+    on_send(job, message) 在发出请求前、on_result(job, message, result) 在收到结果后调用，
+    都在发送线程中执行，界面需要自己转回主线程。
+    给出 credentials（CredentialManager）时开始发送前先检查登录凭据，无效时 start 抛出 CredentialError。
+    给出 validator（MessageValidator）时开始发送前按账号等级检查一次弹幕列表，只发送检查通过的弹幕；
+    列表需要修改（拆分多行、去掉不合格的弹幕）时换成检查后的副本，之后不再跟随原列表变化。
+    给出 journal（SendJournal）时把开始、每次发送的位置和结果、暂停和停止写入发送日志，崩溃后可以从日志中的位置继续。
+    给出 history（SendHistory）时把每次发送的结果和耗时记入内存中的发送记录。
+    """
+
+    def __init__(self, room_id, csrf, csrf_token, sessdata, messages, color="#FFFFFF", font_size=25, mode=1,
+                 interval=5, play_mode=SINGLE, weights=None, count=0, engine=None, client=None,
+                 on_result=None, credentials=None, validator=None, on_send=None, journal=None,
+                 history=None):
+        self.room_id = room_id
+        self.csrf = csrf
+        self.csrf_token = csrf_token
+        self.sessdata = sessdata
+        self.color = color
+        self.font_size = font_size
+        self.mode = mode
+        self.interval = interval
+        self.count = count          # 发送条数上限，0 表示不限
+        self.sent = 0               # 已发送条数
+        self._reserved = 0          # 已经开始（包括还在进行中）的发送条数，不超过 count
+        self.last_result = None
+        self.engine = engine or get_engine()
+        self.client = client
+        self.on_result = on_result
+        self.on_send = on_send
+        self.credentials = credentials
+        self.validator = validator
+        self.journal = journal
+        self.history = history
+        self.play_mode = messages.mode if isinstance(messages, Playlist) else play_mode
+        self.level = None           # 账号等级，检查登录凭据后得到
+        self.rejected = []          # 开始发送时没有通过检查的弹幕 [(原文, 原因)]
+        if isinstance(messages, Playlist):
+            self.playlist = messages
+        elif play_mode == SINGLE:
+            if isinstance(messages, str):
+                messages = [messages] if messages else []
+            self.playlist = Playlist(list(messages[:1]))
+        else:
+            self.playlist = Playlist(messages, play_mode, weights)
+        self.controller = None
+        self.paused = False
+        self._template = None
+        self._lock = threading.Lock()
+
+    def __setattr__(self, name, value):
+        if name in _TEMPLATE_FIELDS:
+            object.__setattr__(self, "_template", None)
+        object.__setattr__(self, name, value)
+
+    @property
+    def job_id(self):
+        return self.room_id
+
+    @property
+    def running(self):
+        """任务是否正在发送"""
+        return self.engine.is_running(self.job_id)
+
+    @property
+    def state(self):
+        """任务状态：running、paused 或 stopped（包括发送完毕和因致命错误停止）"""
+        if self.paused:
+            return PAUSED
+        return RUNNING if self.running else STOPPED
+
+    def start(self, resume=None):
+        """开始循环发送，给出 resume（发送日志中的 ResumePoint）时从上次的位置和已发送条数继续
+
+        没有可发送的弹幕时抛出 ValueError，登录凭据无效时抛出 CredentialError，
+        弹幕全部没有通过检查时抛出 MessageError（都是 ValueError 的子类）。
+        """
+        if not self.playlist.messages and not self.playlist.pending:
+            raise ValueError("弹幕内容为空")
+        if self.validator is not None and self.credentials is not None:
+            # 账号等级还不知道：先按最宽的长度上限检查一遍（不修改列表），任何等级都发不出去时不再请求检查登录凭据
+            self._validate_playlist(self.validator.longest_limit, apply=False)
+        if self.credentials is not None:
+            self.level = self.credentials.require(self.sessdata).level
+        if self.validator is not None:
+            self._validate_playlist()
+        self.sent = 0
+        if resume is not None:
+            self.sent = resume.sent
+            self.playlist.seek(resume.position)
+        self._reserved = self.sent
+        self.paused = False
+        self.controller = RateController(self.interval)
+        if self.journal is not None:
+            self.journal.started(self)
+        self.engine.submit(self.job_id, self._send_next, self.interval, self.controller)
+
+    def stop(self):
+        """停止发送，返回任务之前是否在运行"""
+        self.paused = False
+        if self.journal is not None:
+            self.journal.stopped(self)
+        return self.engine.stop(self.job_id)
+
+    def pause(self):
+        """暂停发送，保留播放位置、已发送条数和当前间隔；返回是否暂停成功"""
+        if not self.engine.stop(self.job_id):
+            return False
+        self.paused = True
+        if self.journal is not None:
+            self.journal.paused(self)
+        return True
+
+    def resume(self):
+        """继续暂停的任务，返回是否继续成功"""
+        if not self.paused:
+            return False
+        self.paused = False
+        if self.journal is not None:
+            self.journal.resumed(self)
+        self.engine.submit(self.job_id, self._send_next, self.controller.interval, self.controller)
+        return True
+
+    def set_interval(self, interval):
+        """修改发送间隔，运行中的任务立即生效，暂停的任务继续时生效"""
+        self.interval = interval
+        if self.running:
+            self.engine.set_interval(self.job_id, interval)
+        elif self.controller is not None:
+            self.controller.base_interval = interval
+
+    def push(self, message):
+        """插播一条弹幕，不需要重新开始发送；没有通过检查或插播队列已满时抛出 MessageError"""
+        if self.validator is None:
+            messages = [message]
+        else:
+            result = self.validator.validate([message], self.level)
+            if not result.messages:
+                raise MessageError(result.summary())
+            messages = result.messages
+        for text in messages:
+            if not self.playlist.push(text):
+                raise MessageError(f"插播队列已满（{self.playlist.maxlen} 条），请稍后再插播")
+
+    def _validate_playlist(self, max_length=None, apply=True):
+        """检查弹幕列表，全部没有通过时抛出 MessageError；apply 为 False 时只检查，不修改列表"""
+        messages = self.playlist.messages
+        result = self.validator.validate(messages, self.level, max_length)
+        if not apply:
+            if not result.messages and not self.playlist.pending:
+                raise MessageError(result.summary() or "弹幕内容为空")
+            return
+        self.rejected = result.rejected
+        for text, reason in result.rejected:
+            logger.warning("弹幕没有通过检查", extra={"fields": {"room": self.room_id, "message": text, "reason": reason}})
+        if not result.messages and not self.playlist.pending:
+            raise MessageError(result.summary() or "弹幕内容为空")
+        if result.messages != messages:
+            self.playlist.messages = result.messages
+
+    def stats(self):
+        """调度统计，任务未运行时返回 None"""
+        return self.engine.stats(self.job_id)
+
+    def metrics(self):
+        """发送计数和耗时直方图的快照，从未发送过时返回 None"""
+        return self.engine.metrics.snapshot(self.job_id)
+
+    def _send_next(self):
+        """发送下一条弹幕，在线程池中执行"""
+        with self._lock:
+            # 同一任务可能同时有多个请求在进行，发送前先占用名额，已达到 count 时不再发送
+            if self.count and self._reserved >= self.count:
+                return None
+            self._reserved += 1
+        message = self.playlist.next()
+        if message is None:
+            with self._lock:
+                self._reserved -= 1
+            return None
+        client = self.client or get_client()
+        template = self._template
+        if template is None:
+            template = self._template = client.compile(self.room_id, self.csrf, self.csrf_token, self.sessdata,
+                                                       self.color, self.font_size, self.mode)
+        if self.journal is not None:
+            self.journal.sending(self, message, self.playlist.position)
+        if self.on_send is not None:
+            self.on_send(self, message)
+        result = send_template(template, message, client, self.history)
+        with self._lock:
+            self.sent += 1
+            self.last_result = result
+            finished = self.count and self.sent >= self.count
+        if result.code == CODE_NOT_LOGGED_IN and self.credentials is not None:
+            self.credentials.invalidate(self.sessdata, result.code, result.message)
+        if self.journal is not None:
+            self.journal.finished(self, message, result)
+        if self.on_result is not None:
+            self.on_result(self, message, result)
+        if finished:
+            self.stop()
+        return result
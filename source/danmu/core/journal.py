@@ -0,0 +1,422 @@
+"""发送日志：只追加写入的发送记录，进程崩溃后从最后写入的位置继续发送
+
+    journal = SendJournal("config/journal")
+    jobs = JobManager(journal=journal)
+    for room_id, point in jobs.unfinished().items():   # 上次没有正常停止的任务
+        ...重新创建任务...
+        jobs.start(job, resume=True)
+
+每条记录一行：8 位十六进制的 CRC32、空格、JSON。记录先放进内存缓冲区，由写入线程每隔
+flush_interval 秒成批写入并 fsync 一次（组提交），发送线程只做一次列表追加。
+崩溃时最多丢失最后一批记录；写到一半的行在下次打开时按 CRC 识别并截掉。
+日志文件按 segment_size 轮换，每次打开也写入新文件；旧文件超过 compact_after 个时
+（轮换或打开时检查）合并为一个：只保留各直播间的任务状态和最近 history_size 条发送结果。
+"""
+import collections
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+JOURNAL_DIR = "config/journal"   # 发送日志的默认目录
+SEGMENT_SIZE = 4 * 1024 * 1024   # 单个日志文件的大小上限（字节）
+HISTORY_SIZE = 50000             # 合并日志和内存中保留的发送结果条数
+EXPORT_FORMATS = ("csv", "jsonl")
+
+logger = logging.getLogger(__name__)
+
+
+def encode_record(record):
+    """编码一条记录（带 CRC 的一行）"""
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    return f"{zlib.crc32(data.encode('utf-8')):08x} {data}\n"
+
+
+def decode_record(line):
+    """解码一行记录，行不完整或校验失败时返回 None"""
+    if len(line) < 10 or line[8:9] != " " or not line.endswith("\n"):
+        return None
+    data = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(data.encode("utf-8")):
+            return None
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def read_segment(path):
+    """读取一个日志文件，返回 (记录列表, 有效内容的字节数)；遇到损坏的行时停止"""
+    records = []
+    valid = 0
+    with open(path, "rb") as file:
+        for raw in file:
+            record = decode_record(raw.decode("utf-8", "replace"))
+            if record is None:
+                break
+            records.append(record)
+            valid += len(raw)
+    return records, valid
+
+
+class ResumePoint:
+    """一个没有正常停止的任务：开始时的设置和最后写入的发送位置"""
+
+    __slots__ = ("room_id", "play_mode", "messages", "interval", "count", "position", "sent")
+
+    def __init__(self, room_id, play_mode="single", messages=None, interval=None, count=0, position=0, sent=0):
+        self.room_id = room_id
+        self.play_mode = play_mode
+        self.messages = messages or []  # 单条弹幕模式下检查后的弹幕（一条弹幕可能拆成了多行）
+        self.interval = interval
+        self.count = count
+        self.position = position    # 下一条要发送的轮播位置
+        self.sent = sent            # 已发送条数
+
+    @classmethod
+    def from_start(cls, record):
+        messages = record.get("messages")
+        if messages is None and record.get("message"):
+            messages = [record["message"]]  # 旧版本只记录了第一条
+        return cls(record["room"], record.get("play_mode", "single"), messages,
+                   record.get("interval"), record.get("count", 0))
+
+    @property
+    def finished(self):
+        return bool(self.count) and self.sent >= self.count
+
+    def copy(self):
+        return ResumePoint(self.room_id, self.play_mode, list(self.messages), self.interval, self.count, self.position, self.sent)
+
+
+class JournalState:
+    """由记录重放得到的状态：各直播间的任务和最近的发送结果"""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.points = {}        # room_id -> ResumePoint
+        self.active = set()     # 正在发送（没有停止或暂停）的直播间
+        self.history = collections.deque(maxlen=history_size)  # 最近的发送结果记录
+
+    def apply(self, record):
+        kind = record.get("kind")
+        room_id = record.get("room")
+        if kind == "send":
+            point = self.points.get(room_id)
+            if point is not None:
+                point.position = record.get("pos", point.position)
+                point.sent = record.get("sent", point.sent)
+        elif kind == "result":
+            self.history.append(record)
+            if record.get("fatal"):
+                self.active.discard(room_id)
+        elif kind == "start":
+            self.points[room_id] = ResumePoint.from_start(record)
+            self.points[room_id].position = record.get("pos", 0)
+            self.points[room_id].sent = record.get("sent", 0)
+            self.active.add(room_id)
+        elif kind == "resume":
+            if room_id in self.points:
+                self.active.add(room_id)
+        elif kind in ("stop", "pause"):
+            self.active.discard(room_id)
+
+    def records(self):
+        """重放后得到相同状态的最少记录（合并日志时写入）"""
+        records = list(self.history)
+        for room_id, point in self.points.items():
+            records.append({"kind": "start", "room": room_id, "play_mode": point.play_mode, "messages": point.messages,
+                            "interval": point.interval, "count": point.count, "pos": point.position, "sent": point.sent})
+            if room_id not in self.active:
+                records.append({"kind": "stop", "room": room_id})
+        return records
+
+
+class SendJournal:
+    """只追加的发送日志，写入在后台线程中进行
+
+    started / sending / finished / paused / resumed / stopped 由 SenderJob 在相应时刻调用；
+    unfinished() 给出上次没有正常停止的任务，history() 和 export() 读取发送记录，不需要读取配置。
+    """
+
+    def __init__(self, directory=JOURNAL_DIR, segment_size=SEGMENT_SIZE, flush_interval=0.2, history_size=HISTORY_SIZE,
+                 compact_after=4, max_batch=1000, fsync=True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.history_size = history_size
+        self.compact_after = compact_after  # 旧日志文件超过该数量时合并
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.batches = 0                    # 写入（fsync）的次数
+        os.makedirs(directory, exist_ok=True)
+        self._cond = threading.Condition()
+        self._files_lock = threading.RLock()  # 合并日志和导出时锁定日志文件列表
+        self._buffer = []
+        self._appended = 0
+        self._committed = 0
+        self._flushing = 0
+        self._closing = False
+        self._state = self._recover()
+        # 打开时没有正常停止的任务，之后的发送不会改变它
+        self._unfinished = {room_id: point.copy() for room_id, point in self._state.points.items()
+                            if room_id in self._state.active and not point.finished}
+        numbers = self._segments()
+        self._segment = (numbers[-1] if numbers else 0) + 1  # 每次打开都写入新文件
+        self._file = self._open_segment(self._segment)
+        self._size = 0
+        # 频繁重启时每次都留下一个小文件，打开时也检查一次，免得启动时要重放的文件越来越多
+        self._compact_if_needed()
+        self._thread = threading.Thread(target=self._run, name="danmu-journal", daemon=True)
+        self._thread.start()
+
+    # 由 SenderJob 调用
+
+    def started(self, job):
+        record = {"kind": "start", "room": job.room_id, "play_mode": job.play_mode, "interval": job.interval,
+                  "count": job.count, "pos": job.playlist.position, "sent": job.sent}
+        if job.play_mode == "single" and job.playlist.messages:
+            record["messages"] = list(job.playlist.messages)  # 检查后的全部弹幕，多行弹幕拆出的每一行都要恢复
+        self.append(record)
+
+    def sending(self, job, message, position):
+        self.append({"kind": "send", "room": job.room_id, "msg": message, "pos": position, "sent": job.sent + 1})
+
+    def finished(self, job, message, result):
+        record = {"kind": "result", "room": job.room_id, "msg": message, "ok": result.ok, "code": result.code}
+        if not result.ok:
+            record["info"] = result.message
+            if result.fatal:
+                record["fatal"] = True
+        self.append(record)
+
+    def paused(self, job):
+        self.append({"kind": "pause", "room": job.room_id})
+
+    def resumed(self, job):
+        self.append({"kind": "resume", "room": job.room_id})
+
+    def stopped(self, job):
+        self.append({"kind": "stop", "room": job.room_id})
+
+    # 读取
+
+    def unfinished(self):
+        """打开日志时上次没有正常停止、也没有发送完的任务 {room_id: ResumePoint}"""
+        return dict(self._unfinished)
+
+    def resume_point(self, room_id):
+        """直播间上次没有完成的任务，没有时返回 None"""
+        return self._unfinished.get(room_id)
+
+    def history(self, room_id=None, limit=100):
+        """最近的发送结果记录（最新的在后），可以只看一个直播间"""
+        with self._cond:
+            records = list(self._state.history)
+        if room_id is not None:
+            records = [record for record in records if record.get("room") == room_id]
+        return records[-limit:] if limit else records
+
+    def iter_results(self, room_id=None):
+        """按时间顺序读出日志文件中所有的发送结果记录"""
+        self.flush()
+        with self._files_lock:
+            for number in self._segments():
+                records, _ = read_segment(self._path(number))
+                for record in records:
+                    if record.get("kind") == "result" and (room_id is None or record.get("room") == room_id):
+                        yield record
+
+    def export(self, path, room_id=None, fmt=None):
+        """把发送记录导出为 CSV 或 JSONL 文件（按扩展名判断），先写临时文件再替换，返回导出的条数"""
+        fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的格式：{fmt}")
+        import csv
+        count = 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="") as file:
+            writer = csv.writer(file) if fmt == "csv" else None
+            if writer is not None:
+                writer.writerow(("时间", "直播间", "弹幕", "成功", "错误码", "说明"))
+            for record in self.iter_results(room_id):
+                if writer is not None:
+                    when = datetime.datetime.fromtimestamp(record.get("t", 0)).strftime("%Y-%m-%d %H:%M:%S")
+                    writer.writerow((when, record.get("room"), record.get("msg"), int(bool(record.get("ok"))),
+                                     record.get("code"), record.get("info", "")))
+                else:
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, path)
+        return count
+
+    # 写入
+
+    def append(self, record):
+        """追加一条记录（只放进缓冲区，由写入线程写盘）"""
+        record["t"] = round(time.time(), 3)
+        with self._cond:
+            if self._closing:
+                return
+            self._state.apply(record)
+            self._buffer.append(record)
+            self._appended += 1
+            if len(self._buffer) == 1 or len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """等待已经追加的记录写盘，返回是否在 timeout 内完成"""
+        with self._cond:
+            target = self._appended
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._committed >= target, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self):
+        """写入缓冲区中的记录并关闭日志"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+    def compact(self):
+        """把除当前文件外的所有日志文件合并为一个，返回合并的文件数（在写入线程中或打开时调用）"""
+        with self._files_lock:
+            numbers = [number for number in self._segments() if number != self._segment]
+            if len(numbers) < 2:
+                return 0
+            state = JournalState(self.history_size)
+            for number in numbers:
+                for record in read_segment(self._path(number))[0]:
+                    state.apply(record)
+            # 合并后的内容写入编号最大的旧文件；开头的 compact 记录说明它取代了哪些文件，
+            # 写入后、删除旧文件前崩溃时，下次打开会删除这些旧文件
+            target = self._path(numbers[-1])
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="\n") as file:
+                file.write(encode_record({"kind": "compact", "first": numbers[0]}))
+                for record in state.records():
+                    file.write(encode_record(record))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, target)
+            _fsync_directory(self.directory)
+            for number in numbers[:-1]:
+                os.remove(self._path(number))
+        logger.info("已合并发送日志", extra={"fields": {"segments": len(numbers), "records": len(state.history)}})
+        return len(numbers)
+
+    def _path(self, number):
+        return os.path.join(self.directory, f"{number:08d}.log")
+
+    def _segments(self):
+        """日志文件编号，从小到大"""
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".log") and name[:-4].isdigit())
+
+    def _open_segment(self, number):
+        file = open(self._path(number), "ab")
+        _fsync_directory(self.directory)
+        return file
+
+    def _recover(self):
+        """重放日志文件：删除已被合并取代的文件，截掉写到一半的行"""
+        numbers = self._segments()
+        superseded = set()
+        for number in numbers:
+            with open(self._path(number), "rb") as file:
+                first = decode_record(file.readline().decode("utf-8", "replace"))
+            if first is not None and first.get("kind") == "compact":
+                superseded.update(n for n in numbers if first["first"] <= n < number)
+        for number in superseded:
+            os.remove(self._path(number))
+        state = JournalState(self.history_size)
+        for number in numbers:
+            if number in superseded:
+                continue
+            path = self._path(number)
+            records, valid = read_segment(path)
+            if valid < os.path.getsize(path):
+                logger.warning("发送日志末尾不完整，已截掉", extra={"fields": {"file": path, "bytes": os.path.getsize(path) - valid}})
+                os.truncate(path, valid)
+            for record in records:
+                state.apply(record)
+        return state
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closing:
+                    self._cond.wait()
+                # 组提交：等待 flush_interval 收集更多记录，有人调用 flush() 或关闭时立即写入
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closing and not self._flushing and len(self._buffer) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._buffer = self._buffer, []
+                closing = self._closing
+            if batch:
+                self._write(batch)
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+            if closing and not batch:
+                return
+            if self._size >= self.segment_size:
+                self._rotate()
+
+    def _write(self, batch):
+        data = "".join(encode_record(record) for record in batch).encode("utf-8")
+        try:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            logger.error("写入发送日志失败", extra={"fields": {"records": len(batch), "error": e}})
+            return
+        self._size += len(data)
+        self.batches += 1
+
+    def _rotate(self):
+        try:
+            with self._files_lock:
+                self._file.close()
+                self._segment += 1
+                self._file = self._open_segment(self._segment)
+                self._size = 0
+        except OSError as e:
+            logger.error("轮换发送日志失败", extra={"fields": {"error": e}})
+            return
+        self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        """旧日志文件超过 compact_after 个时合并"""
+        try:
+            if len(self._segments()) - 1 > self.compact_after:
+                self.compact()
+        except OSError as e:
+            logger.error("合并发送日志失败", extra={"fields": {"error": e}})
+
+
+def _fsync_directory(directory):
+    """让新建、替换的文件名写盘（Windows 上不支持，忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
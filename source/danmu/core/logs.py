@@ -0,0 +1,56 @@
+"""结构化日志：发送路径只记录事件名和字段，由 Formatter 决定输出格式
+
+    logger.warning("弹幕被拒绝", extra={"fields": {"room": room_id, "code": code}})
+
+文本格式输出为 "时间 级别 模块 事件 room=123 code=10030"，
+JSON 格式每条日志一行，便于无界面运行时交给日志收集程序。
+"""
+import json
+import logging
+import sys
+
+ROOT_LOGGER = "danmu"
+FORMATS = ("text", "json")
+
+
+class StructuredFormatter(logging.Formatter):
+    """把日志记录和其中的 fields 格式化为 key=value 文本或一行 JSON"""
+
+    def __init__(self, fmt="text"):
+        super().__init__()
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的日志格式：{fmt}")
+        self.fmt = fmt
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        if self.fmt == "json":
+            payload = {
+                "time": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "event": record.getMessage(),
+            }
+            payload.update(fields)
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+        text = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def setup_logging(level="INFO", fmt="text", stream=None):
+    """给 danmu 下的所有 logger 配置输出（重复调用会替换之前的配置），返回根 logger"""
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(StructuredFormatter(fmt))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
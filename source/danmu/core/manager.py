@@ -0,0 +1,100 @@
+import threading
+
+from .job import STOPPED, SenderJob, get_engine
+
+
+class JobManager:
+    """按直播间ID管理多个发送任务
+
+    每个直播间最多一个任务，可以分别开始、暂停、继续和停止；
+    所有任务共用同一个 SendEngine（一个事件循环和一个线程池），不为每个直播间创建线程。
+    给出 credentials（CredentialManager）时，任务开始前检查登录凭据，使用同一账号的直播间共用检查结果；
+    给出 validator（MessageValidator）时，任务开始前检查弹幕；
+    给出 journal（SendJournal）时，任务的发送记录写入发送日志，崩溃后可以用 unfinished() 和 start(resume=True) 继续；
+    给出 history（SendHistory）时，所有任务的发送结果记入同一个发送记录。
+    """
+
+    def __init__(self, engine=None, client=None, credentials=None, validator=None, journal=None, history=None):
+        self.engine = engine or get_engine()
+        self.client = client
+        self.credentials = credentials
+        self.validator = validator
+        self.journal = journal
+        self.history = history
+        self._jobs = {}  # room_id -> SenderJob
+        self._lock = threading.Lock()
+
+    def create(self, room_id, csrf, csrf_token, sessdata, messages, **settings):
+        """为直播间创建任务（不开始发送），settings 为 SenderJob 的关键字参数"""
+        settings.setdefault("client", self.client)
+        settings.setdefault("credentials", self.credentials)
+        settings.setdefault("validator", self.validator)
+        settings.setdefault("journal", self.journal)
+        settings.setdefault("history", self.history)
+        return SenderJob(room_id, csrf, csrf_token, sessdata, messages, engine=self.engine, **settings)
+
+    def start(self, job, resume=False):
+        """开始发送任务，同一直播间原有的任务会先被停止；resume 为 True 时从发送日志中上次的位置继续
+
+        没有可发送的弹幕时抛出 ValueError，登录凭据无效时抛出 CredentialError，
+        弹幕全部没有通过检查时抛出 MessageError（都是 ValueError 的子类）。
+        """
+        with self._lock:
+            old = self._jobs.get(job.room_id)
+        if old is not None and old is not job:
+            old.stop()
+        point = self.journal.resume_point(job.room_id) if resume and self.journal is not None else None
+        job.start(point)
+        with self._lock:
+            self._jobs[job.room_id] = job
+        return job
+
+    def unfinished(self):
+        """发送日志中上次没有正常停止的任务 {直播间ID: ResumePoint}"""
+        return self.journal.unfinished() if self.journal is not None else {}
+
+    def get(self, room_id):
+        """直播间的任务，没有时返回 None"""
+        return self._jobs.get(room_id)
+
+    def pause(self, room_id):
+        """暂停直播间的任务，返回是否暂停成功"""
+        job = self._jobs.get(room_id)
+        return job is not None and job.pause()
+
+    def resume(self, room_id):
+        """继续直播间暂停的任务，返回是否继续成功"""
+        job = self._jobs.get(room_id)
+        return job is not None and job.resume()
+
+    def stop(self, room_id):
+        """停止并移除直播间的任务，返回任务之前是否在运行或暂停"""
+        with self._lock:
+            job = self._jobs.pop(room_id, None)
+        if job is None:
+            return False
+        paused = job.paused
+        return job.stop() or paused
+
+    def stop_all(self):
+        """停止所有任务"""
+        for room_id in list(self._jobs):
+            self.stop(room_id)
+
+    def state(self, room_id):
+        """直播间任务的状态，没有任务时为 stopped"""
+        job = self._jobs.get(room_id)
+        return job.state if job is not None else STOPPED
+
+    def states(self):
+        """{直播间ID: 状态}，只包含有任务的直播间"""
+        return {room_id: job.state for room_id, job in list(self._jobs.items())}
+
+    def __contains__(self, room_id):
+        return room_id in self._jobs
+
+    def __iter__(self):
+        return iter(list(self._jobs))
+
+    def __len__(self):
+        return len(self._jobs)
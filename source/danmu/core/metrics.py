@@ -0,0 +1,245 @@
+"""发送任务的计数器和直方图
+
+每个任务一个 JobMetrics，由 SendEngine 在发送路径上更新，
+通过 MetricsRegistry 读取快照（界面、命令行）或导出为 Prometheus 文本格式。
+"""
+import bisect
+import os
+import threading
+
+# 请求耗时和调度延迟的直方图分桶上限（秒），最后隐含一个 +Inf 桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """固定分桶的直方图，只记录各桶计数、总数和总和"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """按桶内线性插值估计分位数，没有样本时返回 0"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return lower  # 落在 +Inf 桶中，只能给出下界
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(self.bounds + (float("inf"),), self.counts)),
+        }
+
+
+class JobMetrics:
+    """一个发送任务的统计，可以在事件循环线程和发送线程中同时更新"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempted = 0      # 已发出的请求
+        self.succeeded = 0      # 发送成功
+        self.filtered = 0       # 接口返回成功但被屏蔽词过滤
+        self.failed = 0         # 网络错误或异常
+        self.skipped = 0        # 请求堆积而跳过的发送
+        self.rejected = {}      # 错误码 -> 次数
+        self.in_flight = 0      # 进行中的请求数（队列深度）
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.lag = Histogram(LAG_BUCKETS)
+        self.delivery = Histogram(LATENCY_BUCKETS)  # 从发出请求到在直播间信息流中收到的时间
+
+    def record_attempt(self, lag):
+        """记录一次发出的请求及其相对截止时间的延迟"""
+        with self._lock:
+            self.attempted += 1
+            self.in_flight += 1
+            self.lag.observe(lag)
+
+    def record_skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def record_result(self, result, elapsed):
+        """记录一次请求的结果和耗时；result 为 SendResult，None 表示没有可发送的弹幕"""
+        with self._lock:
+            self.in_flight -= 1
+            if result is None:
+                return
+            self.latency.observe(elapsed)
+            if result.error is not None:
+                self.failed += 1
+            elif result.ok:
+                self.succeeded += 1
+            elif result.filtered:
+                self.filtered += 1
+            else:
+                code = result.code if result.code is not None else f"http_{result.http_status}"
+                self.rejected[code] = self.rejected.get(code, 0) + 1
+
+    def record_error(self, elapsed):
+        """记录一次抛出异常的请求"""
+        with self._lock:
+            self.in_flight -= 1
+            self.failed += 1
+            self.latency.observe(elapsed)
+
+    def record_delivery(self, latency):
+        """记录一条在直播间信息流中确认送达的弹幕"""
+        with self._lock:
+            self.delivery.observe(latency)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "attempted": self.attempted,
+                "succeeded": self.succeeded,
+                "filtered": self.filtered,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "rejected": dict(self.rejected),
+                "in_flight": self.in_flight,
+                "latency": self.latency.snapshot(),
+                "lag": self.lag.snapshot(),
+                "delivery": self.delivery.snapshot(),
+            }
+
+
+class MetricsRegistry:
+    """按任务 id 保存 JobMetrics；任务停止后统计仍然保留，重新开始时继续累加"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def job(self, job_id):
+        """获取任务的 JobMetrics，不存在时创建"""
+        metrics = self._jobs.get(job_id)
+        if metrics is None:
+            with self._lock:
+                metrics = self._jobs.setdefault(job_id, JobMetrics())
+        return metrics
+
+    def job_ids(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def snapshot(self, job_id=None):
+        """某个任务的统计快照；不指定任务时返回 {任务 id: 快照}，没有记录时返回 None"""
+        if job_id is not None:
+            metrics = self._jobs.get(job_id)
+            return metrics.snapshot() if metrics else None
+        return {job_id: self._jobs[job_id].snapshot() for job_id in self.job_ids()}
+
+    def remove(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def to_prometheus(self):
+        """导出为 Prometheus 文本格式"""
+        snapshots = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                lines.append(f"{name}{{{label_text}}} {_number(value)}")
+
+        def counter(name, key, help_text):
+            metric(name, "counter", help_text, [((("job", job_id),), s[key]) for job_id, s in snapshots.items()])
+
+        counter("danmu_sends_attempted_total", "attempted", "Send requests issued")
+        counter("danmu_sends_succeeded_total", "succeeded", "Danmus accepted by the API")
+        counter("danmu_sends_filtered_total", "filtered", "Danmus accepted but filtered")
+        counter("danmu_sends_failed_total", "failed", "Send requests that raised a network error")
+        counter("danmu_sends_skipped_total", "skipped", "Sends skipped because requests were piling up")
+        metric("danmu_sends_rejected_total", "counter", "Danmus rejected by the API, by error code",
+               [((("job", job_id), ("code", code)), n) for job_id, s in snapshots.items() for code, n in s["rejected"].items()])
+        metric("danmu_sends_in_flight", "gauge", "Send requests currently in flight",
+               [((("job", job_id),), s["in_flight"]) for job_id, s in snapshots.items()])
+        for name, key, help_text in (
+            ("danmu_send_latency_seconds", "latency", "Send request latency"),
+            ("danmu_schedule_lag_seconds", "lag", "Delay between a send deadline and the actual send"),
+            ("danmu_delivery_latency_seconds", "delivery", "Delay between a send and the danmu appearing in the room feed"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for job_id, s in snapshots.items():
+                histogram = s[key]
+                cumulative = 0
+                for bound, n in histogram["buckets"].items():
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f'{name}_bucket{{job="{_escape(job_id)}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{job="{_escape(job_id)}"}} {_number(histogram["sum"])}')
+                lines.append(f'{name}_count{{job="{_escape(job_id)}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def write_metrics(registry, path):
+    """把 Prometheus 文本原子地写入文件，供 node_exporter 的 textfile 收集器等读取"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(registry.to_prometheus())
+    os.replace(temp_path, path)
+
+
+def serve_metrics(registry, port, host="127.0.0.1"):
+    """在后台线程中提供 GET /metrics，返回 HTTP 服务器（调用 shutdown() 停止）"""
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="danmu-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,123 @@
+import collections
+import logging
+import math
+import random
+import threading
+
+SEQUENTIAL = "sequential"  # 顺序轮播
+SHUFFLE = "shuffle"        # 每轮打乱顺序
+WEIGHTED = "weighted"      # 按权重交错轮播
+MODES = (SEQUENTIAL, SHUFFLE, WEIGHTED)
+
+logger = logging.getLogger(__name__)
+
+
+class Playlist:
+    """发送任务的弹幕来源：插播队列优先，其次按模式轮播弹幕列表
+
+    messages 直接引用房间的 danmus 列表，不在每次取弹幕时复制，
+    列表在运行中被增删时下一轮自动生效。每次 next() 为 O(1)（打乱和加权
+    模式每轮重建一次顺序，均摊 O(1)）。插播队列最多保存 maxlen 条，满时拒绝新的插播。
+    """
+
+    def __init__(self, messages, mode=SEQUENTIAL, weights=None, maxlen=100, rng=None):
+        if mode not in MODES:
+            raise ValueError(f"未知的发送模式：{mode}")
+        self.messages = messages
+        self.mode = mode
+        self.weights = weights
+        self._pending = collections.deque()  # 插播队列
+        self.maxlen = maxlen
+        self._rng = rng or random.Random()
+        self._order = None       # 打乱 / 加权模式下本轮的下标序列
+        self._order_size = 0     # 生成 _order 时列表的长度
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def push(self, message):
+        """插播一条弹幕，下一次发送时优先取出；插播队列已满时不插播并返回 False"""
+        if len(self._pending) >= self.maxlen:
+            logger.warning("插播队列已满，丢弃插播的弹幕", extra={"fields": {"message": message, "pending": len(self._pending)}})
+            return False
+        self._pending.append(message)
+        return True
+
+    @property
+    def pending(self):
+        """插播队列中等待发送的弹幕数"""
+        return len(self._pending)
+
+    @property
+    def position(self):
+        """当前轮播位置"""
+        return self._cursor
+
+    def seek(self, position):
+        """跳到指定轮播位置"""
+        with self._lock:
+            self._cursor = max(0, position)
+
+    def next(self):
+        """取出下一条要发送的弹幕，没有可发送的弹幕时返回 None"""
+        try:
+            return self._pending.popleft()
+        except IndexError:
+            pass
+        with self._lock:
+            size = len(self.messages)
+            if size == 0:
+                return None
+            if self.mode == SEQUENTIAL:
+                index = self._cursor % size
+                self._cursor = index + 1
+                return self.messages[index]
+            if self._order is None or self._order_size != size or self._cursor >= len(self._order):
+                self._order = self._build_order(size)
+                self._order_size = size
+                self._cursor = min(self._cursor, len(self._order)) % len(self._order)
+            index = self._order[self._cursor]
+            self._cursor += 1
+            return self.messages[index]
+
+    def __iter__(self):
+        while True:
+            message = self.next()
+            if message is None:
+                return
+            yield message
+
+    def _build_order(self, size):
+        """生成一轮的下标序列"""
+        if self.mode == SHUFFLE:
+            order = list(range(size))
+            self._rng.shuffle(order)
+            return order
+        return _weighted_order(self._weights_for(size))
+
+    def _weights_for(self, size):
+        weights = list(self.weights or ())[:size]
+        weights += [1] * (size - len(weights))
+        return [max(0, int(w)) for w in weights]
+
+
+def _weighted_order(weights):
+    """平滑加权轮询：权重为 3:1 时生成 [0, 0, 1, 0] 这样交错的序列
+
+    权重先除以最大公约数，60:30:10 与 6:3:1 生成同样长度为 10 的序列。
+    """
+    divisor = math.gcd(*weights)
+    if divisor == 0:
+        return list(range(len(weights)))
+    weights = [weight // divisor for weight in weights]
+    total = sum(weights)
+    current = [0] * len(weights)
+    order = []
+    for _ in range(total):
+        best = 0
+        for i, weight in enumerate(weights):
+            current[i] += weight
+            if current[i] > current[best]:
+                best = i
+        current[best] -= total
+        order.append(best)
+    return order
@@ -0,0 +1,208 @@
+"""性能分析开关：cProfile 或采样分析、tracemalloc 内存快照、Tk after() 回调延迟
+
+    profiler = Profiler("sample", memory=True).start()
+    ...
+    paths = profiler.stop().write()   # 写入 profile/ 目录，返回写入的文件
+
+cProfile 模式分析调用 start() 的线程（界面主循环或命令行主线程）和发送线程池中的每次发送，
+Python 3.12 起 cProfile 基于 sys.monitoring，同时只能启用一个分析器，它本身就记录所有线程，不再为每个发送线程单独启用；
+结果合并为一个 pstats 文件（.prof，可以用 snakeviz 等工具查看）；
+采样模式每隔 interval 秒记录所有线程的调用栈，输出折叠栈文件（.collapsed，可以用 flamegraph.pl 等生成火焰图）。
+关闭时只有发送线程每次发送读取一次 active，cProfile、pstats、tracemalloc 都在 start() 时才导入。
+"""
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+from .metrics import Histogram
+
+MODES = ("cprofile", "sample")
+PROFILE_DIR = "profile"          # 分析结果的默认目录
+STALL_THRESHOLD = 0.1            # after() 回调迟到超过该秒数时视为界面卡顿
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PER_THREAD = sys.version_info < (3, 12)  # cProfile 是否需要在每个发送线程中单独启用
+
+logger = logging.getLogger(__name__)
+
+active = None  # 正在运行的 Profiler，没有时为 None
+
+
+class Profiler:
+    """一次性能分析，start() 与 stop() 应在同一线程中调用"""
+
+    def __init__(self, mode="sample", output_dir=PROFILE_DIR, interval=0.005, memory=False, memory_frames=10):
+        if mode not in MODES:
+            raise ValueError(f"未知的分析模式：{mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval            # 采样间隔（秒）
+        self.memory = memory                # 是否用 tracemalloc 记录内存分配
+        self.memory_frames = memory_frames
+        self.latency = Histogram(LATENCY_BUCKETS)  # after() 回调的迟到时间
+        self.stalls = 0
+        self.max_latency = 0.0
+        self.samples = 0
+        self._stacks = collections.Counter()  # 折叠栈 -> 采样次数
+        self._profiles = []                   # 各线程的 cProfile.Profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._main_profile = None
+        self._memory_start = None
+        self._started_at = None
+        self._stopped_at = None
+
+    def start(self):
+        """开始分析并设为当前的 active"""
+        global active
+        if active is not None:
+            raise RuntimeError("已经在进行性能分析")
+        self._started_at = time.time()
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start(self.memory_frames)
+            self._memory_start = tracemalloc.take_snapshot()
+        if self.mode == "cprofile":
+            self._main_profile = self._thread_profile()
+            self._main_profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="danmu-profiler", daemon=True)
+            self._sampler.start()
+        active = self
+        logger.info("开始性能分析", extra={"fields": {"mode": self.mode, "memory": self.memory}})
+        return self
+
+    def stop(self):
+        """停止分析（在调用 start() 的线程中），之后用 write() 写入结果"""
+        global active
+        if active is self:
+            active = None
+        if self._main_profile is not None:
+            self._main_profile.disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        self._stopped_at = time.time()
+        return self
+
+    def write(self):
+        """写入结果文件并返回文件路径列表，可以在后台线程中调用"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at)))
+        paths = [self._write_profile(prefix)]
+        if self.memory:
+            paths.extend(self._write_memory(prefix))
+        paths.append(self._write_summary(prefix))
+        logger.info("性能分析结果已写入", extra={"fields": {"files": ", ".join(paths)}})
+        return paths
+
+    def run(self, func, *args):
+        """在当前线程中执行 func(*args)；cProfile 模式下记入该线程的分析结果（发送线程池调用）"""
+        if self.mode != "cprofile" or not PER_THREAD:
+            return func(*args)
+        profile = self._thread_profile()
+        try:
+            profile.enable()
+        except ValueError:  # 已有其他分析工具在运行，不分析该线程，照常发送
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+
+    def record_latency(self, seconds):
+        """记录一次 after() 回调的迟到时间，超过 STALL_THRESHOLD 时记为卡顿"""
+        self.latency.observe(seconds)
+        self.max_latency = max(self.max_latency, seconds)
+        if seconds >= STALL_THRESHOLD:
+            self.stalls += 1
+            logger.warning("界面卡顿", extra={"fields": {"late_ms": round(seconds * 1000, 1)}})
+
+    def snapshot_memory(self, path):
+        """把当前的 tracemalloc 快照写入 path（没有开启内存记录时返回 None）"""
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return None
+        tracemalloc.take_snapshot().dump(path)
+        return path
+
+    def _thread_profile(self):
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            import cProfile
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                self._stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def _write_profile(self, prefix):
+        if self.mode == "sample":
+            path = prefix + ".collapsed"
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in self._stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            return path
+        import pstats
+        path = prefix + ".prof"
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass  # 该线程的分析器还没有记录任何调用
+        stats.dump_stats(path)
+        return path
+
+    def _write_memory(self, prefix):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot_path = prefix + ".tracemalloc"
+        snapshot.dump(snapshot_path)
+        text_path = prefix + ".memory.txt"
+        with open(text_path, "w", encoding="utf-8") as file:
+            file.write(f"当前 {current / 1024:.1f} KiB，峰值 {peak / 1024:.1f} KiB\n\n分析期间增长最多的位置：\n")
+            for stat in snapshot.compare_to(self._memory_start, "lineno")[:30]:
+                file.write(f"{stat}\n")
+        return [snapshot_path, text_path]
+
+    def _write_summary(self, prefix):
+        path = prefix + ".summary.txt"
+        latency = self.latency
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(f"模式 {self.mode}，时长 {self._stopped_at - self._started_at:.1f} 秒")
+            if self.mode == "sample":
+                file.write(f"，采样 {self.samples} 次")
+            file.write("\n")
+            if latency.count:
+                file.write(f"after() 回调 {latency.count} 次，迟到 p50 {latency.quantile(0.5) * 1000:.1f}ms "
+                           f"p99 {latency.quantile(0.99) * 1000:.1f}ms 最大 {self.max_latency * 1000:.1f}ms，"
+                           f"卡顿（≥{STALL_THRESHOLD * 1000:.0f}ms）{self.stalls} 次\n")
+        return path
@@ -0,0 +1,47 @@
+class RateController:
+    """根据服务器响应调整发送间隔
+
+    被拒绝（限流、网络错误等）时间隔按 backoff 倍数指数增长，
+    成功后每次按 recovery 系数缓慢回落到基础间隔；遇到致命错误时停止任务。
+    """
+
+    def __init__(self, base_interval, backoff=2.0, recovery=0.9, max_interval=300.0):
+        if base_interval <= 0:
+            raise ValueError("时间间隔必须大于0")
+        self.base_interval = base_interval
+        self.backoff = backoff
+        self.recovery = recovery
+        self.max_interval = max(max_interval, base_interval)
+        self.multiplier = 1.0          # 当前间隔相对基础间隔的倍数
+        self.stopped = False
+        self.stop_reason = ""
+        self.consecutive_failures = 0
+
+    @property
+    def interval(self):
+        """当前应使用的发送间隔"""
+        return min(self.base_interval * self.multiplier, self.max_interval)
+
+    def observe(self, result):
+        """根据一次发送结果调整速率，返回调整后的间隔"""
+        if result.fatal:
+            self.stopped = True
+            self.stop_reason = f"错误码 {result.code}：{result.message}"
+        elif result.ok:
+            self.consecutive_failures = 0
+            self.multiplier = max(1.0, self.multiplier * self.recovery)
+        elif result.filtered:
+            # 内容被过滤与发送速率无关，不调整间隔
+            pass
+        else:
+            self.consecutive_failures += 1
+            if self.base_interval * self.multiplier < self.max_interval:
+                self.multiplier *= self.backoff
+        return self.interval
+
+    def reset(self):
+        """恢复到基础间隔"""
+        self.multiplier = 1.0
+        self.consecutive_failures = 0
+        self.stopped = False
+        self.stop_reason = ""
@@ -0,0 +1,318 @@
+"""直播间弹幕的接收（WebSocket 信息流），用于确认自己发出的弹幕已经出现在直播间
+
+    tracker = DeliveryTracker()
+    receiver = DanmuReceiver(room_id, on_danmu=tracker.received)
+    receiver.start()
+    ...发送时调用 tracker.expect(room_id, message)...
+
+信息流的每个 WebSocket 消息包含一个或多个数据包，每个数据包有 16 字节的头：
+    包长度 (4)  头长度 (2)  协议版本 (2)  操作码 (4)  序号 (4)，均为大端
+协议版本 2 / 3 的包体是 zlib / brotli 压缩后的多个数据包。解码时只在 memoryview 上切片，
+普通数据包不复制；只有弹幕消息（DANMU_MSG）才解析 JSON，其他命令按前缀跳过。
+brotli 为可选依赖，没有安装时连接时请求 zlib 压缩（协议版本 2）。
+"""
+import collections
+import json
+import logging
+import struct
+import threading
+import time
+import zlib
+
+from .wsclient import OP_BINARY, OP_CLOSE, WebSocket
+
+DEFAULT_URL = "wss://broadcastlv.chat.bilibili.com/sub"
+HEARTBEAT_INTERVAL = 30  # 心跳间隔（秒），服务器约 70 秒没有收到心跳会断开连接
+
+HEADER = struct.Struct(">IHHII")
+HEADER_SIZE = HEADER.size
+
+# 协议版本
+PROTO_JSON = 0
+PROTO_INT = 1
+PROTO_ZLIB = 2
+PROTO_BROTLI = 3
+
+# 操作码
+OP_HEARTBEAT = 2
+OP_HEARTBEAT_REPLY = 3
+OP_MESSAGE = 5
+OP_AUTH = 7
+OP_AUTH_REPLY = 8
+
+_DANMU_PREFIX = b'{"cmd":"DANMU_MSG'
+_CMD_PREFIX = b'{"cmd":'
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def encode_packet(operation, body=b"", protover=PROTO_INT, sequence=1):
+    """编码一个数据包"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return HEADER.pack(HEADER_SIZE + len(body), HEADER_SIZE, protover, operation, sequence) + body
+
+
+def encode_batch(packets, protover=PROTO_ZLIB):
+    """把多个数据包压缩成一个数据包（服务器在人多的直播间里就是这样批量推送的）"""
+    body = b"".join(packets)
+    if protover == PROTO_ZLIB:
+        body = zlib.compress(body)
+    elif protover == PROTO_BROTLI:
+        if brotli is None:
+            raise RuntimeError("没有安装 brotli")
+        body = brotli.compress(body)
+    return encode_packet(OP_MESSAGE, body, protover, 0)
+
+
+def encode_danmu(text, uid=0, uname="", timestamp=None):
+    """编码一条 DANMU_MSG 数据包，字段位置与直播间信息流相同"""
+    timestamp = int((time.time() if timestamp is None else timestamp) * 1000)
+    payload = {"cmd": "DANMU_MSG", "info": [[0, 1, 25, 16777215, timestamp, 0, 0, "", 0, 0, 0], text, [uid, uname, 0, 0, 0, 10000, 1, ""]]}
+    return encode_packet(OP_MESSAGE, json.dumps(payload, ensure_ascii=False, separators=(",", ":")), PROTO_JSON)
+
+
+def iter_packets(data):
+    """依次给出消息中的数据包 (操作码, 包体 memoryview)，压缩的包体递归展开"""
+    view = memoryview(data)
+    offset = 0
+    end = len(view)
+    unpack = HEADER.unpack_from
+    while offset + HEADER_SIZE <= end:
+        packet_len, header_len, protover, operation, _ = unpack(view, offset)
+        if packet_len < header_len or offset + packet_len > end:
+            raise ValueError(f"数据包长度错误：{packet_len}")
+        body = view[offset + header_len:offset + packet_len]
+        offset += packet_len
+        if operation == OP_MESSAGE and protover == PROTO_ZLIB:
+            yield from iter_packets(zlib.decompress(body))
+        elif operation == OP_MESSAGE and protover == PROTO_BROTLI:
+            if brotli is None:
+                logger.warning("收到 brotli 压缩的数据包，但没有安装 brotli")
+                continue
+            yield from iter_packets(brotli.decompress(bytes(body)))
+        else:
+            yield operation, body
+
+
+def parse_danmu(body):
+    """解析 DANMU_MSG 包体，返回 (弹幕, 用户 UID, 用户名, 服务器时间戳 ms)；不是弹幕消息时返回 None"""
+    if body[:len(_CMD_PREFIX)] == _CMD_PREFIX and body[:len(_DANMU_PREFIX)] != _DANMU_PREFIX:
+        return None  # 其他命令，不解析 JSON
+    try:
+        payload = json.loads(bytes(body))
+        if not str(payload.get("cmd", "")).startswith("DANMU_MSG"):
+            return None
+        info = payload["info"]
+        user = info[2]
+        return info[1], user[0], user[1], info[0][4]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+class DeliveryTracker:
+    """把发出的弹幕与直播间信息流中收到的弹幕配对，统计送达延迟
+
+    同一直播间的相同弹幕按发送顺序配对；超过 timeout 秒还没有收到的记为未送达。
+    expect 和 received 可以在不同线程中调用。
+    """
+
+    def __init__(self, timeout=30.0, uid=None, on_delivered=None, clock=time.monotonic):
+        self.timeout = timeout
+        self.uid = uid                  # 自己的 UID；信息流中的 UID 不为 0 时只配对该用户的弹幕
+        self.on_delivered = on_delivered  # on_delivered(room_id, message, latency)
+        self.clock = clock
+        self.delivered = 0
+        self.lost = 0
+        self.latencies = collections.deque(maxlen=10000)  # 最近的送达延迟（秒）
+        self._pending = {}              # (room_id, 弹幕) -> deque[发送时间]
+        self._count = 0                 # 等待配对的弹幕数
+        self._lock = threading.Lock()
+
+    def expect(self, room_id, message, sent_at=None):
+        """记录一条刚发出的弹幕"""
+        now = self.clock() if sent_at is None else sent_at
+        with self._lock:
+            self._pending.setdefault((str(room_id), message), collections.deque()).append(now)
+            self._count += 1
+
+    def cancel(self, room_id, message):
+        """发送失败的弹幕不再等待配对"""
+        with self._lock:
+            times = self._pending.get((str(room_id), message))
+            if times:
+                times.pop()
+                self._count -= 1
+                if not times:
+                    del self._pending[(str(room_id), message)]
+
+    def received(self, room_id, message, uid=0, uname="", timestamp=None):
+        """信息流中收到一条弹幕，是自己发出的弹幕时返回送达延迟（秒），否则返回 None"""
+        if self.uid and uid and uid != self.uid:
+            return None
+        key = (str(room_id), message)
+        now = self.clock()
+        with self._lock:
+            times = self._pending.get(key)
+            if not times:
+                return None
+            latency = now - times.popleft()
+            if not times:
+                del self._pending[key]
+            self._count -= 1
+            self.delivered += 1
+            self.latencies.append(latency)
+        if self.on_delivered is not None:
+            self.on_delivered(room_id, message, latency)
+        return latency
+
+    def expire(self):
+        """把等待超过 timeout 秒的弹幕记为未送达，返回本次记下的条数"""
+        deadline = self.clock() - self.timeout
+        expired = 0
+        with self._lock:
+            for key in list(self._pending):
+                times = self._pending[key]
+                while times and times[0] < deadline:
+                    times.popleft()
+                    expired += 1
+                if not times:
+                    del self._pending[key]
+            self._count -= expired
+            self.lost += expired
+        return expired
+
+    def on_send(self, job, message):
+        """作为 SenderJob 的 on_send 回调"""
+        self.expect(job.room_id, message)
+
+    def on_result(self, job, message, result):
+        """作为 SenderJob 的 on_result 回调：没有发送成功的弹幕不再等待"""
+        if not result.ok:
+            self.cancel(job.room_id, message)
+
+    @property
+    def pending(self):
+        return self._count
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            delivered, lost, pending = self.delivered, self.lost, self._count
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        return {"delivered": delivered, "lost": lost, "pending": pending, "latency_p50": p50, "latency_p99": p99}
+
+
+class DanmuReceiver:
+    """在后台线程中接收一个直播间的弹幕信息流，断线后自动重连
+
+    on_danmu(room_id, 弹幕, UID, 用户名, 服务器时间戳) 在接收线程中调用；
+    on_frame(data) 在解码前收到每条原始消息，用于录制。
+    key 为 getDanmuInfo 接口返回的 token；不给出时以游客身份连接，信息流中的用户名和 UID 可能被隐藏。
+    """
+
+    def __init__(self, room_id, on_danmu=None, url=DEFAULT_URL, key="", uid=0, reconnect_delay=5.0,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, on_frame=None):
+        self.room_id = str(room_id)
+        self.on_danmu = on_danmu
+        self.on_frame = on_frame
+        self.url = url
+        self.key = key
+        self.uid = uid
+        self.reconnect_delay = reconnect_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.protover = PROTO_BROTLI if brotli is not None else PROTO_ZLIB
+        self.frames = 0         # 收到的 WebSocket 消息数
+        self.packets = 0        # 解出的数据包数
+        self.danmus = 0         # 其中的弹幕数
+        self.popularity = 0     # 心跳回复中的人气值
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"danmu-receiver-{self.room_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def handle_message(self, data):
+        """处理一条 WebSocket 消息（可以单独调用，用于回放或性能测试）"""
+        self.frames += 1
+        on_danmu = self.on_danmu
+        for operation, body in iter_packets(data):
+            self.packets += 1
+            if operation == OP_MESSAGE:
+                danmu = parse_danmu(body)
+                if danmu is not None:
+                    self.danmus += 1
+                    if on_danmu is not None:
+                        on_danmu(self.room_id, *danmu)
+            elif operation == OP_HEARTBEAT_REPLY and len(body) >= 4:
+                self.popularity = int.from_bytes(body[:4], "big")
+            elif operation == OP_AUTH_REPLY:
+                self.connected.set()
+
+    def _auth_packet(self):
+        payload = {"uid": self.uid, "roomid": int(self.room_id), "protover": self.protover, "platform": "web", "type": 2}
+        if self.key:
+            payload["key"] = self.key
+        return encode_packet(OP_AUTH, json.dumps(payload, separators=(",", ":")))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._session()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("弹幕信息流断开，稍后重连", extra={"fields": {"room": self.room_id, "error": e}})
+            finally:
+                self.connected.clear()
+            self._stop.wait(self.reconnect_delay)
+
+    def _session(self):
+        ws = self._ws = WebSocket(self.url)
+        closed = threading.Event()
+        try:
+            ws.send(self._auth_packet())
+            # 心跳在单独的线程中发送；服务器每次心跳都会回复，三个间隔内没有任何消息时认为连接已断开
+            ws.settimeout(self.heartbeat_interval * 3)
+            threading.Thread(target=self._heartbeat, args=(ws, closed), name=f"danmu-heartbeat-{self.room_id}",
+                             daemon=True).start()
+            while not self._stop.is_set():
+                opcode, data = ws.recv()
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_BINARY:
+                    if self.on_frame is not None:
+                        self.on_frame(data)
+                    self.handle_message(data)
+        finally:
+            closed.set()
+            self._ws = None
+            ws.close()
+
+    def _heartbeat(self, ws, closed):
+        heartbeat = encode_packet(OP_HEARTBEAT, b"[object Object]")
+        while True:
+            try:
+                ws.send(heartbeat)
+            except OSError:
+                return
+            if closed.wait(self.heartbeat_interval):
+                return
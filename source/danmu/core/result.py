@@ -0,0 +1,86 @@
+import json
+
+# 接口返回的错误码
+CODE_OK = 0
+CODE_NOT_LOGGED_IN = -101      # 账号未登录（SESSDATA 无效或已过期）
+CODE_CSRF_FAILED = -111        # csrf 校验失败
+CODE_BAD_REQUEST = -400        # 请求参数错误
+CODE_FORBIDDEN = -403          # 权限不足
+CODE_TOO_FAST = 10030          # 发送弹幕的频率过快
+CODE_REPEATED = 10031          # 短时间内重复发送相同弹幕
+
+# 继续发送也不会成功的错误，遇到后应停止任务
+FATAL_CODES = frozenset({CODE_NOT_LOGGED_IN, CODE_CSRF_FAILED, CODE_BAD_REQUEST, CODE_FORBIDDEN})
+# 被限流的错误，应降低发送速率
+RATE_LIMIT_CODES = frozenset({CODE_TOO_FAST, CODE_REPEATED})
+# HTTP 层面的限流（412 为风控拦截）
+RATE_LIMIT_HTTP_STATUS = frozenset({412, 429})
+# code 为 0 但 message 为这些值时，弹幕被屏蔽词过滤，没有真正发出
+FILTERED_MESSAGES = frozenset({"f", "k"})
+
+
+class SendResult:
+    """一次发送的结果"""
+
+    __slots__ = ("code", "message", "data", "http_status", "error", "raw")
+
+    def __init__(self, code=None, message="", data=None, http_status=None, error=None, raw=""):
+        self.code = code                # 接口错误码，网络错误或无法解析时为 None
+        self.message = message          # 接口返回的说明文字
+        self.data = data
+        self.http_status = http_status
+        self.error = error              # 网络异常
+        self.raw = raw                  # 原始响应文本
+
+    @classmethod
+    def parse(cls, text, http_status=200):
+        """解析接口响应文本"""
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return cls(http_status=http_status, raw=text, message="响应不是有效的 JSON")
+        if not isinstance(payload, dict):
+            return cls(http_status=http_status, raw=text, message="响应格式错误")
+        code = payload.get("code")
+        return cls(
+            code=code if isinstance(code, int) else None,
+            message=payload.get("message") or payload.get("msg") or "",
+            data=payload.get("data"),
+            http_status=http_status,
+            raw=text,
+        )
+
+    @classmethod
+    def from_error(cls, error):
+        """由网络异常构造结果"""
+        return cls(error=error, message=str(error))
+
+    @property
+    def ok(self):
+        """弹幕是否发送成功"""
+        return self.code == CODE_OK and self.message not in FILTERED_MESSAGES
+
+    @property
+    def filtered(self):
+        """弹幕是否被屏蔽词过滤"""
+        return self.code == CODE_OK and self.message in FILTERED_MESSAGES
+
+    @property
+    def fatal(self):
+        """是否为继续发送也无法成功的错误"""
+        return self.code in FATAL_CODES
+
+    @property
+    def rate_limited(self):
+        """是否被限流"""
+        return self.code in RATE_LIMIT_CODES or self.http_status in RATE_LIMIT_HTTP_STATUS
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"SendResult(error={self.error!r})"
+        return f"SendResult(code={self.code!r}, message={self.message!r}, http_status={self.http_status!r})"
+
+    def __str__(self):
+        if self.error is not None:
+            return f"网络错误：{self.error}"
+        return self.raw or repr(self)
@@ -0,0 +1,83 @@
+import collections
+import time
+
+
+class TickScheduler:
+    """按固定截止时间触发的调度器，发送耗时不会累积成漂移
+
+    第 n 次发送的截止时间是 起点 + n * 间隔，而不是“上次发送结束 + 间隔”。
+    clock 默认为单调时钟，测试时可以传入假时钟。
+    """
+
+    def __init__(self, interval, clock=time.monotonic, window=50):
+        if interval <= 0:
+            raise ValueError("时间间隔必须大于0")
+        self._clock = clock
+        self._interval = interval
+        self._deadline = clock()                         # 下一次发送的截止时间
+        self._fired = collections.deque(maxlen=window)   # 最近若干次实际发送时间，用于计算实际速率
+        self.ticks = 0                                   # 已触发次数
+        self.skipped = 0                                 # 因严重落后而跳过的截止时间数
+        self.last_lag = 0.0                              # 最近一次相对截止时间的延迟
+        self.max_lag = 0.0                               # 最大延迟
+        self._total_lag = 0.0
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @interval.setter
+    def interval(self, value):
+        """修改间隔，立即作用于下一次截止时间"""
+        if value <= 0:
+            raise ValueError("时间间隔必须大于0")
+        if self._fired:
+            self._deadline = self._fired[-1] + value
+        self._interval = value
+
+    def next_delay(self):
+        """距下一次截止时间还有多少秒（已到期时为 0）"""
+        return max(0.0, self._deadline - self._clock())
+
+    def tick(self):
+        """记录一次发送并推进截止时间，返回本次相对截止时间的延迟"""
+        now = self._clock()
+        lag = max(0.0, now - self._deadline)
+        self._fired.append(now)
+        self.ticks += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._total_lag += lag
+        self._deadline += self._interval
+        if self._deadline <= now:
+            # 落后超过一个间隔时直接对齐到下一个截止时间，不连续补发
+            missed = int((now - self._deadline) // self._interval) + 1
+            self.skipped += missed
+            self._deadline += missed * self._interval
+        return lag
+
+    @property
+    def target_rate(self):
+        """目标速率（条/秒）"""
+        return 1.0 / self._interval
+
+    @property
+    def achieved_rate(self):
+        """最近窗口内的实际速率（条/秒），样本不足时为 0"""
+        if len(self._fired) < 2:
+            return 0.0
+        span = self._fired[-1] - self._fired[0]
+        return (len(self._fired) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        """调度统计信息"""
+        return {
+            "interval": self._interval,
+            "target_rate": self.target_rate,
+            "achieved_rate": self.achieved_rate,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "mean_lag": self._total_lag / self.ticks if self.ticks else 0.0,
+        }
@@ -0,0 +1,65 @@
+import logging
+import threading
+import time
+
+from .client import DanmuClient
+from .result import SendResult
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """进程内共享的发送客户端，第一次使用时创建"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DanmuClient()
+    return _client
+
+
+def send_danmu(room_id, message, csrf, csrf_token, sessdata, color, font_size, mode, client=None, history=None):
+    """发送弹幕，返回 SendResult；结果写入日志，成功只在 DEBUG 级别记录
+
+    给出 history（SendHistory）时把结果和请求耗时记入发送记录。
+    """
+    client = client or get_client()
+    started = time.perf_counter()
+    try:
+        result = client.send(room_id, message, csrf, csrf_token, sessdata, color, font_size, mode)
+    except Exception as e:
+        return _log_result(room_id, message, None, e, history, started)
+    return _log_result(room_id, message, result, None, history, started)
+
+
+def send_template(template, message, client=None, history=None):
+    """用 RequestTemplate 发送弹幕，返回 SendResult；日志与发送记录与 send_danmu 相同"""
+    started = time.perf_counter()
+    try:
+        result = (client or get_client()).send_template(template, message)
+    except Exception as e:
+        return _log_result(template.room_id, message, None, e, history, started)
+    return _log_result(template.room_id, message, result, None, history, started)
+
+
+def _log_result(room_id, message, result, error=None, history=None, started=None):
+    """记录发送结果（日志和 history），网络异常时返回对应的 SendResult"""
+    if history is not None:
+        latency = time.perf_counter() - started
+    if error is not None:
+        logger.error("发送弹幕失败", extra={"fields": {"room": room_id, "error": error}})
+        result = SendResult.from_error(error)
+    elif result.ok:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("弹幕发送成功", extra={"fields": {"room": room_id, "msg": message}})
+    elif result.filtered:
+        logger.warning("弹幕被屏蔽", extra={"fields": {"room": room_id, "msg": message}})
+    else:
+        logger.warning("弹幕发送失败", extra={"fields": {
+            "room": room_id, "code": result.code, "http_status": result.http_status, "message": result.message}})
+    if history is not None:
+        history.record(room_id, message, result, latency)
+    return result
@@ -0,0 +1,132 @@
+"""哈希时间轮：大量定时器的 O(1) 添加和取消
+
+时间轴按 tick 秒分格，定时器按到期的格号取模放进 slots 个槽中的一个；
+指针每过一格只检查当前槽，到期的触发，没到期的（还要转几圈）留在原处。
+添加和取消都是集合操作，与定时器数量无关。后台线程只在有定时器时按格醒来，
+没有定时器时一直等待，不轮询。
+"""
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    """时间轮中的一个定时器，由 TimingWheel.schedule 返回"""
+
+    __slots__ = ("deadline", "callback", "args", "slot", "cancelled")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.slot = None
+        self.cancelled = False
+
+
+class TimingWheel:
+    """在后台线程中运行的哈希时间轮，回调在该线程中执行（应尽快返回）
+
+    clock 默认为墙上时钟（time.time），定时弹幕按日期时间触发；时钟向前跳变时补触发期间到期的定时器。
+    """
+
+    def __init__(self, tick=1.0, slots=512, clock=time.time):
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick 和 slots 必须大于0")
+        self.tick = tick
+        self.clock = clock
+        self._slots = [set() for _ in range(slots)]
+        self._current = math.floor(clock() / tick)   # 指针所在的格号（已处理到这一格之前）
+        self._count = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        return self._count
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None:
+                return self
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="danmu-timing-wheel", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def schedule(self, deadline, callback, *args):
+        """在 deadline（clock 的时间）调用 callback(*args)，返回 Timer；已经过期时在下一格触发"""
+        timer = Timer(deadline, callback, args)
+        with self._condition:
+            tick = max(math.floor(deadline / self.tick), self._current)
+            timer.slot = self._slots[tick % len(self._slots)]
+            timer.slot.add(timer)
+            self._count += 1
+            if self._count == 1:
+                self._condition.notify()  # 时间轮从空变为非空，唤醒后台线程
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.schedule(self.clock() + delay, callback, *args)
+
+    def cancel(self, timer):
+        """取消定时器，返回是否取消成功（已触发或已取消时返回 False）"""
+        with self._condition:
+            if timer.cancelled or timer.slot is None or timer not in timer.slot:
+                return False
+            timer.slot.discard(timer)
+            timer.cancelled = True
+            self._count -= 1
+            return True
+
+    def advance(self, now=None):
+        """把指针推进到 now，触发到期的定时器，返回触发的个数（后台线程调用，测试时也可以直接调用）"""
+        now = self.clock() if now is None else now
+        due = []
+        with self._condition:
+            target = math.floor(now / self.tick)
+            # 时钟跳变超过一圈时每个槽只需检查一次
+            steps = min(target - self._current + 1, len(self._slots))
+            for i in range(steps):
+                slot = self._slots[(target - i) % len(self._slots)]
+                if not slot:
+                    continue
+                fired = [timer for timer in slot if timer.deadline <= now]
+                for timer in fired:
+                    slot.discard(timer)
+                    timer.slot = None
+                due.extend(fired)
+            self._current = max(self._current, target)
+            self._count -= len(due)
+        due.sort(key=lambda timer: timer.deadline)
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                logger.exception("定时器回调出错")
+        return len(due)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._count:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                # 睡到下一格的开始
+                delay = (self._current + 1) * self.tick - self.clock()
+                if delay > 0:
+                    self._condition.wait(delay)
+                if self._stopped:
+                    return
+            self.advance()
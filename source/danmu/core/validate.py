@@ -0,0 +1,163 @@
+"""开始发送前对弹幕做一次检查，发送循环只处理检查过的弹幕
+
+    validator = MessageValidator(blocked_words=["屏蔽词"])
+    result = validator.validate(["第一行\\n第二行", "太长……"], level=3)
+    result.messages   检查通过的弹幕（多行弹幕拆成多条）
+    result.rejected   [(原文, 原因)]
+
+每条弹幕依次经过：按换行拆分、规范化（去掉控制字符和零宽字符、合并连续空白）、
+长度检查（上限由账号等级决定）、屏蔽词检查。屏蔽词预先编译为 Aho-Corasick 自动机，
+检查一条弹幕只扫描一遍，耗时与屏蔽词数量无关；匹配前做 NFKC 规范化、忽略大小写和空白，
+全角字母或在屏蔽词中间插入空格也能匹配。
+"""
+import collections
+import unicodedata
+
+DEFAULT_MAX_LENGTH = 20
+# (最低账号等级, 单条弹幕最大长度)，按等级从低到高排列；等级为主站用户等级（0-6），未知时使用第一项
+LENGTH_LIMITS = ((0, DEFAULT_MAX_LENGTH), (3, 30), (5, 40))
+_STRIPPED_CATEGORIES = frozenset(("Cc", "Cf"))  # 控制字符和零宽空格等格式字符
+
+
+class MessageError(ValueError):
+    """没有可以发送的弹幕（全部没有通过检查）"""
+
+
+def max_length_for(level, limits=LENGTH_LIMITS):
+    """账号等级对应的单条弹幕最大长度"""
+    length = limits[0][1]
+    if level is None:
+        return length
+    for min_level, limit in limits:
+        if level >= min_level:
+            length = limit
+    return length
+
+
+def normalize(text):
+    """去掉控制字符和零宽字符，合并连续空白，去掉首尾空白"""
+    if not text.isprintable():
+        text = "".join(" " if ch.isspace() else ch for ch in text if ch.isspace() or unicodedata.category(ch) not in _STRIPPED_CATEGORIES)
+    return " ".join(text.split())
+
+
+def match_key(text):
+    """屏蔽词匹配用的字符串：NFKC 规范化、忽略大小写、去掉空白"""
+    return "".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class BlockedWords:
+    """预先编译的屏蔽词匹配器（Aho-Corasick 自动机）"""
+
+    def __init__(self, words=()):
+        self._goto = [{}]    # 节点 -> {字符: 子节点}
+        self._output = [None]  # 节点 -> 在该节点结束的屏蔽词（包括经失败指针可达的），没有时为 None
+        self.words = []
+        for word in words:
+            key = match_key(word)
+            if not key:
+                continue
+            self.words.append(word)
+            node = 0
+            for ch in key:
+                child = self._goto[node].get(ch)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][ch] = child
+                    self._goto.append({})
+                    self._output.append(None)
+                node = child
+            if self._output[node] is None:
+                self._output[node] = word
+        # 按层次遍历计算失败指针，并把失败指针上的屏蔽词合并到当前节点
+        self._fail = [0] * len(self._goto)
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def __len__(self):
+        return len(self.words)
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def find(self, text):
+        """弹幕中出现的第一个屏蔽词，没有时返回 None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for ch in match_key(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node] is not None:
+                return output[node]
+        return None
+
+
+class ValidationResult:
+    """一次检查的结果"""
+
+    __slots__ = ("messages", "rejected")
+
+    def __init__(self):
+        self.messages = []      # 检查通过、可以发送的弹幕
+        self.rejected = []      # [(原文, 原因)]
+
+    def summary(self, limit=3):
+        """被拒绝的弹幕及原因，最多列出 limit 条"""
+        lines = [f"「{text}」{reason}" for text, reason in self.rejected[:limit]]
+        if len(self.rejected) > limit:
+            lines.append(f"等 {len(self.rejected)} 条弹幕没有通过检查")
+        return "\n".join(lines)
+
+
+class MessageValidator:
+    """弹幕检查流程：拆分换行、规范化、长度限制和屏蔽词
+
+    split_long 为 True 时把超长的弹幕切成多条，否则拒绝。
+    """
+
+    def __init__(self, blocked_words=(), limits=LENGTH_LIMITS, split_lines=True, split_long=False):
+        self.blocked = blocked_words if isinstance(blocked_words, BlockedWords) else BlockedWords(blocked_words)
+        self.limits = limits
+        self.split_lines = split_lines
+        self.split_long = split_long
+
+    @property
+    def longest_limit(self):
+        """所有等级中最宽的长度上限，超过它的弹幕任何账号都不能发送"""
+        return max(limit for _, limit in self.limits)
+
+    def validate(self, messages, level=None, max_length=None):
+        """检查一组弹幕，返回 ValidationResult；level 为账号等级，决定长度上限，给出 max_length 时使用它"""
+        if max_length is None:
+            max_length = max_length_for(level, self.limits)
+        result = ValidationResult()
+        for message in messages:
+            lines = message.splitlines() if self.split_lines else [message]
+            for line in lines:
+                self._check(normalize(line), line, max_length, result)
+        return result
+
+    def _check(self, text, original, max_length, result):
+        if not text:
+            if original.strip():
+                result.rejected.append((original, "只有不可见字符"))
+            return
+        word = self.blocked.find(text) if self.blocked else None
+        if word is not None:
+            result.rejected.append((original, f"包含屏蔽词「{word}」"))
+        elif len(text) <= max_length:
+            result.messages.append(text)
+        elif self.split_long:
+            result.messages.extend(text[i:i + max_length] for i in range(0, len(text), max_length))
+        else:
+            result.rejected.append((original, f"超过 {max_length} 字"))
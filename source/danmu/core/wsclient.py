@@ -0,0 +1,192 @@
+"""只用标准库实现的 WebSocket 客户端（RFC 6455），够弹幕接收使用
+
+只支持二进制和文本消息、ping/pong 和关闭帧，不支持扩展（如 permessage-deflate）。
+接收时把负载直接读入预先分配的 bytearray，不在每一帧上拼接 bytes。
+"""
+import base64
+import hashlib
+import os
+import socket
+import struct
+import threading
+import urllib.parse
+
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024  # 单条消息的长度上限，防止错误的长度字段耗尽内存
+
+
+class WebSocketError(ConnectionError):
+    """握手失败或收到不符合协议的帧"""
+
+
+def accept_key(key):
+    """由 Sec-WebSocket-Key 计算服务器应返回的 Sec-WebSocket-Accept"""
+    return base64.b64encode(hashlib.sha1(key.encode("ascii") + GUID).digest()).decode("ascii")
+
+
+def mask_payload(payload, mask):
+    """用 4 字节掩码异或负载（按大整数一次异或，不逐字节循环）"""
+    n = len(payload)
+    if not n:
+        return b""
+    repeated = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(n, "big")
+
+
+def encode_frame(opcode, payload, mask=True):
+    """编码一个完整（FIN）的帧；客户端发出的帧必须加掩码"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, (0x80 if mask else 0) | n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, (0x80 if mask else 0) | 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, (0x80 if mask else 0) | 127, n)
+    if not mask:
+        return header + bytes(payload)
+    key = os.urandom(4)
+    return header + key + mask_payload(payload, key)
+
+
+class WebSocket:
+    """一条阻塞的 WebSocket 连接，recv() 和 send() 可以分别在两个线程中调用
+
+    所有写入都持有同一把锁：心跳线程的 send() 与 recv() 自动回复的 pong、关闭帧不会交错写入（SSL 套接字也不能并发写）。
+    """
+
+    def __init__(self, url, timeout=10, headers=None):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("ws", "wss"):
+            raise ValueError(f"不支持的地址：{url}")
+        self.url = url
+        self._send_lock = threading.Lock()
+        host = parts.hostname
+        port = parts.port or (443 if parts.scheme == "wss" else 80)
+        sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            if parts.scheme == "wss":
+                import ssl
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = sock
+            self._file = sock.makefile("rb", buffering=65536)
+            self._handshake(host if parts.port is None else f"{host}:{port}", parts.path or "/", parts.query, headers or {})
+        except BaseException:
+            sock.close()
+            raise
+        self.closed = False
+
+    def _handshake(self, host, path, query, headers):
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        lines = [
+            f"GET {path}{'?' + query if query else ''} HTTP/1.1",
+            f"Host: {host}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self._sendall(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+        status = self._file.readline().decode("latin-1")
+        if status.split(" ", 2)[1:2] != ["101"]:
+            raise WebSocketError(f"WebSocket 握手失败：{status.strip()}")
+        response = {}
+        while True:
+            line = self._file.readline().decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            response[name.strip().lower()] = value.strip()
+        if response.get("sec-websocket-accept") != accept_key(key):
+            raise WebSocketError("WebSocket 握手失败：Sec-WebSocket-Accept 不匹配")
+
+    def settimeout(self, timeout):
+        self._sock.settimeout(timeout)
+
+    def send(self, payload, opcode=OP_BINARY):
+        self._sendall(encode_frame(opcode, payload))
+
+    def _sendall(self, data):
+        with self._send_lock:
+            self._sock.sendall(data)
+
+    def recv(self):
+        """接收下一条数据消息，返回 (opcode, bytearray)；连接关闭时返回 (OP_CLOSE, 负载)
+
+        ping 自动回复 pong，分片的消息拼接后返回。
+        """
+        message = None
+        message_opcode = None
+        while True:
+            fin, opcode, payload = self._read_frame()
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    self.closed = True
+                    try:
+                        self.send(bytes(payload[:2]), OP_CLOSE)
+                    except OSError:
+                        pass
+                return OP_CLOSE, payload
+            if opcode == OP_CONTINUATION:
+                if message is None:
+                    raise WebSocketError("收到了没有开始帧的后续帧")
+                message += payload
+                if len(message) > MAX_MESSAGE_SIZE:
+                    raise WebSocketError("消息太长")
+            else:
+                message, message_opcode = payload, opcode
+            if fin:
+                return message_opcode, message
+
+    def _read_exact(self, n):
+        buffer = bytearray(n)
+        if n and self._file.readinto(buffer) != n:
+            raise WebSocketError("连接已断开")
+        return buffer
+
+    def _read_frame(self):
+        head = self._read_exact(2)
+        fin = head[0] & 0x80
+        opcode = head[0] & 0x0F
+        masked = head[1] & 0x80
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        if length > MAX_MESSAGE_SIZE:
+            raise WebSocketError("消息太长")
+        key = self._read_exact(4) if masked else None
+        payload = self._read_exact(length)
+        if key is not None:
+            payload = bytearray(mask_payload(payload, bytes(key)))
+        return fin, opcode, payload
+
+    def close(self):
+        """发送关闭帧并关闭连接"""
+        if not self.closed:
+            self.closed = True
+            try:
+                self.send(struct.pack("!H", 1000), OP_CLOSE)
+            except OSError:
+                pass
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._file.close()
+        self._sock.close()
@@ -0,0 +1,10 @@
+"""Tk 图形界面，导入本包不会立即导入 tkinter / PIL"""
+import importlib
+
+
+def __getattr__(name):
+    if name in ("App", "main"):
+        value = getattr(importlib.import_module(".app", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,1139 @@
+import argparse
+import logging
+import math
+import time
+import tkinter as tk
+from tkinter import messagebox, colorchooser, filedialog, Toplevel
+
+from ..core import (PAUSED, RUNNING, STOPPED, CredentialError, CredentialManager, JobManager, MessageError,
+                    MessageValidator, Profiler, ScheduleManager, SendHistory, SendJournal, campaign, history,
+                    playlist, profiling, setup_logging)
+from ..core.history import HistoryView
+from ..storage import PhraseIndex, RoomStore, read_danmus, write_danmus
+from .assets import AssetCache
+from .dispatch import LatencyProbe, UiDispatcher
+from .themes import themes
+from .widgets import ImageButton, VirtualList, sync_listbox
+
+WINDOW_WIDTH = 800                 # 窗口固定宽度
+WINDOW_HEIGHT = 600                # 窗口固定高度
+default_play_mode = "single"       # 默认发送方式：只发送弹幕内容框中的弹幕
+HISTORY_FILE_TYPES = [("CSV 文件", "*.csv"), ("JSON Lines 文件", "*.jsonl")]
+DANMU_FILE_TYPES = [("文本文件", "*.txt"), ("CSV 文件", "*.csv"), ("JSON Lines 文件", "*.jsonl"), ("所有文件", "*.*")]
+REBUILD_INDEX_AFTER = 1000         # 一次导入超过该条数时在后台重建搜索索引，不在界面线程中逐条更新
+SEARCH_LIMIT = 500                 # 搜索常用弹幕时最多显示的条数
+ROOM_LIST_ROWS = 10                # 常用直播间列表同时显示的行数
+STATS_REFRESH_MS = 1000            # 发送统计面板和直播间状态的刷新间隔（毫秒）
+HISTORY_ROWS = 20                  # 发送记录窗口同时显示的行数
+ALL_ROOMS = "全部直播间"
+
+logger = logging.getLogger(__name__)
+
+# 发送方式：界面显示名称 -> 配置中保存的值
+play_modes = {
+    "单条弹幕": "single",
+    "顺序轮播": playlist.SEQUENTIAL,
+    "随机轮播": playlist.SHUFFLE,
+    "加权轮播": playlist.WEIGHTED,
+}
+
+# 任务状态在常用直播间列表中的显示
+state_labels = {
+    RUNNING: " [发送中]",
+    PAUSED: " [已暂停]",
+    STOPPED: "",
+}
+
+# 发送记录的状态显示：文字和颜色
+history_labels = {
+    history.OK: ("成功", "black"),
+    history.FILTERED: ("被屏蔽", "orange"),
+    history.FAILED: ("失败", "red"),
+    history.ERROR: ("网络错误", "red"),
+}
+
+
+def format_stats(snapshot):
+    """把任务的发送统计格式化为统计面板中的一行文字"""
+    if snapshot is None:
+        return "发送统计：未开始发送"
+    rejected = sum(snapshot["rejected"].values())
+    text = (f"发送统计：已发送 {snapshot['attempted']}  成功 {snapshot['succeeded']}  被拒 {rejected}  "
+            f"失败 {snapshot['failed']}  排队 {snapshot['in_flight']}  "
+            f"延迟 p50 {snapshot['latency']['p50'] * 1000:.0f}ms p99 {snapshot['latency']['p99'] * 1000:.0f}ms  "
+            f"调度延迟 {snapshot['lag']['mean'] * 1000:.1f}ms")
+    if snapshot["rejected"]:
+        text += "  错误码 " + ", ".join(f"{code}×{n}" for code, n in snapshot["rejected"].items())
+    return text
+
+
+def format_history_entry(entry):
+    """把一条发送记录格式化为发送记录窗口中的一行文字"""
+    status = history_labels[entry.status][0]
+    if entry.status == history.FAILED:
+        status += f"（{entry.code}）"
+    latency = "" if math.isnan(entry.latency) else f" {entry.latency * 1000:.0f}ms"
+    moment = time.strftime("%m-%d %H:%M:%S", time.localtime(entry.timestamp))
+    return f"{moment}  房间{entry.room_id}  {status}{latency}  {entry.message}"
+
+
+class App:
+    """Bilibili 弹幕发送器的 Tk 界面，通过 RoomStore 和 JobManager 使用核心功能"""
+
+    def __init__(self, store=None, profile=None, profile_memory=False):
+        self.store = store or RoomStore()
+        self.assets = AssetCache(max_backgrounds=2, background_size=(WINDOW_WIDTH, WINDOW_HEIGHT))  # 图片只解码一次
+        self.selected_room_id = None     # 在常用直播间中选中的直播间
+        self.credentials = CredentialManager()  # 登录凭据的检查结果，同一账号的直播间共用
+        self.validator = MessageValidator(self.store.settings.get("blocked_words", ()))  # 开始发送前检查弹幕
+        self.journal = self.open_journal()  # 发送日志，崩溃后从中恢复任务；无法打开时为 None
+        self.history = SendHistory()     # 最近的发送记录，容量固定，发送窗口中的发送记录从这里读取
+        self.jobs = JobManager(credentials=self.credentials, validator=self.validator, journal=self.journal,
+                               history=self.history)  # 各直播间的发送任务，共用一个发送引擎
+        self.campaigns = ScheduleManager(self.post_schedule, self.post_schedule_done)  # 各直播间的定时弹幕，共用一个时间轮
+        self.schedule_window = None      # 定时弹幕窗口，没有打开时为 None
+        self.history_window = None       # 发送记录窗口，没有打开时为 None
+        self.danmu_items = []            # 常用弹幕列表框当前显示的内容
+        self.room_danmus = []            # 当前直播间的常用弹幕（不搜索时列表框显示的内容）
+        self.search_results = None       # 搜索结果的条目 ID 列表，None 表示没有在搜索
+        self.phrase_index = None         # 所有直播间常用弹幕的搜索索引，后台建立完成前为 None
+        self.danmu_generation = 0        # 常用弹幕每修改一次加一，用于判断后台建立的索引是否过时
+        self.window = None
+        self.dispatcher = None           # 发送线程到界面线程的消息队列，创建窗口后才有
+        self.profile_mode = profile      # 启动时开始的性能分析模式，None 表示不分析（F12 随时开始，默认采样）
+        self.profile_memory = profile_memory
+        self.profiler = None             # 正在进行的性能分析
+        self.latency_probe = None
+
+    @property
+    def config(self):
+        return self.store.config
+
+    @staticmethod
+    def open_journal():
+        """打开发送日志，失败时不记录发送日志"""
+        try:
+            return SendJournal()
+        except OSError as e:
+            logger.error("无法打开发送日志，不记录发送记录", extra={"fields": {"error": e}})
+            return None
+
+    def toggle_sending(self):
+        """开始或停止当前直播间的发送"""
+        room_id = self.room_id_entry.get()
+        if self.jobs.state(room_id) != STOPPED:
+            self.stop_room(room_id)
+            return
+
+        csrf = self.csrf_entry.get()
+        csrf_token = self.csrf_token_entry.get()
+        sessdata = self.sessdata_entry.get()
+        self.add_to_common_room(room_id, csrf, csrf_token, sessdata)
+        self.start_room(room_id, self.message_entry.get('1.0', tk.END).strip())
+
+    def start_room(self, room_id, message=None):
+        """按直播间自己的设置开始发送；单条弹幕模式下没有给出 message 时发送第一条常用弹幕"""
+        room = self.store.get_room(room_id)
+        if room is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+            return
+        settings = self.store.room_settings(room_id)
+        play_mode = settings.get("play_mode", default_play_mode)
+        if play_mode != "single":
+            messages = room["danmus"]
+        else:
+            messages = message if message else room["danmus"][:1]
+        job = self.jobs.create(room_id, room["csrf"], room["csrf_token"], room["sessdata"], messages,
+                               color=settings["color"], font_size=settings["font_size"], mode=settings["mode"],
+                               interval=settings["time_step"], play_mode=play_mode, weights=room.get("weights"),
+                               on_result=self.post_result)
+        self.check_and_launch(job, play_mode)
+
+    def check_and_launch(self, job, play_mode, trigger=True, resume=False):
+        """检查登录凭据后开始发送任务；trigger 为 True 时同时开始该直播间“开始后若干秒”的定时弹幕计时，
+        resume 为 True 时从发送日志中上次的位置继续"""
+        if self.credentials.cached(job.sessdata) is not None:
+            self.launch_job(job, play_mode, trigger, resume)
+        else:
+            # 登录凭据没有检查过或已过期：在后台检查，不阻塞界面
+            self.dispatcher.run_in_background(self.credentials.check, job.sessdata,
+                                              on_done=lambda status: self.launch_job(job, play_mode, trigger, resume))
+
+    def launch_job(self, job, play_mode, trigger=True, resume=False):
+        """开始发送任务（登录凭据已经检查过，这里只读缓存）"""
+        try:
+            self.jobs.start(job, resume=resume)
+        except CredentialError as e:
+            logger.warning("登录凭据无效，停止发送", extra={"fields": {"room": job.room_id}})
+            messagebox.showwarning("登录失效", f"房间{job.room_id}：{e}\n请更新 SESSDATA 等登录信息后保存")
+            return
+        except MessageError as e:
+            logger.warning("弹幕没有通过检查，停止发送", extra={"fields": {"room": job.room_id}})
+            messagebox.showwarning("警告", f"没有可以发送的弹幕：\n{e}")
+            return
+        except ValueError:
+            logger.warning("弹幕内容为空，停止发送", extra={"fields": {"room": job.room_id}})
+            return
+        logger.info("开始发送弹幕", extra={"fields": {"room": job.room_id, "play_mode": play_mode}})
+        if trigger:
+            self.campaigns.trigger(job.room_id)
+        if job.rejected:
+            self.result_label.config(text=f"房间{job.room_id} 跳过 {len(job.rejected)} 条没有通过检查的弹幕：{job.rejected[0][0]}（{job.rejected[0][1]}）")
+        self.refresh_room_states()
+
+    def resume_jobs(self):
+        """启动时继续上次没有正常停止（程序崩溃或被强制结束）的发送任务"""
+        for room_id, point in self.jobs.unfinished().items():
+            room = self.store.get_room(room_id)
+            if room is None:
+                continue
+            settings = self.store.room_settings(room_id)
+            if point.play_mode == "single":
+                # 单条弹幕模式只发送第一条：把检查后拆出的各行合成一条，开始时重新拆成同样的几行
+                messages = "\n".join(point.messages)
+            else:
+                messages = room["danmus"]
+            job = self.jobs.create(room_id, room["csrf"], room["csrf_token"], room["sessdata"], messages,
+                                   color=settings["color"], font_size=settings["font_size"], mode=settings["mode"],
+                                   interval=settings["time_step"], play_mode=point.play_mode, weights=room.get("weights"),
+                                   count=point.count, on_result=self.post_result)
+            logger.info("继续上次中断的发送", extra={"fields": {"room": room_id, "position": point.position, "sent": point.sent}})
+            self.check_and_launch(job, point.play_mode, resume=True)
+
+    def export_history(self):
+        """把发送日志中的发送记录导出为 CSV 或 JSONL 文件"""
+        if self.journal is None:
+            messagebox.showwarning("警告", "发送日志不可用！")
+            return
+        path = filedialog.asksaveasfilename(title="导出发送记录", filetypes=HISTORY_FILE_TYPES, defaultextension=".csv")
+        if not path:
+            return
+        self.dispatcher.run_in_background(
+            self.journal.export, path,
+            on_done=lambda count: messagebox.showinfo("导出完成", f"已导出 {count} 条发送记录"),
+            on_error=lambda error: messagebox.showerror("错误", f"导出失败：{error}"),
+        )
+
+    def show_history(self):
+        """打开发送记录窗口：最新的记录在最上面，只创建能看见的几行，可以只看一个直播间"""
+        if self.history_window is not None:
+            self.history_window.lift()
+            return
+        window = self.history_window = Toplevel(self.window)
+        window.title("发送记录")
+        window.protocol("WM_DELETE_WINDOW", self.close_history)
+        tk.Label(window, text="直播间:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        window.room_var = tk.StringVar(window, ALL_ROOMS)
+        window.room_menu = tk.OptionMenu(window, window.room_var, ALL_ROOMS)
+        window.room_menu.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        window.room_count = -1  # 筛选菜单中的直播间数，发送记录中出现新的直播间时重建菜单
+        window.summary_label = tk.Label(window, anchor="w")
+        window.summary_label.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
+        window.list = VirtualList(window, HISTORY_ROWS, self.make_history_row, self.update_history_row, bg='white')
+        window.list.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
+        window.grid_rowconfigure(1, weight=1)
+        window.grid_columnconfigure(2, weight=1)
+        self.filter_history(None)
+
+    def close_history(self):
+        if self.history_window is not None:
+            self.history_window.destroy()
+            self.history_window = None
+
+    def filter_history(self, room_id):
+        """发送记录窗口只显示一个直播间（room_id 为 None 时显示全部）"""
+        window = self.history_window
+        window.room_var.set(ALL_ROOMS if room_id is None else f"房间{room_id}")
+        window.view = HistoryView(self.history, room_id)
+        window.list.first = 0
+        window.list.set_keys(window.view)
+        self.refresh_history()
+
+    def refresh_history(self):
+        """把新的发送记录加入发送记录窗口（只扫描新记录），没有打开窗口时什么也不做"""
+        window = self.history_window
+        if window is None:
+            return
+        rooms = self.history.rooms()
+        if len(rooms) != window.room_count:
+            window.room_count = len(rooms)
+            menu = window.room_menu["menu"]
+            menu.delete(0, tk.END)
+            menu.add_command(label=ALL_ROOMS, command=lambda: self.filter_history(None))
+            for room_id in rooms:
+                menu.add_command(label=f"房间{room_id}", command=lambda r=room_id: self.filter_history(r))
+        added = window.view.refresh()
+        if added:
+            if window.list.first:
+                window.list.first += added  # 向下翻看时保持看到的记录不动
+            window.list.set_keys(window.view)
+        window.summary_label.config(text=f"{len(window.view)} 条（最多保存 {self.history.capacity} 条，共发送 {self.history.total} 条）")
+
+    def make_history_row(self, parent):
+        """创建发送记录窗口中的一行"""
+        return tk.Label(parent, anchor="w", bg='white', width=80)
+
+    def update_history_row(self, row, seq):
+        """让一行显示序号为 seq 的发送记录"""
+        entry = self.history.entry(seq)
+        if entry is None:
+            row.config(text="（已被新记录覆盖）", fg="gray")
+        else:
+            row.config(text=format_history_entry(entry), fg=history_labels[entry.status][1])
+
+    def post_result(self, job, message, result):
+        """在发送线程中调用：把发送结果交给界面线程显示"""
+        self.dispatcher.post(self.show_result, job.room_id, message, result)
+
+    def show_result(self, room_id, message, result):
+        """显示最近一次发送的结果"""
+        if result.ok:
+            status = "发送成功"
+        elif result.filtered:
+            status = "被屏蔽"
+        elif result.error is not None:
+            status = f"网络错误：{result.error}"
+        else:
+            status = f"发送失败（{result.code}）：{result.message}"
+        self.result_label.config(text=f"房间{room_id} {status}：{message}")
+        if not result.ok:
+            self.refresh_room_states()  # 任务可能因致命错误停止，立即更新状态
+
+    def pause_room(self, room_id):
+        """暂停或继续直播间的发送"""
+        if self.jobs.state(room_id) == PAUSED:
+            self.jobs.resume(room_id)
+        else:
+            self.jobs.pause(room_id)
+        self.refresh_room_states()
+
+    def stop_room(self, room_id):
+        """停止直播间的发送"""
+        if self.jobs.stop(room_id):
+            logger.info("已停止发送弹幕", extra={"fields": {"room": room_id}})
+        self.campaigns.release(room_id)
+        self.refresh_room_states()
+
+    def post_schedule(self, room_id, schedule):
+        """在时间轮线程中调用：定时弹幕到期，交给界面线程发送"""
+        self.dispatcher.post(self.fire_schedule, room_id, schedule)
+
+    def post_schedule_done(self, room_id, schedule):
+        """在时间轮线程中调用：一次性的定时弹幕已经触发，交给界面线程从配置中删除"""
+        self.dispatcher.post(self.finish_schedule, room_id, schedule)
+
+    def fire_schedule(self, room_id, schedule):
+        """发送定时弹幕：直播间正在发送时插播，没有发送时单独发送一条"""
+        message = schedule["message"]
+        job = self.jobs.get(room_id)
+        state = job.state if job is not None else STOPPED
+        if state == PAUSED:
+            logger.info("直播间已暂停，跳过定时弹幕", extra={"fields": {"room": room_id, "schedule": schedule["id"]}})
+            return
+        logger.info("发送定时弹幕", extra={"fields": {"room": room_id, "schedule": schedule["id"]}})
+        if state == RUNNING:
+            try:
+                job.push(message)
+            except MessageError as e:
+                self.result_label.config(text=f"房间{room_id} 定时弹幕没有通过检查：{e}")
+            return
+        room = self.store.get_room(room_id)
+        if room is None:
+            return
+        settings = self.store.room_settings(room_id)
+        job = self.jobs.create(room_id, room["csrf"], room["csrf_token"], room["sessdata"], [message],
+                               color=settings["color"], font_size=settings["font_size"], mode=settings["mode"],
+                               interval=settings["time_step"], count=1, on_result=self.post_result)
+        self.check_and_launch(job, "single", trigger=False)
+
+    def finish_schedule(self, room_id, schedule):
+        """从配置中删除已经触发的一次性定时弹幕"""
+        self.store.remove_schedule(room_id, schedule["id"])
+        self.refresh_schedule_list()
+
+    def restore_schedules(self):
+        """启动时恢复保存的定时弹幕（在后台读取），过期太久的一次性定时弹幕直接删除"""
+        def done(schedules):
+            for room_id, schedule in self.campaigns.load(schedules):
+                logger.warning("定时弹幕已过期，不再发送", extra={"fields": {"room": room_id, "schedule": schedule["id"]}})
+                self.store.remove_schedule(room_id, schedule["id"])
+            logger.info("已恢复定时弹幕", extra={"fields": {"count": len(schedules)}})
+
+        def failed(error):
+            logger.error("读取定时弹幕失败", extra={"fields": {"error": error}})
+
+        self.campaigns.start()
+        self.dispatcher.run_in_background(lambda: list(self.store.iter_schedules()), on_done=done, on_error=failed)
+
+    def show_schedules(self):
+        """打开当前直播间的定时弹幕窗口"""
+        room_id = self.room_id_entry.get()
+        if self.store.get_room(room_id) is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+            return
+        if self.schedule_window is not None:
+            self.schedule_window.destroy()
+        window = self.schedule_window = Toplevel(self.window)
+        window.title(f"定时弹幕 - 房间{room_id}")
+        window.room_id = room_id
+        window.protocol("WM_DELETE_WINDOW", self.close_schedules)
+
+        window.listbox = tk.Listbox(window, width=60, height=10)
+        window.listbox.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
+        tk.Label(window, text="弹幕内容:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        window.message_entry = tk.Entry(window)
+        window.message_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
+        tk.Label(window, text="发送时间:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        window.when_entry = tk.Entry(window)
+        window.when_entry.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
+        tk.Label(window, text="时间格式：21:30、2024-06-01 21:30、+30（开始发送后30秒）或 cron 表达式（如 */10 * * * *）",
+                 anchor="w").grid(row=3, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
+        tk.Button(window, text="添加定时弹幕", command=self.add_schedule).grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+        tk.Button(window, text="删除定时弹幕", command=self.delete_selected_schedule).grid(row=4, column=2, padx=5, pady=5, sticky="ew")
+        window.grid_columnconfigure((1, 2), weight=1)
+        self.refresh_schedule_list()
+
+    def close_schedules(self):
+        if self.schedule_window is not None:
+            self.schedule_window.destroy()
+            self.schedule_window = None
+
+    def refresh_schedule_list(self):
+        """更新定时弹幕窗口中的列表"""
+        window = self.schedule_window
+        if window is None:
+            return
+        window.schedules = self.campaigns.schedules(window.room_id)
+        window.listbox.delete(0, tk.END)
+        for schedule in window.schedules:
+            window.listbox.insert(tk.END, f"{campaign.describe(schedule)}  {schedule['message']}")
+
+    def add_schedule(self):
+        """添加定时弹幕，保存到直播间信息中"""
+        window = self.schedule_window
+        message = window.message_entry.get().strip()
+        if not message:
+            messagebox.showwarning("警告", "请输入弹幕内容！", parent=window)
+            return
+        result = self.validator.validate([message])
+        if not result.messages:
+            messagebox.showwarning("警告", result.summary(), parent=window)
+            return
+        try:
+            schedule = campaign.new_schedule(result.messages[0], **campaign.parse_when(window.when_entry.get()))
+        except ValueError as e:
+            messagebox.showwarning("警告", f"发送时间格式错误：{e}", parent=window)
+            return
+        if not self.store.add_schedule(window.room_id, schedule):
+            messagebox.showwarning("警告", "请选择一个有效的直播间！", parent=window)
+            return
+        self.campaigns.add(window.room_id, schedule)
+        logger.info("已添加定时弹幕", extra={"fields": {"room": window.room_id, "schedule": schedule["id"]}})
+        window.message_entry.delete(0, tk.END)
+        self.refresh_schedule_list()
+
+    def delete_selected_schedule(self):
+        """删除选中的定时弹幕"""
+        window = self.schedule_window
+        selected_index = window.listbox.curselection()
+        if not selected_index:
+            messagebox.showwarning("警告", "请选择要删除的定时弹幕！", parent=window)
+            return
+        schedule = window.schedules[selected_index[0]]
+        self.campaigns.remove(window.room_id, schedule["id"])
+        self.store.remove_schedule(window.room_id, schedule["id"])
+        self.refresh_schedule_list()
+
+    def add_to_common_room(self, room_id, csrf, csrf_token, sessdata):
+        """将直播间添加到常用直播间列表中"""
+        self.store.add_room(room_id, csrf, csrf_token, sessdata)
+        self.update_common_rooms_display()
+
+    def on_select_common_room(self, room_id):
+        """选择常用直播间"""
+        self.selected_room_id = room_id
+        room_info = self.store.get_room(room_id)
+        if room_info is not None:
+            self.room_id_entry.delete(0, tk.END)
+            self.room_id_entry.insert(0, room_id)
+
+            self.csrf_entry.delete(0, tk.END)
+            self.csrf_entry.insert(0, room_info.get("csrf", ""))
+            self.csrf_token_entry.delete(0, tk.END)
+            self.csrf_token_entry.insert(0, room_info.get("csrf_token", ""))
+            self.sessdata_entry.delete(0, tk.END)
+            self.sessdata_entry.insert(0, room_info.get("sessdata", ""))
+            self.update_danmu_listbox(room_info.get("danmus", []))
+            self.show_room_settings(room_id)
+            self.refresh_room_states()
+
+    def show_room_settings(self, room_id):
+        """在设置控件中显示直播间的发送设置"""
+        settings = self.store.room_settings(room_id)
+        self.color_button.config(bg=settings["color"])
+        for entry, key in ((self.time_step_entry, "time_step"), (self.font_size_entry, "font_size"), (self.mode_entry, "mode")):
+            entry.delete(0, tk.END)
+            entry.insert(0, str(settings[key]))
+        play_mode_names = {value: name for name, value in play_modes.items()}
+        self.play_mode_var.set(play_mode_names[settings.get("play_mode", default_play_mode)])
+
+    def make_room_row(self, parent):
+        """创建常用直播间列表中的一行：选择按钮和开始、暂停、停止按钮，显示哪个直播间由 row.room_id 决定"""
+        row = tk.Frame(parent, bg='white')
+        row.room_id = None
+        row.button = tk.Button(row, anchor="w", command=lambda: self.on_select_common_room(row.room_id))
+        row.button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(row, text="■", width=2, command=lambda: self.stop_room(row.room_id)).pack(side=tk.RIGHT)
+        tk.Button(row, text="‖", width=2, command=lambda: self.pause_room(row.room_id)).pack(side=tk.RIGHT)
+        tk.Button(row, text="▶", width=2, command=lambda: self.start_room(row.room_id)).pack(side=tk.RIGHT)
+        return row
+
+    def update_room_row(self, row, room_id):
+        """让一行显示某个直播间及其任务状态，文字没有变化时不重新配置"""
+        row.room_id = room_id
+        text = f"房间{room_id}{state_labels[self.jobs.state(room_id)]}"
+        if row.button.cget("text") != text:
+            row.button.config(text=text)
+
+    def update_common_rooms_display(self):
+        """更新常用直播间显示，只重新配置内容有变化的可见行"""
+        self.room_list.set_keys(self.store.rooms.keys())
+
+    def refresh_room_states(self):
+        """在常用直播间列表和开始按钮上显示任务状态（任务可能因发送完毕或致命错误自行停止）"""
+        self.room_list.refresh()
+        text = "开始发送" if self.jobs.state(self.room_id_entry.get()) == STOPPED else "停止发送"
+        if self.toggle_button.cget("text") != text:
+            self.toggle_button.config(text=text)
+
+    def save_inputs(self):
+        """保存配置"""
+        room_id = self.room_id_entry.get()
+        csrf = self.csrf_entry.get()
+        csrf_token = self.csrf_token_entry.get()
+        sessdata = self.sessdata_entry.get()
+
+        if room_id and csrf and csrf_token and sessdata:
+            self.store.put_room(room_id, csrf, csrf_token, sessdata, self.room_danmus)
+            self.index_changed(lambda index: index.set_room(room_id, self.room_danmus))
+            self.update_common_rooms_display()
+            messagebox.showinfo("保存成功", "配置信息已保存！")
+        else:
+            messagebox.showwarning("警告", "请填写所有必要的字段！")
+
+    def choose_color(self):
+        """选择弹幕颜色"""
+        color_code = colorchooser.askcolor(title ="Choose color")[1]
+        if color_code:
+            self.apply_setting("color", color_code)
+            self.color_button.config(bg=color_code)
+
+    def set_time_step(self):
+        """设置弹幕发送间隔"""
+        try:
+            new_time_step = float(self.time_step_entry.get())
+            if new_time_step <= 0:
+                raise ValueError("时间间隔必须大于0")
+            self.apply_setting("time_step", new_time_step)
+            messagebox.showinfo("成功", "时间间隔已更新！")
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
+
+    def set_font_size(self):
+        """设置字体大小"""
+        try:
+            new_font_size = int(self.font_size_entry.get())
+            if new_font_size <= 0:
+                raise ValueError("字体大小必须大于0")
+            self.apply_setting("font_size", new_font_size)
+            messagebox.showinfo("成功", "字体大小已更新！")
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
+
+    def set_mode(self):
+        """设置弹幕模式"""
+        try:
+            new_mode = int(self.mode_entry.get())
+            if new_mode < 1 or new_mode > 9:
+                raise ValueError("弹幕模式必须在1到9之间")
+            self.apply_setting("mode", new_mode)
+            messagebox.showinfo("成功", "弹幕模式已更新！")
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
+
+    def set_play_mode(self, name):
+        """设置发送方式"""
+        self.apply_setting("play_mode", play_modes[name])
+
+    def apply_setting(self, key, value):
+        """修改发送设置：当前直播间已保存时只修改该直播间，否则修改全局设置
+
+        该直播间正在发送时，间隔、颜色、字体大小和模式立即生效。
+        """
+        room_id = self.room_id_entry.get()
+        if not self.store.set_room_setting(room_id, key, value):
+            self.store.set_setting(key, value)
+            return
+        job = self.jobs.get(room_id)
+        if job is None:
+            return
+        if key == "time_step":
+            job.set_interval(value)
+        elif key != "play_mode":
+            setattr(job, key, value)  # color、font_size、mode 在下一次发送时生效
+
+    def add_danmu(self):
+        """添加常用弹幕"""
+        room_id = self.room_id_entry.get()
+        danmu = self.danmu_entry.get()
+        room = self.store.get_room(room_id)
+        if room is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+        elif not danmu:
+            messagebox.showwarning("警告", "请输入弹幕内容！")
+        else:
+            # 添加时就检查，正在轮播这个列表的任务不会取到不合格的弹幕
+            result = self.validator.validate([danmu])
+            if not result.messages:
+                messagebox.showwarning("警告", result.summary())
+                return
+            danmu = result.messages[0]
+            self.store.add_danmu(room_id, danmu)
+            self.index_changed(lambda index: index.add(room_id, danmu))
+            self.update_danmu_listbox(room["danmus"])
+            self.danmu_entry.delete(0, tk.END)
+
+    def import_danmus(self):
+        """从文本、CSV 或 JSONL 文件批量导入常用弹幕，在后台线程中读取文件"""
+        room_id = self.room_id_entry.get()
+        room = self.store.get_room(room_id)
+        if room is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+            return
+        path = filedialog.askopenfilename(title="导入常用弹幕", filetypes=DANMU_FILE_TYPES)
+        if not path:
+            return
+        self.import_button.config(state=tk.DISABLED)
+
+        def done(result):
+            self.import_button.config(state=tk.NORMAL)
+            added = self.store.add_danmus(room_id, result.danmus)
+            if len(added) > REBUILD_INDEX_AFTER:
+                self.danmu_generation += 1
+                self.phrase_index = None
+                self.build_phrase_index()
+            elif added:
+                self.index_changed(lambda index: index.extend(room_id, added))
+            room = self.store.get_room(room_id)
+            if room is not None and room_id == self.room_id_entry.get():
+                self.update_danmu_listbox(room["danmus"])
+            logger.info("已导入常用弹幕", extra={"fields": {"room": room_id, "added": len(added), "skipped": result.skipped}})
+            messagebox.showinfo("导入完成", result.summary())
+
+        def failed(error):
+            self.import_button.config(state=tk.NORMAL)
+            messagebox.showerror("错误", f"导入失败：{error}")
+
+        existing = list(room["danmus"])  # 副本交给后台线程，用于去重
+        sessdata = room.get("sessdata", "")
+
+        def read():
+            # 长度上限与发送前的检查相同，由账号等级决定（检查结果有缓存，无法确定时按最低等级）
+            return read_danmus(path, None, existing, self.credentials.check(sessdata).level)
+
+        self.dispatcher.run_in_background(read, on_done=done, on_error=failed)
+
+    def export_danmus(self):
+        """把当前直播间的常用弹幕导出为文本、CSV 或 JSONL 文件"""
+        room = self.store.get_room(self.room_id_entry.get())
+        if room is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+            return
+        path = filedialog.asksaveasfilename(title="导出常用弹幕", filetypes=DANMU_FILE_TYPES, defaultextension=".txt")
+        if not path:
+            return
+        self.dispatcher.run_in_background(
+            write_danmus, path, list(room["danmus"]),
+            on_done=lambda count: messagebox.showinfo("导出完成", f"已导出 {count} 条弹幕"),
+            on_error=lambda error: messagebox.showerror("错误", f"导出失败：{error}"),
+        )
+
+    def delete_selected_danmu(self):
+        """删除选中的常用弹幕（搜索时可以删除其他直播间的弹幕）"""
+        selected = self.selected_danmu()
+        if selected is None:
+            messagebox.showwarning("警告", "请选择要删除的弹幕！")
+            return
+        room_id, position, _ = selected
+        room = self.store.get_room(room_id)
+        if room is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+        elif self.store.delete_danmu(room_id, position):
+            self.index_changed(lambda index: index.remove(room_id, position))
+            if room_id == self.room_id_entry.get():
+                self.update_danmu_listbox(room["danmus"])
+            else:
+                self.refresh_danmu_listbox()
+            messagebox.showinfo("成功", "弹幕已删除！")
+        else:
+            messagebox.showwarning("警告", "无效的选择！")
+
+    def delete_selected_room(self):
+        """删除选中的直播间及其对应的信息"""
+        if self.selected_room_id is None:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+            return
+
+        self.jobs.stop(self.selected_room_id)
+        room_id = self.selected_room_id
+        self.campaigns.remove_room(room_id)
+        if self.store.delete_room(room_id):
+            self.index_changed(lambda index: index.remove_room(room_id))
+            self.update_common_rooms_display()
+            messagebox.showinfo("成功", f"房间 {self.selected_room_id} 及其弹幕信息已删除！")
+            self.clear_input_fields()
+            self.selected_room_id = None
+        else:
+            messagebox.showwarning("警告", "请选择一个有效的直播间！")
+
+    def clear_input_fields(self):
+        """清空输入字段"""
+        self.room_id_entry.delete(0, tk.END)
+        self.csrf_entry.delete(0, tk.END)
+        self.csrf_token_entry.delete(0, tk.END)
+        self.sessdata_entry.delete(0, tk.END)
+        self.message_entry.delete('1.0', tk.END)
+        self.update_danmu_listbox([])
+
+    def update_danmu_listbox(self, danmus):
+        """显示当前直播间的常用弹幕，正在搜索时显示搜索结果"""
+        self.room_danmus = list(danmus)
+        self.refresh_danmu_listbox()
+
+    def refresh_danmu_listbox(self):
+        """按搜索框的内容更新弹幕列表框，只插入和删除变化的条目"""
+        query = self.search_var.get().strip()
+        if not query or self.phrase_index is None:
+            self.search_results = None
+            items = self.room_danmus
+        else:
+            self.search_results = self.phrase_index.search(query, limit=SEARCH_LIMIT)
+            current_room = self.room_id_entry.get()
+            items = []
+            for entry_id in self.search_results:
+                room_id, text = self.phrase_index.entry(entry_id)
+                items.append(text if room_id == current_room else f"{text}（房间{room_id}）")
+        sync_listbox(self.danmu_listbox, self.danmu_items, items)
+        self.danmu_items = list(items)
+
+    def selected_danmu(self):
+        """列表框中选中的弹幕 (直播间ID, 位置, 弹幕)，没有选中时返回 None"""
+        selected_index = self.danmu_listbox.curselection()
+        if not selected_index:
+            return None
+        index = selected_index[0]
+        if self.search_results is None:
+            if index >= len(self.room_danmus):
+                return None
+            return self.room_id_entry.get(), index, self.room_danmus[index]
+        entry_id = self.search_results[index]
+        room_id, text = self.phrase_index.entry(entry_id)
+        return room_id, self.phrase_index.position(entry_id), text
+
+    def index_changed(self, update):
+        """常用弹幕有修改：用 update(index) 增量更新搜索索引"""
+        self.danmu_generation += 1
+        if self.phrase_index is not None:
+            update(self.phrase_index)
+
+    def build_phrase_index(self):
+        """在后台线程中建立搜索索引，完成后在界面线程中启用"""
+        generation = self.danmu_generation
+
+        def done(index):
+            if generation != self.danmu_generation:
+                self.build_phrase_index()  # 建立期间弹幕有修改，重新建立
+                return
+            self.phrase_index = index
+            self.refresh_danmu_listbox()
+
+        def failed(error):
+            logger.error("建立搜索索引失败，搜索不可用", extra={"fields": {"error": error}})
+
+        self.dispatcher.run_in_background(lambda: PhraseIndex.build(self.store.iter_danmus()), on_done=done, on_error=failed)
+
+    def copy_danmu_to_message(self, event):
+        """将选中的弹幕复制到弹幕内容框"""
+        selected = self.selected_danmu()
+        if selected is not None:
+            self.message_entry.delete('1.0', tk.END)
+            self.message_entry.insert('1.0', selected[2])
+
+    def push_selected_danmu(self, event):
+        """双击常用弹幕时插播到正在发送的任务中"""
+        selected = self.selected_danmu()
+        job = self.jobs.get(self.room_id_entry.get())
+        if selected is not None and job is not None and job.state != STOPPED:
+            try:
+                job.push(selected[2])
+            except MessageError as e:
+                messagebox.showwarning("警告", str(e))
+                return
+            logger.info("已插播弹幕")
+
+    def refresh_stats(self):
+        """定时刷新当前直播间的发送统计和各直播间的任务状态"""
+        job = self.jobs.get(self.room_id_entry.get())
+        self.stats_label.config(text=format_stats(job.metrics() if job is not None else None))
+        self.refresh_room_states()
+        self.refresh_history()
+        self.window.after(STATS_REFRESH_MS, self.refresh_stats)
+
+    def toggle_profiling(self, event=None):
+        """开始或停止性能分析（F12），停止后在后台写入结果文件"""
+        if self.profiler is None:
+            self.profiler = Profiler(self.profile_mode or "sample", memory=self.profile_memory).start()
+            self.latency_probe = LatencyProbe(self.window, self.profiler.record_latency).start()
+            self.result_label.config(text="正在进行性能分析，按 F12 停止")
+            return
+        self.latency_probe.stop()
+        profiler, self.profiler, self.latency_probe = self.profiler.stop(), None, None
+        self.dispatcher.run_in_background(
+            profiler.write,
+            on_done=lambda paths: self.result_label.config(text=f"性能分析结果已写入 {profiler.output_dir}（{len(paths)} 个文件）"),
+            on_error=lambda error: messagebox.showerror("错误", f"写入性能分析结果失败：{error}"),
+        )
+
+    def show_danmu_mode_help(self):
+        """显示弹幕模式帮助窗口"""
+        help_window = Toplevel()
+        help_window.title("弹幕模式说明")
+
+        # 加载帮助图片
+        help_image_path = "photos/danmu_modes_help.png"
+        help_photo = self.assets.photo(help_image_path)
+
+        # 创建标签显示图片
+        label = tk.Label(help_window, image=help_photo)
+        label.image = help_photo  # 保持对图片的引用，防止被垃圾回收
+        label.pack()
+
+        # 设置窗口固定大小为图片尺寸
+        img_width, img_height = help_photo.width(), help_photo.height()
+        help_window.geometry(f"{img_width}x{img_height}")
+
+        # 设置窗口最大和最小尺寸为图片尺寸
+        help_window.minsize(img_width, img_height)
+        help_window.maxsize(img_width, img_height)
+
+    def apply_theme(self, theme_name):
+        for widget in self.themed_widgets:
+            widget.config(bg=themes[theme_name]["color"])
+
+        #更新背景图片
+        background_photo = self.assets.background(themes[theme_name]["background"])
+        self.background_label.config(image=background_photo)
+        self.background_label.image = background_photo  # 保持对图片的引用，防止被垃圾回收
+
+    def change_theme(self, theme_name):
+        """切换主题"""
+        try:
+            self.store.set_setting("theme", theme_name)
+            self.apply_theme(theme_name)
+            messagebox.showinfo("成功", "主题切换成功！")
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
+
+    def build(self):
+        """创建窗口和所有控件"""
+        config = self.config
+        current_theme = config["settings"]["theme"]
+        theme_color = themes[current_theme]["color"]
+
+        # 创建窗口
+        window = self.window = tk.Tk()
+        window.title("Bilibili 弹幕发送器")
+        self.dispatcher = UiDispatcher(window)
+        self.dispatcher.start()
+
+        # 设置窗口图标
+        self.icon = tk.PhotoImage(file="photos/icon.png")
+        window.iconphoto(True, self.icon)
+
+        # 加载背景图片
+        background_photo = self.assets.background(themes[current_theme]["background"])
+
+        # 设置窗口固定大小为背景图片的尺寸
+        window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
+
+        # 禁止用户调整窗口大小
+        window.resizable(False, False)
+
+        # 设置窗口最大和最小尺寸为固定值
+        window.minsize(WINDOW_WIDTH, WINDOW_HEIGHT)
+        window.maxsize(WINDOW_WIDTH, WINDOW_HEIGHT)
+
+        # 创建背景标签
+        self.background_label = tk.Label(window, image=background_photo)
+        self.background_label.image = background_photo  # 保持对图片的引用，防止被垃圾回收
+        self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
+
+        # 添加鼠标拖动功能
+        def on_drag_start(event):
+            window._drag_start_x = event.x_root
+            window._drag_start_y = event.y_root
+
+        def on_drag_motion(event):
+            delta_x = event.x_root - window._drag_start_x
+            delta_y = event.y_root - window._drag_start_y
+            new_x = window.winfo_x() + delta_x
+            new_y = window.winfo_y() + delta_y
+            window.geometry(f"+{new_x}+{new_y}")
+            window._drag_start_x = event.x_root
+            window._drag_start_y = event.y_root
+
+        # 将鼠标左键按下事件绑定到on_drag_start
+        self.background_label.bind("<ButtonPress-1>", on_drag_start)
+        # 将鼠标左键移动事件绑定到on_drag_motion
+        self.background_label.bind("<B1-Motion>", on_drag_motion)
+
+        # 常用直播间显示
+        self.common_rooms_label = tk.Label(window, text="常用直播间:", bg=theme_color)
+        self.common_rooms_label.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.room_list = VirtualList(window, ROOM_LIST_ROWS, self.make_room_row, self.update_room_row, bg='white')
+        self.room_list.grid(row=1, column=0, rowspan=5, padx=5, pady=5, sticky="nsew")
+        self.update_common_rooms_display()
+
+        # 删除直播间按钮
+        self.delete_room_button = tk.Button(window, text="删除直播间", command=self.delete_selected_room, bg=theme_color)
+        self.delete_room_button.grid(row=6, column=0, padx=5, pady=5, sticky="ew")
+
+        # 直播间ID输入
+        self.room_id_label = tk.Label(window, text="直播间ID:", bg=theme_color)
+        self.room_id_label.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        self.room_id_entry = tk.Entry(window)
+        self.room_id_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
+
+        # CSRF输入
+        self.csrf_label = tk.Label(window, text="CSRF:", bg=theme_color)
+        self.csrf_label.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        self.csrf_entry = tk.Entry(window)
+        self.csrf_entry.grid(row=1, column=2, padx=5, pady=5, sticky="ew")
+
+        # CSRF_TOKEN输入
+        self.csrf_token_label = tk.Label(window, text="CSRF_TOKEN:", bg=theme_color)
+        self.csrf_token_label.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        self.csrf_token_entry = tk.Entry(window)
+        self.csrf_token_entry.grid(row=2, column=2, padx=5, pady=5, sticky="ew")
+
+        # SESSDATA输入
+        self.sessdata_label = tk.Label(window, text="COOKIE:", bg=theme_color)
+        self.sessdata_label.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+        self.sessdata_entry = tk.Entry(window)
+        self.sessdata_entry.grid(row=3, column=2, padx=5, pady=5, sticky="ew")
+
+        # 保存配置按钮
+        self.save_button = tk.Button(window, text="保存配置", command=self.save_inputs, bg=theme_color)
+        self.save_button.grid(row=4, column=1, columnspan=2, pady=5, sticky="ew")
+
+        # 弹幕内容输入
+        self.message_label = tk.Label(window, text="弹幕内容:", bg=theme_color)
+        self.message_label.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+        self.message_entry = tk.Text(window, height=2, width=30)
+        self.message_entry.grid(row=5, column=2, padx=5, pady=5, sticky="ew")
+
+        # 开始/停止发送按钮
+        self.toggle_button = tk.Button(window, text="开始发送", command=self.toggle_sending, bg=theme_color)
+        self.toggle_button.grid(row=6, column=1, columnspan=2, pady=5, sticky="ew")
+
+        # 发送方式选择
+        self.play_mode_label = tk.Label(window, text="发送方式:", bg=theme_color)
+        self.play_mode_label.grid(row=7, column=1, padx=5, pady=5, sticky="w")
+        play_mode_names = {value: name for name, value in play_modes.items()}
+        self.play_mode_var = tk.StringVar(window, play_mode_names[config["settings"].get("play_mode", default_play_mode)])
+        play_mode_menu = tk.OptionMenu(window, self.play_mode_var, *play_modes, command=self.set_play_mode)
+        play_mode_menu.grid(row=7, column=2, padx=5, pady=5, sticky="ew")
+
+        # 弹幕颜色选择
+        self.danmu_color_label = tk.Label(window, text="弹幕颜色:", bg=theme_color)
+        self.danmu_color_label.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        self.color_button = tk.Button(window, text="", bg=config["settings"]["color"], width=10, command=self.choose_color)
+        self.color_button.grid(row=0, column=4, padx=5, pady=5, sticky="ew")
+
+        # 弹幕发送间隔输入
+        self.time_step_label = tk.Label(window, text="发送间隔 (秒):", bg=theme_color)
+        self.time_step_label.grid(row=1, column=3, padx=5, pady=5, sticky="w")
+        self.time_step_entry = tk.Entry(window)
+        self.time_step_entry.grid(row=1, column=4, padx=5, pady=5, sticky="ew")
+        self.time_step_entry.insert(0, str(config["settings"]["time_step"]))
+
+        # 设置发送间隔按钮
+        self.time_step_set_button = tk.Button(window, text="设置间隔", command=self.set_time_step, bg=theme_color)
+        self.time_step_set_button.grid(row=1, column=5, padx=5, pady=5, sticky="ew")
+
+        # 字体大小输入
+        self.font_size_label = tk.Label(window, text="字体大小:", bg=theme_color)
+        self.font_size_label.grid(row=2, column=3, padx=5, pady=5, sticky="w")
+        self.font_size_entry = tk.Entry(window)
+        self.font_size_entry.grid(row=2, column=4, padx=5, pady=5, sticky="ew")
+        self.font_size_entry.insert(0, str(config["settings"]["font_size"]))
+
+        # 设置字体大小按钮
+        self.font_size_set_button = tk.Button(window, text="设置字体大小", command=self.set_font_size, bg=theme_color)
+        self.font_size_set_button.grid(row=2, column=5, padx=5, pady=5, sticky="ew")
+
+        # 弹幕模式输入
+        self.mode_label = tk.Label(window, text="弹幕模式 (1-3):", bg=theme_color)
+        self.mode_label.grid(row=3, column=3, padx=5, pady=5, sticky="w")
+        self.mode_entry = tk.Entry(window)
+        self.mode_entry.grid(row=3, column=4, padx=5, pady=5, sticky="ew")
+        self.mode_entry.insert(0, str(config["settings"]["mode"]))
+
+        # 设置弹幕模式按钮
+        self.mode_set_button = tk.Button(window, text="设置模式", command=self.set_mode, bg=theme_color)
+        self.mode_set_button.grid(row=3, column=5, padx=5, pady=5, sticky="ew")
+
+        # 显示弹幕模式帮助按钮
+        self.help_button = tk.Button(window, text="查看模式说明", command=self.show_danmu_mode_help, bg=theme_color)
+        self.help_button.grid(row=3, column=6, padx=5, pady=5, sticky="ew")
+
+        # 常用弹幕列表
+        self.danmu_list_label = tk.Label(window, text="常用弹幕:", bg=theme_color)
+        self.danmu_list_label.grid(row=4, column=3, padx=5, pady=5, sticky="w")
+
+        # 搜索常用弹幕（所有直播间），输入时立即过滤
+        self.search_var = tk.StringVar(window)
+        self.search_var.trace_add("write", lambda *args: self.refresh_danmu_listbox())
+        self.search_entry = tk.Entry(window, textvariable=self.search_var)
+        self.search_entry.grid(row=4, column=4, columnspan=2, padx=5, pady=5, sticky="ew")
+
+        self.danmu_listbox = tk.Listbox(window, height=10, width=30)
+        self.danmu_listbox.grid(row=5, column=3, columnspan=3, padx=5, pady=5, sticky="nsew")
+        self.danmu_listbox.bind("<<ListboxSelect>>", self.copy_danmu_to_message)
+        self.danmu_listbox.bind("<Double-Button-1>", self.push_selected_danmu)
+
+        # 添加常用弹幕输入
+        self.add_danmu_label = tk.Label(window, text="添加常用弹幕:", bg=theme_color)
+        self.add_danmu_label.grid(row=6, column=3, padx=5, pady=5, sticky="w")
+        self.danmu_entry = tk.Entry(window)
+        self.danmu_entry.grid(row=6, column=4, padx=5, pady=5, sticky="ew")
+
+        # 添加常用弹幕按钮
+        self.add_danmu_button = tk.Button(window, text="添加弹幕", command=self.add_danmu, bg=theme_color)
+        self.add_danmu_button.grid(row=6, column=5, padx=5, pady=5, sticky="ew")
+
+        # 删除常用弹幕按钮
+        self.delete_danmu_button = tk.Button(window, text="删除弹幕", command=self.delete_selected_danmu, bg=theme_color)
+        self.delete_danmu_button.grid(row=6, column=6, padx=5, pady=5, sticky="ew")
+
+        # 批量导入、导出常用弹幕按钮
+        self.import_button = tk.Button(window, text="导入弹幕", command=self.import_danmus, bg=theme_color)
+        self.import_button.grid(row=7, column=4, padx=5, pady=5, sticky="ew")
+        self.export_button = tk.Button(window, text="导出弹幕", command=self.export_danmus, bg=theme_color)
+        self.export_button.grid(row=7, column=5, padx=5, pady=5, sticky="ew")
+
+        # 导出发送记录按钮
+        self.export_history_button = tk.Button(window, text="导出发送记录", command=self.export_history, bg=theme_color)
+        self.export_history_button.grid(row=7, column=3, padx=5, pady=5, sticky="ew")
+
+        # 定时弹幕按钮
+        self.schedule_button = tk.Button(window, text="定时弹幕", command=self.show_schedules, bg=theme_color)
+        self.schedule_button.grid(row=7, column=6, padx=5, pady=5, sticky="ew")
+
+        # 发送记录按钮
+        self.history_button = tk.Button(window, text="发送记录", command=self.show_history, bg=theme_color)
+        self.history_button.grid(row=7, column=0, padx=5, pady=5, sticky="ew")
+
+        # 发送统计面板
+        self.stats_label = tk.Label(window, text=format_stats(None), bg=theme_color, anchor="w", justify=tk.LEFT)
+        self.stats_label.grid(row=8, column=0, columnspan=7, padx=5, pady=5, sticky="ew")
+        self.refresh_stats()
+
+        # 最近一次发送结果
+        self.result_label = tk.Label(window, text="", bg=theme_color, anchor="w", justify=tk.LEFT)
+        self.result_label.grid(row=9, column=0, columnspan=7, padx=5, pady=5, sticky="ew")
+
+        # 在后台建立常用弹幕的搜索索引，建立完成前搜索框不过滤
+        self.build_phrase_index()
+
+        # 发送记录窗口先显示发送日志中最近的记录（没有延迟），再恢复保存的定时弹幕和上次中断的发送任务
+        if self.journal is not None:
+            self.history.load_records(self.journal.history(limit=self.history.capacity))
+        self.restore_schedules()
+        self.resume_jobs()
+
+        # F12 开始或停止性能分析，启动参数给出 --profile 时立即开始
+        window.bind("<F12>", self.toggle_profiling)
+        if self.profile_mode is not None:
+            self.toggle_profiling()
+
+        # 主题切换按钮
+        theme_buttons_frame = tk.Frame(window)
+        theme_buttons_frame.grid(row=3, column=6, rowspan=4, columnspan=1, padx=5, pady=5, sticky="ew")
+        for theme_name, theme in themes.items():
+            theme_button = ImageButton(theme_buttons_frame, image_path=theme["button"], command=lambda t=theme_name: self.change_theme(t), assets=self.assets)
+            theme_button.pack(side=tk.TOP, padx=5, pady=5)
+
+        # 切换主题时需要更新背景色的控件
+        self.themed_widgets = [
+            self.toggle_button,
+            self.save_button,
+            self.time_step_set_button,
+            self.font_size_set_button,
+            self.mode_set_button,
+            self.help_button,
+            self.add_danmu_button,
+            self.delete_danmu_button,
+            self.import_button,
+            self.export_button,
+            self.schedule_button,
+            self.export_history_button,
+            self.history_button,
+            self.delete_room_button,
+            self.common_rooms_label,
+            self.room_id_label,
+            self.csrf_label,
+            self.csrf_token_label,
+            self.sessdata_label,
+            self.message_label,
+            self.danmu_color_label,
+            self.time_step_label,
+            self.font_size_label,
+            self.mode_label,
+            self.danmu_list_label,
+            self.add_danmu_label,
+            self.play_mode_label,
+            self.stats_label,
+            self.result_label,
+        ]
+
+        # 配置网格权重，使某些列和行能够扩展
+        window.grid_rowconfigure((0, 1, 2, 3, 4, 5, 6, 7, 8, 9), weight=1)
+        window.grid_columnconfigure((0, 1, 2, 3, 4, 5, 6), weight=1)
+        return window
+
+    def run(self):
+        """创建窗口并进入主循环，退出时写入尚未保存的配置"""
+        try:
+            self.build().mainloop()
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop().write()
+            self.campaigns.stop()
+            self.jobs.stop_all()
+            if self.journal is not None:
+                self.journal.close()
+            self.credentials.close()
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
+            self.store.close()
+
+
+def main(argv=None):
+    """主函数，初始化GUI"""
+    parser = argparse.ArgumentParser(prog="danmu_sender.py", description="Bilibili 弹幕发送器")
+    parser.add_argument("--profile", choices=profiling.MODES, help="启动时开始性能分析（也可以在界面中按 F12 开始和停止）")
+    parser.add_argument("--profile-memory", dest="profile_memory", action="store_true", help="性能分析时同时记录内存分配")
+    args = parser.parse_args(argv)
+    setup_logging()
+    App(profile=args.profile, profile_memory=args.profile_memory).run()
@@ -0,0 +1,48 @@
+import collections
+
+from PIL import Image, ImageTk
+
+
+class AssetCache:
+    """图片资源缓存：每张图片只在第一次使用时解码一次
+
+    背景图片可以预先缩放到窗口尺寸，并且最多保留 max_backgrounds 张，
+    超出时淘汰最久未使用的背景；按钮、帮助图片等小图片一直缓存。
+    需要在创建 tk.Tk() 之后使用。
+    """
+
+    def __init__(self, max_backgrounds=2, background_size=None):
+        self.max_backgrounds = max_backgrounds
+        self.background_size = background_size  # (宽, 高)，为 None 时不缩放
+        self._photos = {}
+        self._backgrounds = collections.OrderedDict()
+
+    def photo(self, path):
+        """获取图片对应的 PhotoImage"""
+        photo = self._photos.get(path)
+        if photo is None:
+            with Image.open(path) as image:
+                photo = ImageTk.PhotoImage(image)
+            self._photos[path] = photo
+        return photo
+
+    def background(self, path):
+        """获取背景图片对应的 PhotoImage，必要时缩放到窗口尺寸"""
+        photo = self._backgrounds.get(path)
+        if photo is not None:
+            self._backgrounds.move_to_end(path)
+            return photo
+        with Image.open(path) as image:
+            if self.background_size and image.size != tuple(self.background_size):
+                image = image.resize(self.background_size, Image.LANCZOS)
+            photo = ImageTk.PhotoImage(image)
+        self._backgrounds[path] = photo
+        while len(self._backgrounds) > self.max_backgrounds:
+            # 正在显示的背景被标签引用着，淘汰缓存不会让它消失
+            self._backgrounds.popitem(last=False)
+        return photo
+
+    def clear(self):
+        """清空缓存"""
+        self._photos.clear()
+        self._backgrounds.clear()
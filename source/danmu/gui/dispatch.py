@@ -0,0 +1,104 @@
+import logging
+import queue
+import sys
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class UiDispatcher:
+    """工作线程与 Tk 主线程之间的消息队列
+
+    工作线程只调用 post() 把回调放进队列，主线程用 after() 定时取出执行，
+    任何时候都不在工作线程中操作 Tk 控件。
+    run_in_background() 把磁盘或网络操作交给后台线程，完成后在主线程中回调。
+    """
+
+    def __init__(self, window, poll_ms=50, max_batch=200):
+        self.window = window
+        self.poll_ms = poll_ms
+        self.max_batch = max_batch  # 每次最多处理的消息数，避免消息太多时界面卡住
+        self._queue = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="danmu-ui-io")
+        self._after_id = None
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.window.after(self.poll_ms, self._drain)
+
+    def stop(self):
+        """停止取出消息并关闭后台线程"""
+        if self._after_id is not None:
+            try:
+                self.window.after_cancel(self._after_id)
+            except tk.TclError:
+                pass  # 窗口已经销毁
+            self._after_id = None
+        self._executor.shutdown(wait=False)
+
+    def post(self, callback, *args):
+        """在主线程中执行 callback(*args)，可以在任何线程中调用"""
+        self._queue.put((callback, args))
+
+    def run_in_background(self, func, *args, on_done=None, on_error=None):
+        """在后台线程中执行 func(*args)，结果或异常交给主线程中的 on_done / on_error"""
+        def done(future):
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    self.post(on_error, error)
+                else:
+                    logger.error("后台任务失败", extra={"fields": {"func": getattr(func, "__name__", func), "error": error}})
+            elif on_done is not None:
+                self.post(on_done, future.result())
+
+        self._executor.submit(func, *args).add_done_callback(done)
+
+    def _drain(self):
+        for _ in range(self.max_batch):
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                self.window.report_callback_exception(*sys.exc_info())
+        self._after_id = self.window.after(self.poll_ms, self._drain)
+
+
+class LatencyProbe:
+    """每隔 interval_ms 安排一次 after() 回调，测量它比预定时间晚了多少
+
+    主线程被耗时的回调占住时迟到时间明显变大，用于发现界面卡顿；只在性能分析时运行。
+    """
+
+    def __init__(self, window, on_latency, interval_ms=50):
+        self.window = window
+        self.on_latency = on_latency  # on_latency(迟到秒数)
+        self.interval_ms = interval_ms
+        self._after_id = None
+        self._due = 0.0
+
+    def start(self):
+        if self._after_id is None:
+            self._schedule()
+        return self
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.window.after_cancel(self._after_id)
+            except tk.TclError:
+                pass  # 窗口已经销毁
+            self._after_id = None
+
+    def _schedule(self):
+        self._due = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.window.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self.on_latency(max(0.0, time.perf_counter() - self._due))
+        self._schedule()
@@ -0,0 +1,28 @@
+# 定义主题
+themes = {
+    "sxwz": {
+        "color": "#A50C12", #禧运红
+        "background": "photos/background_shining.jpg",
+        "button": "photos/button_sxwz.png"
+    },
+    "queenie": {
+        "color": "#A1D29A", #淡苹果绿
+        "background": "photos/background_queenie.png",
+        "button": "photos/button_queenie.png"
+    },
+    "bekki": {
+        "color": "#A7C9D3", #冰川湖泊
+        "background": "photos/background_bekki.png",
+        "button": "photos/button_bekki.png"
+    },
+    "lian": {
+        "color": "#E38691", #浅梨粉
+        "background": "photos/background_lian.png",
+        "button": "photos/button_lian.png"
+    },
+    "yoyi": {
+        "color": "#E3BA09", #郁金
+        "background": "photos/background_yoyi.png",
+        "button": "photos/button_yoyi.png"
+    }
+}
@@ -0,0 +1,121 @@
+import tkinter as tk
+from collections.abc import Sequence
+
+
+#按钮背景图片
+class ImageButton(tk.Button):
+    def __init__(self, master=None, image_path=None, command=None, assets=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.image_path = image_path
+        self.command = command
+        self.photo = assets.photo(self.image_path) if assets else tk.PhotoImage(file=self.image_path)
+        self.config(image=self.photo, bd=0, highlightthickness=0, relief='flat')
+        self.bind("<Button-1>", self.on_click)
+
+    def on_click(self, event):
+        if self.command:
+            self.command()
+
+
+def sync_listbox(listbox, old, new):
+    """把列表框的内容从 old 改为 new，只删除和插入变化的部分
+
+    去掉相同的开头和结尾后只替换中间不同的一段，追加、删除或修改一条时
+    只需要一两次 Tk 调用，不会清空重建整个列表，也不会闪烁。
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    if old_end > start:
+        listbox.delete(start, old_end - 1)
+    if new_end > start:
+        listbox.insert(start, *new[start:new_end])
+
+
+class VirtualList(tk.Frame):
+    """可以滚动的虚拟列表：只创建能看见的那几行控件，条目再多也只更新这几行
+
+    make_row(parent) 创建一行控件，update_row(row, key) 让这一行显示 key 对应的条目，
+    调用方负责在内容相同时跳过重新配置。
+    """
+
+    def __init__(self, master, visible_rows, make_row, update_row, **kwargs):
+        super().__init__(master, **kwargs)
+        self.visible_rows = visible_rows
+        self.update_row = update_row
+        self.keys = []
+        self.first = 0  # 第一行显示的条目位置
+        self.scrollbar = tk.Scrollbar(self, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body = tk.Frame(self, bg=kwargs.get("bg"))
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.rows = []
+        for _ in range(visible_rows):
+            row = make_row(self.body)
+            self._bind_wheel(row)
+            self.rows.append(row)
+        self._shown = [None] * visible_rows  # 每一行当前显示的 key，None 表示这一行已隐藏
+        self._bind_wheel(self.body)
+
+    def set_keys(self, keys):
+        """设置全部条目的 key（按显示顺序），只重新配置内容有变化的可见行
+
+        keys 为序列（如 HistoryView）时直接引用不复制，条目很多时也不会每次刷新都复制一遍。
+        """
+        self.keys = keys if isinstance(keys, Sequence) else list(keys)
+        self.first = max(0, min(self.first, len(self.keys) - self.visible_rows))
+        self.refresh(force=False)
+
+    def refresh(self, force=True):
+        """重新显示可见行；force 为 False 时只更新显示的 key 有变化的行"""
+        for i, row in enumerate(self.rows):
+            index = self.first + i
+            key = self.keys[index] if index < len(self.keys) else None
+            shown = self._shown[i]
+            if key is None:
+                if shown is not None:
+                    row.pack_forget()  # 隐藏的行总在末尾，重新显示时按顺序 pack 即可
+                    self._shown[i] = None
+                continue
+            if shown is None:
+                row.pack(side=tk.TOP, fill=tk.X)
+            if force or key != shown:
+                self.update_row(row, key)
+                self._shown[i] = key
+        total = len(self.keys)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible_rows) / total)
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.keys) - self.visible_rows))
+        if first != self.first:
+            self.first = first
+            self.refresh(force=False)
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.keys)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or event.delta > 0:
+            self.scroll_to(self.first - 1)
+        else:
+            self.scroll_to(self.first + 1)
+        return "break"
+
+    def _bind_wheel(self, widget):
+        """行内的所有控件都响应鼠标滚轮（Windows / macOS 为 MouseWheel，X11 为 Button-4/5）"""
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._on_wheel)
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
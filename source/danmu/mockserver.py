@@ -0,0 +1,264 @@
+"""本地模拟的 Bilibili 直播弹幕接口，用于测试和性能测试
+
+    python -m danmu.mockserver --port 8000 --latency 0.05 --min-interval 1
+
+实现 POST /msg/send 的表单约定（字段、SESSDATA Cookie、返回的 JSON 格式），
+可以注入延迟、错误和限流响应，并记录收到的每一条弹幕：
+    GET  /x/web-interface/nav  检查登录凭据（invalid_sessdata 中的 SESSDATA 视为未登录）
+加上 --danmu-ws 时还会启动本地的弹幕信息流（danmu.replayserver），发送成功的弹幕会出现在其中。
+    GET  /stats     收到的请求数和各错误码的数量
+    GET  /received  收到的弹幕（?since=N 只返回第 N 条之后的）
+    POST /reset     清空记录
+"""
+import argparse
+import collections
+import http.cookies
+import http.server
+import json
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+
+from .core.result import CODE_BAD_REQUEST, CODE_CSRF_FAILED, CODE_NOT_LOGGED_IN, CODE_OK, CODE_TOO_FAST
+
+SEND_PATH = "/msg/send"
+NAV_PATH = "/x/web-interface/nav"
+REQUIRED_FIELDS = ("roomid", "msg", "rnd", "color", "fontsize", "mode", "csrf", "csrf_token")
+
+_MESSAGES = {
+    CODE_OK: "",
+    CODE_BAD_REQUEST: "参数错误",
+    CODE_NOT_LOGGED_IN: "账号未登录",
+    CODE_CSRF_FAILED: "csrf 校验失败",
+    CODE_TOO_FAST: "您发送弹幕的频率过快",
+}
+
+
+class MockLiveServer:
+    """在后台线程中运行的模拟弹幕接口
+
+    latency / jitter     每个请求固定延迟和随机附加延迟（秒）
+    error_rate           以该概率返回 HTTP 500
+    min_interval         同一个 SESSDATA 两次发送的最小间隔，太快时返回 10030
+    invalid_sessdata     视为未登录（-101）的 SESSDATA
+    codes                依次返回的错误码，用完后恢复正常判断
+    check_csrf           csrf 与 csrf_token 不一致时返回 -111
+    user_level           nav 接口返回的用户等级
+    on_receive           每条发送成功的弹幕记录都会传给它，如 ReplayServer.on_receive
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, min_interval=0.0,
+                 invalid_sessdata=(), codes=(), check_csrf=False, max_records=100000, seed=None,
+                 user_level=3, on_receive=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.min_interval = min_interval
+        self.invalid_sessdata = set(invalid_sessdata)
+        self.check_csrf = check_csrf
+        self.user_level = user_level
+        self.on_receive = on_receive
+        self._codes = collections.deque(codes)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_send = {}                 # sessdata -> 上次发送时间
+        self.received = collections.deque(maxlen=max_records)
+        self.total = 0
+        self.by_code = collections.Counter()
+        self.nav_checks = 0                  # 收到的 nav 请求数
+        self._httpd = http.server.ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """发送接口的完整地址"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{SEND_PATH}"
+
+    @property
+    def nav_url(self):
+        """检查登录凭据接口的完整地址"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{NAV_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-live-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程中运行，直到 Ctrl+C"""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def push_codes(self, *codes):
+        """追加依次返回的错误码"""
+        with self._lock:
+            self._codes.extend(codes)
+
+    def reset(self):
+        with self._lock:
+            self.received.clear()
+            self.total = 0
+            self.by_code.clear()
+            self.nav_checks = 0
+            self._last_send.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"received": self.total, "by_code": {str(k): v for k, v in self.by_code.items()}, "nav_checks": self.nav_checks}
+
+    def handle_send(self, form, sessdata):
+        """处理一次发送请求，返回 (HTTP 状态码, 响应对象)"""
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            with self._lock:
+                self.total += 1
+                self.by_code["http_500"] += 1
+            return 500, None
+        now = time.monotonic()
+        with self._lock:
+            if self._codes:
+                code = self._codes.popleft()
+            elif any(field not in form for field in REQUIRED_FIELDS):
+                code = CODE_BAD_REQUEST
+            elif not sessdata or sessdata in self.invalid_sessdata:
+                code = CODE_NOT_LOGGED_IN
+            elif self.check_csrf and form["csrf"] != form["csrf_token"]:
+                code = CODE_CSRF_FAILED
+            elif self.min_interval and now - self._last_send.get(sessdata, float("-inf")) < self.min_interval:
+                code = CODE_TOO_FAST
+            else:
+                code = CODE_OK
+            if code == CODE_OK:
+                self._last_send[sessdata] = now
+            self.total += 1
+            self.by_code[code] += 1
+            record = {
+                "time": time.time(),
+                "roomid": form.get("roomid"),
+                "msg": form.get("msg"),
+                "sessdata": sessdata,
+                "code": code,
+            }
+            self.received.append(record)
+        if code == CODE_OK and self.on_receive is not None:
+            self.on_receive(record)
+        return 200, {"code": code, "data": {} if code == CODE_OK else None, "message": _MESSAGES.get(code, ""), "msg": _MESSAGES.get(code, "")}
+
+    def handle_nav(self, sessdata):
+        """处理一次登录状态查询，返回 (HTTP 状态码, 响应对象)"""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.nav_checks += 1
+        if not sessdata or sessdata in self.invalid_sessdata:
+            return 200, {"code": CODE_NOT_LOGGED_IN, "message": _MESSAGES[CODE_NOT_LOGGED_IN], "data": {"isLogin": False}}
+        data = {
+            "isLogin": True,
+            "uname": f"mock-{sessdata[:8]}",
+            "mid": zlib.crc32(sessdata.encode("utf-8")),
+            "level_info": {"current_level": self.user_level},
+        }
+        return 200, {"code": CODE_OK, "message": "0", "data": data}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持长连接
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b"Internal Server Error"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8")
+                path = urllib.parse.urlsplit(self.path).path
+                if path == SEND_PATH:
+                    form = {k: v[-1] for k, v in urllib.parse.parse_qs(body, keep_blank_values=True).items()}
+                    self._reply(*server.handle_send(form, self._sessdata()))
+                elif path == "/reset":
+                    server.reset()
+                    self._reply(200, {"code": 0})
+                else:
+                    self._reply(404, {"code": 404, "message": "not found"})
+
+            def _sessdata(self):
+                cookies = http.cookies.SimpleCookie(self.headers.get("Cookie", ""))
+                return cookies["SESSDATA"].value if "SESSDATA" in cookies else ""
+
+            def do_GET(self):
+                parts = urllib.parse.urlsplit(self.path)
+                if parts.path == NAV_PATH:
+                    self._reply(*server.handle_nav(self._sessdata()))
+                elif parts.path == "/stats":
+                    self._reply(200, server.stats())
+                elif parts.path == "/received":
+                    since = int(urllib.parse.parse_qs(parts.query).get("since", ["0"])[0])
+                    with server._lock:
+                        records = list(server.received)[since:]
+                    self._reply(200, records)
+                else:
+                    self._reply(404, {"code": 404, "message": "not found"})
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m danmu.mockserver", description="本地模拟的 Bilibili 弹幕接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="端口，0 表示随机")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="每个请求的随机附加延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率")
+    parser.add_argument("--min-interval", type=float, default=0.0, help="同一账号的最小发送间隔，过快时返回 10030")
+    parser.add_argument("--invalid-sessdata", action="append", default=[], help="视为未登录的 SESSDATA")
+    parser.add_argument("--check-csrf", action="store_true", help="csrf 与 csrf_token 不一致时返回 -111")
+    parser.add_argument("--user-level", type=int, default=3, help="nav 接口返回的用户等级")
+    parser.add_argument("--danmu-ws", action="store_true", help="同时启动弹幕信息流，发送成功的弹幕会出现在其中（地址输出在第二行）")
+    args = parser.parse_args(argv)
+    feed = None
+    if args.danmu_ws:
+        from .replayserver import ReplayServer
+        feed = ReplayServer(host=args.host).start()
+    server = MockLiveServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.min_interval,
+                            args.invalid_sessdata, check_csrf=args.check_csrf, user_level=args.user_level,
+                            on_receive=feed.on_receive if feed is not None else None)
+    print(server.url, flush=True)
+    if feed is not None:
+        print(feed.url, flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
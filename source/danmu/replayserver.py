@@ -0,0 +1,299 @@
+"""本地的直播间弹幕信息流（WebSocket），回放录制的消息，用于测试 DanmuReceiver
+
+    python -m danmu.replayserver record --room 123 --duration 60 --out room.jsonl
+    python -m danmu.replayserver serve --recording room.jsonl --speed 10 --loop
+    python -m danmu.replayserver serve --synthetic 2000 --batch 50
+
+录制文件每行一条消息：{"t": 相对开始的秒数, "data": base64 编码的原始消息}。
+客户端连接并发送认证包后回复认证成功，然后按录制时的间隔（除以 speed）推送消息，
+同时回复心跳；push() / push_danmu() 可以随时向所有连接推送消息，
+与 MockLiveServer(on_receive=...) 配合时发送接口收到的弹幕会出现在信息流中。
+"""
+import argparse
+import base64
+import json
+import random
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from .core.receiver import (OP_AUTH, OP_AUTH_REPLY, OP_HEARTBEAT, OP_HEARTBEAT_REPLY, DanmuReceiver, encode_batch,
+                            encode_danmu, encode_packet, iter_packets)
+from .core.wsclient import OP_BINARY, OP_CLOSE, OP_PING, OP_PONG, WebSocketError, accept_key, encode_frame, mask_payload
+
+
+def load_recording(path):
+    """读取录制文件，返回 [(相对时间, 消息 bytes)]"""
+    frames = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                frames.append((float(record["t"]), base64.b64decode(record["data"])))
+    return frames
+
+
+class Recorder:
+    """把 DanmuReceiver 收到的原始消息写入录制文件（作为 on_frame 回调）"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+        self._start = None
+        self._lock = threading.Lock()
+        self.frames = 0
+
+    def __call__(self, data):
+        now = time.monotonic()
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            record = {"t": round(now - self._start, 4), "data": base64.b64encode(bytes(data)).decode("ascii")}
+            self._file.write(json.dumps(record) + "\n")
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def synthetic_frames(count, batch=1, interval=0.0, seed=0):
+    """生成 count 条弹幕的模拟消息，每 batch 条压缩成一条消息（夹杂其他命令）"""
+    rng = random.Random(seed)
+    frames = []
+    packets = []
+    other = encode_packet(5, json.dumps({"cmd": "INTERACT_WORD", "data": {"uid": 1, "uname": "观众"}}), 0)
+    for i in range(count):
+        packets.append(encode_danmu(f"测试弹幕 {i}", uid=rng.randrange(1, 10 ** 8), uname=f"观众{i % 100}"))
+        if i % 3 == 0:
+            packets.append(other)
+        if len(packets) >= batch:
+            frames.append((len(frames) * interval, encode_batch(packets) if batch > 1 else packets[0]))
+            packets = []
+    if packets:
+        frames.append((len(frames) * interval, encode_batch(packets)))
+    return frames
+
+
+class ReplayServer:
+    """在后台线程中运行的弹幕信息流"""
+
+    def __init__(self, frames=(), host="127.0.0.1", port=0, speed=1.0, loop=False, popularity=1):
+        self.frames = list(frames)
+        self.speed = speed
+        self.loop = loop
+        self.popularity = popularity
+        self.auth = []              # 收到的认证包内容
+        self.heartbeats = 0
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}/sub"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="danmu-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程中运行，直到 Ctrl+C"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def push(self, data):
+        """向所有已认证的连接推送一条消息"""
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.send(data)
+
+    def push_danmu(self, text, uid=0, uname=""):
+        """推送一条弹幕"""
+        self.push(encode_danmu(text, uid, uname))
+
+    def on_receive(self, record):
+        """作为 MockLiveServer 的 on_receive 回调：发送成功的弹幕出现在信息流中"""
+        self.push_danmu(record["msg"], uname="mock")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self._send_lock = threading.Lock()
+                self._closed = threading.Event()
+
+            def send(self, data, opcode=OP_BINARY):
+                try:
+                    with self._send_lock:
+                        self.wfile.write(encode_frame(opcode, data, mask=False))
+                except OSError:
+                    self._closed.set()
+
+            def close(self):
+                self._closed.set()
+                try:
+                    self.connection.close()
+                except OSError:
+                    pass
+
+            def handle(self):
+                if not self._handshake():
+                    return
+                try:
+                    self._serve()
+                except (OSError, WebSocketError):
+                    pass
+                finally:
+                    self._closed.set()
+                    with server._lock:
+                        server._clients.discard(self)
+
+            def _handshake(self):
+                request = self.rfile.readline()
+                headers = {}
+                while True:
+                    line = self.rfile.readline().decode("latin-1")
+                    if line in ("\r\n", "\n", ""):
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                key = headers.get("sec-websocket-key")
+                if not request.startswith(b"GET ") or not key:
+                    self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                    return False
+                self.wfile.write((
+                    "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+                ).encode("latin-1"))
+                return True
+
+            def _read_frame(self):
+                head = self.rfile.read(2)
+                if len(head) < 2:
+                    raise WebSocketError("连接已断开")
+                opcode = head[0] & 0x0F
+                length = head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", self.rfile.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", self.rfile.read(8))[0]
+                key = self.rfile.read(4) if head[1] & 0x80 else None
+                payload = self.rfile.read(length)
+                return opcode, mask_payload(payload, key) if key else payload
+
+            def _serve(self):
+                while True:
+                    opcode, payload = self._read_frame()
+                    if opcode == OP_CLOSE:
+                        self.send(payload[:2], OP_CLOSE)
+                        return
+                    if opcode == OP_PING:
+                        self.send(payload, OP_PONG)
+                        continue
+                    for operation, body in iter_packets(payload):
+                        if operation == OP_AUTH:
+                            with server._lock:
+                                server.auth.append(json.loads(bytes(body)))
+                                # 先加入推送列表再回复认证成功，客户端连上后立即 push() 的消息不会丢失
+                                server._clients.add(self)
+                            self.send(encode_packet(OP_AUTH_REPLY, b'{"code":0}'))
+                            threading.Thread(target=self._replay, name="danmu-replay-frames", daemon=True).start()
+                        elif operation == OP_HEARTBEAT:
+                            with server._lock:
+                                server.heartbeats += 1
+                            self.send(encode_packet(OP_HEARTBEAT_REPLY, server.popularity.to_bytes(4, "big")))
+
+            def _replay(self):
+                while not self._closed.is_set():
+                    start = time.monotonic()
+                    for offset, data in server.frames:
+                        delay = start + offset / server.speed - time.monotonic()
+                        if delay > 0 and self._closed.wait(delay):
+                            return
+                        if self._closed.is_set():
+                            return
+                        self.send(data)
+                    if not server.loop or not server.frames:
+                        return
+
+        return Handler
+
+
+def record(room_id, url, duration, path):
+    """录制直播间信息流 duration 秒，返回录制的消息数"""
+    recorder = Recorder(path)
+    receiver = DanmuReceiver(room_id, url=url, on_frame=recorder)
+    receiver.start()
+    try:
+        time.sleep(duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop()
+        recorder.close()
+    return recorder.frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m danmu.replayserver", description="录制和回放直播间弹幕信息流")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="启动本地信息流，回放录制的消息")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=0, help="端口，0 表示随机")
+    serve.add_argument("--recording", help="录制文件")
+    serve.add_argument("--synthetic", type=int, default=0, metavar="N", help="不使用录制文件，生成 N 条模拟弹幕")
+    serve.add_argument("--batch", type=int, default=20, help="模拟弹幕每条消息包含的弹幕数")
+    serve.add_argument("--interval", type=float, default=0.01, help="模拟消息的间隔（秒）")
+    serve.add_argument("--speed", type=float, default=1.0, help="回放速度倍数")
+    serve.add_argument("--loop", action="store_true", help="循环回放")
+    rec = commands.add_parser("record", help="录制直播间信息流")
+    rec.add_argument("--room", required=True, help="直播间ID（长号）")
+    rec.add_argument("--url", default="wss://broadcastlv.chat.bilibili.com/sub", help="信息流地址")
+    rec.add_argument("--duration", type=float, default=60.0, help="录制时长（秒）")
+    rec.add_argument("--out", required=True, help="录制文件")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        print(f"已录制 {record(args.room, args.url, args.duration, args.out)} 条消息")
+        return 0
+    if args.recording:
+        frames = load_recording(args.recording)
+    else:
+        frames = synthetic_frames(args.synthetic, args.batch, args.interval)
+    server = ReplayServer(frames, args.host, args.port, args.speed, args.loop)
+    print(server.url, flush=True)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
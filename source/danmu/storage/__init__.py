@@ -0,0 +1,34 @@
+"""配置与房间数据的存储
+
+下面的名称可以直接从 danmu.storage 导入，所在的子模块在第一次访问时才加载。
+"""
+import importlib
+
+# 名称 -> 所在子模块，第一次访问时才导入
+_LAZY = {}
+for _module, _names in (
+    ("config_store", ("ConfigStore",)),
+    ("sqlite_store", ("RoomsView", "SqliteRoomStore")),
+    ("config", ("CONFIG_FILE", "ROOM_DB_FILE", "default_settings", "load_config", "save_config")),
+    ("room_store", ("MAX_COMMON_ROOM", "ROOM_SETTING_KEYS", "RoomStore")),
+    ("library", ("ImportResult", "read_danmus", "write_danmus")),
+    ("search", ("PhraseIndex",)),
+):
+    for _name in _names:
+        _LAZY[_name] = _module
+del _module, _names, _name
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
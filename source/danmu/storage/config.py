@@ -0,0 +1,68 @@
+import logging
+
+from .sqlite_store import RoomsView, SqliteRoomStore
+
+CONFIG_FILE = "config/config.txt"  # 配置文件相对地址
+ROOM_DB_FILE = "config/rooms.db"   # SQLite 存储的相对地址（settings.storage 为 "sqlite" 时使用）
+time_step = 5                      # 发送弹幕的时间间隔
+default_color = "#FFFFFF"          # 默认弹幕颜色
+default_font_size = 25             # 默认字体大小
+default_mode = 1                   # 默认弹幕模式
+default_theme = "lian"             # 默认主题
+
+logger = logging.getLogger(__name__)
+
+
+def default_settings():
+    """默认设置"""
+    return {
+        "time_step": time_step,
+        "color": default_color,
+        "font_size": default_font_size,
+        "mode": default_mode,
+        "theme": default_theme
+    }
+
+
+def load_config(store, room_db_file=ROOM_DB_FILE):
+    """通过 ConfigStore 加载配置文件"""
+    config = store.load()
+    if config is None:
+        config = {
+            "common_rooms": {},
+            "settings": default_settings()
+        }
+
+    # 确保 settings 键存在
+    if "settings" not in config:
+        config["settings"] = default_settings()
+
+    # 确保 common_rooms 中的所有房间都有 danmus 键
+    for room_id in config["common_rooms"]:
+        if "danmus" not in config["common_rooms"][room_id]:
+            config["common_rooms"][room_id]["danmus"] = []
+
+    # 使用 SQLite 存储时，首次启动把 common_rooms 导入数据库，之后按需读取
+    if config["settings"].get("storage") == "sqlite":
+        room_store = SqliteRoomStore(room_db_file)
+        if room_store.migrate(config["common_rooms"]):
+            logger.info("已将常用直播间导入 SQLite 存储", extra={"fields": {"rooms": len(config["common_rooms"]), "db": room_db_file}})
+        config["common_rooms"] = RoomsView(room_store, legacy=config["common_rooms"])
+        store.before_write = _sync_rooms  # 数据库也在配置写入线程中更新
+
+    return config
+
+
+def _sync_rooms(config):
+    """在配置写入线程中把 RoomsView 的修改写回数据库，返回要写入 config.txt 的配置"""
+    rooms = config["common_rooms"]
+    if isinstance(rooms, RoomsView):
+        rooms.sync()
+        # config.txt 中原有的 common_rooms 作为导入前的备份原样保留，不再更新（见 README）
+        config = dict(config, common_rooms=rooms.legacy)
+    return config
+
+
+def save_config(store, config):
+    """通过 ConfigStore 保存配置文件（由后台线程合并后写入，不阻塞调用方）"""
+    store.save(config)
@@ -0,0 +1,137 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigStore:
+    """在后台线程中合并、延迟写入配置文件
+
+    save() 在调用方线程中复制一份配置并登记“需要保存”，立即返回；后台线程在最后一次 save() 之后
+    等待 delay 秒再序列化这份副本，内容与上次写入相同时跳过写盘，界面线程之后的修改不会写入半截。
+    写入先写临时文件再重命名，中途崩溃不会留下损坏的配置文件。
+    before_write(config) 在写入线程中、序列化之前调用，返回实际要写入的配置，
+    可以用来把其他存储（如 SQLite）的修改也放到后台写入。
+    后台写入失败（磁盘已满、没有权限、数据库被锁定等任何异常）时记录日志，保留要写入的配置，
+    delay 秒后重试，写入线程不会因此退出。
+    """
+
+    def __init__(self, path, delay=0.5, before_write=None):
+        self.path = path
+        self.delay = delay
+        self.before_write = before_write
+        self._config = None
+        self._pending = False
+        self._last_request = 0.0
+        self._last_written = None  # 上次写入的内容，用于跳过没有变化的写入
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def load(self, default=None):
+        """读取配置文件，文件不存在时返回 default"""
+        if not os.path.exists(self.path):
+            return default
+        with open(self.path, "r", encoding="utf-8") as file:
+            text = file.read()
+        self._last_written = text
+        return json.loads(text)
+
+    def save(self, config):
+        """登记一次保存请求，由后台线程延迟写入"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("配置存储已关闭")
+            self._config = copy.deepcopy(config)
+            self._pending = True
+            self._last_request = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self):
+        """立即写入尚未保存的修改"""
+        with self._cond:
+            if not self._pending:
+                return
+            config = self._config
+            self._pending = False
+        self._write(config)
+
+    def close(self):
+        """写入尚未保存的修改并停止后台线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # 防抖：距最后一次保存请求满 delay 秒后再写入
+                while not self._closed:
+                    remaining = self._last_request + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+                config = self._config
+                self._pending = False
+            try:
+                self._write(config)
+            except Exception as e:
+                logger.error("写入配置文件失败，稍后重试", extra={"fields": {"path": self.path, "error": e}})
+                self._retry_later(config)
+
+    def _retry_later(self, config):
+        """写入没有完成：重新登记保存请求，delay 秒后再写入（期间有新的保存请求时以新的为准）"""
+        with self._cond:
+            if not self._pending:
+                self._config = config
+                self._pending = True
+                self._last_request = time.monotonic()
+                self._cond.notify()
+
+    def _write(self, config):
+        """序列化并原子地写入配置文件"""
+        with self._write_lock:
+            try:
+                if self.before_write is not None:
+                    config = self.before_write(config)
+                text = json.dumps(config)
+            except RuntimeError:
+                # before_write 读取的数据（如 RoomsView 的缓存）正被界面线程修改，稍后重试
+                self._retry_later(config)
+                return
+            if text == self._last_written:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    file.write(text)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._last_written = text
@@ -0,0 +1,140 @@
+"""常用弹幕的批量导入和导出
+
+支持三种文件格式，按扩展名判断：
+    .txt    每行一条弹幕
+    .csv    每行第一列为弹幕，第一行为 danmu / text / 弹幕 等列名时跳过
+    .jsonl  每行一个 JSON 字符串，或含 danmu / text / msg 字段的对象
+
+导入时逐行读取，不把整个文件读入内存；空行、超长和重复的弹幕被跳过并计数，
+长度上限与发送前的检查相同，由账号等级决定（validate.max_length_for）。
+读取只生成弹幕列表，由调用方一次性写入 RoomStore（只保存一次配置）。
+"""
+import csv
+import json
+import os
+
+from ..core.validate import max_length_for
+
+FORMATS = ("txt", "csv", "jsonl")
+_HEADER_NAMES = frozenset({"danmu", "danmus", "text", "msg", "message", "弹幕"})
+_JSON_KEYS = ("danmu", "text", "msg")
+
+
+def detect_format(path):
+    """按扩展名判断文件格式，无法判断时按 txt 处理"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext == "json":
+        return "jsonl"
+    return ext if ext in FORMATS else "txt"
+
+
+class ImportResult:
+    """一次导入的结果"""
+
+    __slots__ = ("danmus", "duplicates", "too_long", "empty", "invalid")
+
+    def __init__(self):
+        self.danmus = []        # 通过检查、需要添加的弹幕，保持文件中的顺序
+        self.duplicates = 0     # 与已有弹幕或文件中前面的弹幕重复
+        self.too_long = 0       # 超过长度上限
+        self.empty = 0          # 空行
+        self.invalid = 0        # 无法解析的行（只有 jsonl 会出现）
+
+    @property
+    def skipped(self):
+        return self.duplicates + self.too_long + self.empty + self.invalid
+
+    def summary(self):
+        text = f"导入 {len(self.danmus)} 条弹幕"
+        details = [f"{name} {count} 条" for name, count in (
+            ("重复", self.duplicates), ("超长", self.too_long), ("空行", self.empty), ("无法解析", self.invalid)
+        ) if count]
+        return text + ("，跳过" + "、".join(details) if details else "")
+
+
+def iter_lines(file, fmt):
+    """从文本文件中逐条读出弹幕原文，无法解析的行给出 None"""
+    if fmt == "txt":
+        for line in file:
+            yield line.rstrip("\r\n")
+    elif fmt == "csv":
+        first = True
+        for row in csv.reader(file):
+            cell = row[0] if row else ""
+            if first and cell.strip().lower() in _HEADER_NAMES:
+                first = False
+                continue
+            first = False
+            yield cell
+    elif fmt == "jsonl":
+        for line in file:
+            if not line.strip():
+                yield ""
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            if isinstance(value, dict):
+                value = next((value[key] for key in _JSON_KEYS if key in value), None)
+            yield value if isinstance(value, str) else None
+    else:
+        raise ValueError(f"不支持的文件格式：{fmt}")
+
+
+def read_danmus(path, fmt=None, existing=(), level=None, max_length=None, encoding="utf-8-sig"):
+    """逐行读取弹幕文件，跳过空行、超长和与 existing 或前文重复的弹幕，返回 ImportResult
+
+    长度上限为 max_length，没有给出时按账号等级 level 决定（未知时为最低等级的上限）。
+    """
+    fmt = fmt or detect_format(path)
+    max_length = max_length or max_length_for(level)
+    result = ImportResult()
+    seen = set(existing)
+    with open(path, encoding=encoding, newline="" if fmt == "csv" else None) as file:
+        for text in iter_lines(file, fmt):
+            if text is None:
+                result.invalid += 1
+                continue
+            text = text.strip()
+            if not text:
+                result.empty += 1
+            elif len(text) > max_length:
+                result.too_long += 1
+            elif text in seen:
+                result.duplicates += 1
+            else:
+                seen.add(text)
+                result.danmus.append(text)
+    return result
+
+
+def write_danmus(path, danmus, fmt=None):
+    """把弹幕列表导出为文件，返回导出的条数；先写临时文件再替换，中途失败不会留下半个文件"""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的文件格式：{fmt}")
+    temp_path = f"{path}.tmp"
+    count = 0
+    try:
+        with open(temp_path, "w", encoding="utf-8", newline="" if fmt == "csv" else None) as file:
+            if fmt == "csv":
+                writer = csv.writer(file)
+                writer.writerow(("danmu",))
+                for text in danmus:
+                    writer.writerow((text,))
+                    count += 1
+            else:
+                for text in danmus:
+                    file.write(json.dumps(text, ensure_ascii=False) if fmt == "jsonl" else text.replace("\n", " "))
+                    file.write("\n")
+                    count += 1
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return count
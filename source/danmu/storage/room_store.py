@@ -0,0 +1,183 @@
+from .config import CONFIG_FILE, ROOM_DB_FILE, load_config, save_config
+from .config_store import ConfigStore
+from .sqlite_store import RoomsView
+
+MAX_COMMON_ROOM = 20  # 最多保存的常用直播间数量（SQLite 存储不限制）
+
+# 可以按直播间单独设置的项，未单独设置时使用全局设置
+ROOM_SETTING_KEYS = ("time_step", "color", "font_size", "mode", "play_mode")
+
+
+class RoomStore:
+    """设置和常用直播间的读写接口，不依赖任何界面
+
+    每次修改后调用 ConfigStore 合并写入，调用方不需要自己保存。
+    config 属性仍然是原来的配置字典，common_rooms 可能是 RoomsView。
+    """
+
+    def __init__(self, path=CONFIG_FILE, room_db_file=ROOM_DB_FILE, max_rooms=MAX_COMMON_ROOM):
+        self.max_rooms = max_rooms
+        self._file = ConfigStore(path)
+        self.config = load_config(self._file, room_db_file)
+
+    @property
+    def settings(self):
+        return self.config["settings"]
+
+    @property
+    def rooms(self):
+        return self.config["common_rooms"]
+
+    def save(self):
+        """登记保存，由后台线程写入"""
+        save_config(self._file, self.config)
+
+    def close(self):
+        """写入尚未保存的修改"""
+        self._file.close()
+
+    def set_setting(self, key, value):
+        self.settings[key] = value
+        self.save()
+
+    def room_settings(self, room_id):
+        """直播间的发送设置：全局设置加上该直播间单独设置的项"""
+        settings = {key: self.settings[key] for key in ROOM_SETTING_KEYS if key in self.settings}
+        room = self.get_room(room_id)
+        if room is not None:
+            settings.update(room.get("settings", {}))
+        return settings
+
+    def set_room_setting(self, room_id, key, value):
+        """单独设置直播间的发送设置，返回是否设置成功"""
+        if key not in ROOM_SETTING_KEYS:
+            raise KeyError(key)
+        room = self.get_room(room_id)
+        if room is None:
+            return False
+        room.setdefault("settings", {})[key] = value
+        self.save()
+        return True
+
+    def get_room(self, room_id):
+        """获取直播间信息，不存在时返回 None"""
+        if room_id not in self.rooms:
+            return None
+        room = self.rooms[room_id]
+        # 确保 danmus 键存在
+        room.setdefault("danmus", [])
+        return room
+
+    def iter_danmus(self):
+        """依次给出 (直播间ID, 弹幕列表副本)，用于建立搜索索引；SQLite 存储时不把直播间载入缓存"""
+        rooms = self.rooms
+        for room_id in list(rooms):
+            if isinstance(rooms, RoomsView):
+                yield room_id, rooms.danmus(room_id)
+            elif room_id in rooms:
+                yield room_id, list(rooms[room_id].get("danmus", []))
+
+    def iter_schedules(self):
+        """依次给出 (直播间ID, 定时弹幕)，用于启动时恢复定时弹幕；SQLite 存储时不把直播间载入缓存"""
+        rooms = self.rooms
+        if isinstance(rooms, RoomsView):
+            items = rooms.schedules().items()
+        else:
+            items = [(room_id, room.get("schedules", [])) for room_id, room in rooms.items()]
+        for room_id, schedules in items:
+            for schedule in schedules:
+                yield room_id, schedule
+
+    def add_schedule(self, room_id, schedule):
+        """保存一条定时弹幕，返回是否保存成功"""
+        room = self.get_room(room_id)
+        if room is None:
+            return False
+        room.setdefault("schedules", []).append(schedule)
+        self.save()
+        return True
+
+    def remove_schedule(self, room_id, schedule_id):
+        """删除一条定时弹幕，返回是否删除成功"""
+        room = self.get_room(room_id)
+        if room is None:
+            return False
+        schedules = room.get("schedules", [])
+        kept = [schedule for schedule in schedules if schedule["id"] != schedule_id]
+        if len(kept) == len(schedules):
+            return False
+        if kept:
+            room["schedules"] = kept
+        else:
+            del room["schedules"]
+        self.save()
+        return True
+
+    def add_room(self, room_id, csrf, csrf_token, sessdata):
+        """将直播间添加到常用直播间（已存在时保留原有信息并标记为最近使用）"""
+        if room_id not in self.rooms:
+            self.rooms[room_id] = {"csrf": csrf, "csrf_token": csrf_token, "sessdata": sessdata, "danmus": []}
+        else:
+            self.get_room(room_id)
+            if isinstance(self.rooms, RoomsView):
+                self.rooms.touch(room_id)
+        self._trim()
+        self.save()
+        return self.rooms[room_id] if room_id in self.rooms else None
+
+    def put_room(self, room_id, csrf, csrf_token, sessdata, danmus):
+        """保存直播间，覆盖登录信息和弹幕，保留单独设置等其他信息"""
+        room = self.get_room(room_id)
+        extra = {k: v for k, v in room.items() if k not in ("csrf", "csrf_token", "sessdata", "danmus")} if room else {}
+        self.rooms[room_id] = dict(extra, csrf=csrf, csrf_token=csrf_token, sessdata=sessdata, danmus=list(danmus))
+        self._trim()
+        self.save()
+
+    def delete_room(self, room_id):
+        """删除直播间及其弹幕，返回是否删除成功"""
+        if room_id not in self.rooms:
+            return False
+        del self.rooms[room_id]
+        self.save()
+        return True
+
+    def add_danmu(self, room_id, danmu):
+        """添加常用弹幕，返回是否添加成功"""
+        room = self.get_room(room_id)
+        if room is None or not danmu:
+            return False
+        room["danmus"].append(danmu)
+        self.save()
+        return True
+
+    def add_danmus(self, room_id, danmus):
+        """批量添加常用弹幕（跳过已有的），只保存一次配置，返回实际添加的弹幕列表"""
+        room = self.get_room(room_id)
+        if room is None:
+            return []
+        existing = set(room["danmus"])
+        added = []
+        for danmu in danmus:
+            if danmu and danmu not in existing:
+                existing.add(danmu)
+                added.append(danmu)
+        if added:
+            room["danmus"].extend(added)
+            self.save()
+        return added
+
+    def delete_danmu(self, room_id, index):
+        """删除第 index 条常用弹幕，返回是否删除成功"""
+        room = self.get_room(room_id)
+        if room is None or not 0 <= index < len(room["danmus"]):
+            return False
+        del room["danmus"][index]
+        self.save()
+        return True
+
+    def _trim(self):
+        """常用直播间超出上限时删除最早添加的直播间"""
+        if isinstance(self.rooms, RoomsView):
+            return
+        while len(self.rooms) > self.max_rooms:
+            del self.rooms[next(iter(self.rooms))]
@@ -0,0 +1,203 @@
+"""常用弹幕的内存搜索索引
+
+每条弹幕按单字和相邻两字建立倒排索引，查询时取查询串各个二元组倒排表的交集，
+再逐条确认包含关系；安装了 pypinyin 时还会索引拼音首字母（"nh" 可以搜到 "你好"）。
+添加和删除弹幕时增量更新，不重新建立索引。
+pypinyin 是可选依赖（pip install pypinyin），没有安装时第一次建立索引会记录一条日志。
+pypinyin 的词典较大，第一次建立拼音索引时才导入，不影响命令行的启动时间。
+"""
+import importlib.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = frozenset()
+_pinyin = None  # 第一次使用时导入的 (lazy_pinyin, 首字母风格)
+_pinyin_logged = False  # 是否已经记录过拼音搜索不可用
+
+
+def has_pinyin():
+    """是否安装了可选依赖 pypinyin"""
+    return importlib.util.find_spec("pypinyin") is not None
+
+
+def _pinyin_default():
+    """默认是否索引拼音；没有安装 pypinyin 时只记录一次日志"""
+    global _pinyin_logged
+    available = has_pinyin()
+    if not available and not _pinyin_logged:
+        _pinyin_logged = True
+        logger.info("没有安装 pypinyin，常用弹幕不能按拼音首字母搜索")
+    return available
+
+
+def pinyin_initials(text):
+    """弹幕的拼音首字母（小写），没有安装 pypinyin 或不含汉字时返回空字符串"""
+    global _pinyin
+    if _pinyin is None:
+        try:
+            from pypinyin import Style, lazy_pinyin
+        except ImportError:
+            _pinyin = False
+        else:
+            _pinyin = (lazy_pinyin, Style.FIRST_LETTER)
+    if not _pinyin:
+        return ""
+    lazy_pinyin, style = _pinyin
+    initials = "".join(lazy_pinyin(text, style=style, errors="ignore")).lower()
+    return initials if initials != text.lower() else ""
+
+
+def _grams(key):
+    """字符串中的单字和相邻两字"""
+    grams = set(key)
+    grams.update(key[i:i + 2] for i in range(len(key) - 1))
+    return grams
+
+
+class PhraseIndex:
+    """所有直播间常用弹幕的搜索索引
+
+    每条弹幕有一个递增的条目 ID，搜索结果按条目 ID（即添加顺序）排列；
+    每个直播间的条目 ID 列表与 danmus 列表一一对应，用位置增删；
+    条目的位置在第一次查询时按直播间建立映射，之后为 O(1)，在列表中间增删时丢弃重建。
+    """
+
+    def __init__(self, use_pinyin=None):
+        self.use_pinyin = _pinyin_default() if use_pinyin is None else use_pinyin  # 默认安装了 pypinyin 时才索引拼音
+        self._entries = {}   # 条目 ID -> (room_id, 弹幕, 用于匹配的字符串)
+        self._rooms = {}     # room_id -> [条目 ID]，顺序与 danmus 相同
+        self._postings = {}  # 单字或两字 -> {条目 ID}
+        self._positions = {}  # room_id -> {条目 ID: 位置}，position() 第一次查询时建立
+        self._next_id = 0
+        self._last = None    # (查询串, 直播间, 结果条目 ID 集合)，用户继续输入时在上次结果中过滤
+
+    @classmethod
+    def build(cls, rooms, use_pinyin=None):
+        """由 (直播间ID, 弹幕列表) 序列建立索引"""
+        index = cls(use_pinyin)
+        for room_id, danmus in rooms:
+            index.set_room(room_id, danmus)
+        return index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, room_id, text):
+        """在直播间弹幕列表末尾追加一条弹幕，返回条目 ID"""
+        return self.insert(room_id, len(self._rooms.get(room_id, ())), text)
+
+    def extend(self, room_id, danmus):
+        """在直播间弹幕列表末尾追加多条弹幕"""
+        for text in danmus:
+            self.add(room_id, text)
+
+    def insert(self, room_id, position, text):
+        """在直播间弹幕列表的 position 处插入一条弹幕，返回条目 ID"""
+        entry_id = self._next_id
+        self._next_id += 1
+        lowered = text.lower()
+        keys = (lowered, pinyin_initials(text)) if self.use_pinyin else (lowered,)
+        keys = tuple(key for key in keys if key)
+        self._entries[entry_id] = (room_id, text, keys)
+        entry_ids = self._rooms.setdefault(room_id, [])
+        positions = self._positions.get(room_id)
+        if positions is not None:
+            if position >= len(entry_ids):
+                positions[entry_id] = len(entry_ids)  # 追加到末尾，其他条目的位置不变
+            else:
+                del self._positions[room_id]
+        entry_ids.insert(position, entry_id)
+        for key in keys:
+            for gram in _grams(key):
+                self._postings.setdefault(gram, set()).add(entry_id)
+        self._last = None
+        return entry_id
+
+    def remove(self, room_id, position):
+        """删除直播间弹幕列表中 position 处的弹幕，返回是否删除成功"""
+        entry_ids = self._rooms.get(room_id)
+        if not entry_ids or not 0 <= position < len(entry_ids):
+            return False
+        positions = self._positions.get(room_id)
+        if positions is not None:
+            if position == len(entry_ids) - 1:
+                del positions[entry_ids[position]]
+            else:
+                del self._positions[room_id]
+        self._remove_entry(entry_ids.pop(position))
+        if not entry_ids:
+            del self._rooms[room_id]
+            self._positions.pop(room_id, None)
+        return True
+
+    def remove_room(self, room_id):
+        """删除直播间的所有弹幕"""
+        self._positions.pop(room_id, None)
+        for entry_id in self._rooms.pop(room_id, ()):
+            self._remove_entry(entry_id)
+
+    def set_room(self, room_id, danmus):
+        """用新的弹幕列表替换直播间原有的弹幕"""
+        self.remove_room(room_id)
+        self.extend(room_id, danmus)
+
+    def entry(self, entry_id):
+        """条目对应的 (直播间ID, 弹幕)"""
+        room_id, text, _ = self._entries[entry_id]
+        return room_id, text
+
+    def position(self, entry_id):
+        """条目在其直播间弹幕列表中的位置"""
+        room_id = self._entries[entry_id][0]
+        positions = self._positions.get(room_id)
+        if positions is None:
+            positions = self._positions[room_id] = {e: i for i, e in enumerate(self._rooms[room_id])}
+        return positions[entry_id]
+
+    def search(self, query, room_id=None, limit=None):
+        """搜索包含 query（不区分大小写）的弹幕，返回条目 ID 列表
+
+        指定 room_id 时只搜索该直播间；limit 限制返回的条数（取最早添加的）。
+        """
+        query = query.lower()
+        if not query:
+            return []
+        entries = self._entries
+        last = self._last
+        if len(query) > 2 and last is not None and last[1] == room_id and query.startswith(last[0]):
+            # 在上次的结果中继续过滤：输入越长，候选越少（一两个字时倒排表本身就是精确结果）
+            matches = {entry_id for entry_id in last[2] if any(query in key for key in entries[entry_id][2])}
+        else:
+            matches = self._candidates(query)
+            if len(query) > 2:
+                # 二元组都出现不代表整个查询串出现，需要逐条确认
+                matches = {entry_id for entry_id in matches if any(query in key for key in entries[entry_id][2])}
+            if room_id is not None:
+                room_entries = self._rooms.get(room_id, ())
+                if len(matches) > len(room_entries):
+                    matches = matches.intersection(room_entries)
+                else:
+                    matches = {entry_id for entry_id in matches if entries[entry_id][0] == room_id}
+        self._last = (query, room_id, matches)
+        result = sorted(matches)
+        return result[:limit] if limit is not None else result
+
+    def _candidates(self, query):
+        """可能包含 query 的条目：查询串所有二元组（单字时为该字）倒排表的交集"""
+        grams = (query,) if len(query) == 1 else {query[i:i + 2] for i in range(len(query) - 1)}
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        if len(postings) == 1:
+            return postings[0]  # 只读使用；索引变化时 _last 会被清除，不会留下旧的引用
+        return postings[0].intersection(*postings[1:]) if postings[0] else set()
+
+    def _remove_entry(self, entry_id):
+        _, _, keys = self._entries.pop(entry_id)
+        for key in keys:
+            for gram in _grams(key):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(entry_id)
+                    if not posting:
+                        del self._postings[gram]
+        self._last = None
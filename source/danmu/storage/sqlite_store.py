@@ -0,0 +1,282 @@
+import collections.abc
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id    TEXT PRIMARY KEY,
+    csrf       TEXT NOT NULL DEFAULT '',
+    csrf_token TEXT NOT NULL DEFAULT '',
+    sessdata   TEXT NOT NULL DEFAULT '',
+    extra      TEXT NOT NULL DEFAULT '{}',
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rooms_last_used ON rooms (last_used);
+CREATE TABLE IF NOT EXISTS danmus (
+    room_id  TEXT NOT NULL REFERENCES rooms (room_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text     TEXT NOT NULL,
+    PRIMARY KEY (room_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_CREDENTIAL_KEYS = ("csrf", "csrf_token", "sessdata")
+
+
+class SqliteRoomStore:
+    """用 SQLite 保存直播间、登录凭据和常用弹幕，不限制直播间数量
+
+    直播间按最近使用时间（last_used）建立索引，可以按真正的 LRU 顺序列出；
+    弹幕按 (room_id, position) 存储，只在需要时按房间读取。
+    界面线程读取、配置写入线程写入，所有操作由同一把锁串行化。
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def migrate(self, common_rooms):
+        """从 config.txt 的 common_rooms 一次性导入数据，已导入过时直接返回 False"""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+            if row is not None:
+                return False
+            with self._db:
+                now = time.time()
+                count = len(common_rooms)
+                # 字典中越靠后的直播间越近使用过
+                for i, (room_id, room) in enumerate(common_rooms.items()):
+                    self._put_room(room_id, room, now - (count - i))
+                    self._replace_danmus(room_id, room.get("danmus", []))
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)", (str(now),))
+            return True
+
+    def room_ids(self, limit=None, newest_first=False):
+        """按最近使用时间列出直播间ID，默认最久未使用的在前"""
+        with self._lock:
+            order = "DESC" if newest_first else "ASC"
+            sql = f"SELECT room_id FROM rooms ORDER BY last_used {order}"
+            if limit is not None:
+                return [row[0] for row in self._db.execute(sql + " LIMIT ?", (limit,))]
+            return [row[0] for row in self._db.execute(sql)]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+
+    def has_room(self, room_id):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM rooms WHERE room_id = ?", (room_id,)).fetchone() is not None
+
+    def get_room(self, room_id):
+        """读取一个直播间（包括其弹幕列表），不存在时返回 None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT csrf, csrf_token, sessdata, extra FROM rooms WHERE room_id = ?", (room_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            room = json.loads(row[3])
+            room.update(zip(_CREDENTIAL_KEYS, row[:3]))
+            room["danmus"] = self.get_danmus(room_id)
+            return room
+
+    def get_danmus(self, room_id):
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT text FROM danmus WHERE room_id = ? ORDER BY position", (room_id,)
+            )]
+
+    def schedules(self):
+        """有定时弹幕的直播间 {room_id: 定时弹幕列表}，只读取 extra 列"""
+        with self._lock:
+            rows = self._db.execute("SELECT room_id, extra FROM rooms WHERE extra LIKE '%\"schedules\"%'").fetchall()
+        result = {}
+        for room_id, extra in rows:
+            schedules = json.loads(extra).get("schedules")
+            if schedules:
+                result[room_id] = schedules
+        return result
+
+    def put_room(self, room_id, room, danmus_changed=True):
+        """写入直播间；新的直播间标记为最近使用，已有的直播间不改变使用时间（由 touch 更新）"""
+        with self._lock:
+            with self._db:
+                self._put_room(room_id, room, time.time())
+                if danmus_changed:
+                    self._replace_danmus(room_id, room.get("danmus", []))
+
+    def append_danmus(self, room_id, danmus, start):
+        """在弹幕列表末尾追加弹幕，start 为第一条新弹幕的位置"""
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO danmus (room_id, position, text) VALUES (?, ?, ?)",
+                    ((room_id, start + i, text) for i, text in enumerate(danmus)),
+                )
+
+    def touch(self, room_id, when=None):
+        """把直播间标记为最近使用，when 为使用时间，默认为现在"""
+        with self._lock:
+            with self._db:
+                self._db.execute("UPDATE rooms SET last_used = ? WHERE room_id = ?", (when or time.time(), room_id))
+
+    def delete_room(self, room_id):
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM rooms WHERE room_id = ?", (room_id,))
+
+    def _put_room(self, room_id, room, last_used):
+        extra = {k: v for k, v in room.items() if k not in _CREDENTIAL_KEYS and k != "danmus"}
+        self._db.execute(
+            "INSERT INTO rooms (room_id, csrf, csrf_token, sessdata, extra, last_used) VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (room_id) DO UPDATE SET csrf = excluded.csrf, csrf_token = excluded.csrf_token,"
+            " sessdata = excluded.sessdata, extra = excluded.extra",
+            (room_id, room.get("csrf", ""), room.get("csrf_token", ""), room.get("sessdata", ""), json.dumps(extra), last_used),
+        )
+
+    def _replace_danmus(self, room_id, danmus):
+        self._db.execute("DELETE FROM danmus WHERE room_id = ?", (room_id,))
+        self._db.executemany(
+            "INSERT INTO danmus (room_id, position, text) VALUES (?, ?, ?)",
+            ((room_id, i, text) for i, text in enumerate(danmus)),
+        )
+
+
+def _snapshot(room):
+    """直播间内容的快照，用于判断是否需要写回数据库"""
+    fields = tuple(sorted((k, json.dumps(v)) for k, v in room.items() if k != "danmus"))
+    return fields, tuple(room.get("danmus", ()))
+
+
+class RoomsView(collections.abc.MutableMapping):
+    """把 SqliteRoomStore 包装成 config["common_rooms"] 那样的字典
+
+    直播间在第一次访问时才从数据库读取并缓存；界面代码照常修改缓存中的
+    字典，新增、删除和“最近使用”也只记录在内存中，由 sync()（在配置写入线程中调用）
+    一并写回数据库，界面线程不会等待写盘。直播间ID列表（按最近使用排序）在创建时读取一次，
+    之后在内存中维护，遍历、计数和 in 都不查询数据库。
+    """
+
+    def __init__(self, store, legacy=None):
+        self.store = store
+        self.legacy = legacy  # 导入前 config.txt 中的 common_rooms，保存配置时原样写回
+        self._cache = {}      # room_id -> (room, 上次同步时的快照)，快照为 None 表示需要整体写入
+        self._deleted = set()  # 已删除、尚未写回数据库的直播间
+        self._touched = {}    # room_id -> 最近使用时间，尚未写回数据库
+        self._order = dict.fromkeys(store.room_ids())  # 所有直播间ID，最久未使用的在前
+
+    def __getitem__(self, room_id):
+        cached = self._cache.get(room_id)
+        if cached is not None:
+            return cached[0]
+        if room_id not in self._order:
+            raise KeyError(room_id)
+        room = self.store.get_room(room_id)
+        if room is None:
+            raise KeyError(room_id)
+        self._cache[room_id] = (room, _snapshot(room))
+        return room
+
+    def __setitem__(self, room_id, room):
+        room.setdefault("danmus", [])
+        self._deleted.discard(room_id)
+        self._cache[room_id] = (room, None)
+        self._order.pop(room_id, None)
+        self._order[room_id] = None
+        self._touched[room_id] = time.time()
+
+    def __delitem__(self, room_id):
+        if room_id not in self._order:
+            raise KeyError(room_id)
+        del self._order[room_id]
+        self._cache.pop(room_id, None)
+        self._touched.pop(room_id, None)
+        self._deleted.add(room_id)
+
+    def __contains__(self, room_id):
+        return room_id in self._order
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def __len__(self):
+        return len(self._order)
+
+    def __deepcopy__(self, memo):
+        # ConfigStore.save() 复制配置时不复制视图本身，修改由 sync() 从视图中写回数据库
+        return self
+
+    def touch(self, room_id):
+        """把直播间标记为最近使用"""
+        if room_id in self._order:
+            self._order[room_id] = self._order.pop(room_id)
+            self._touched[room_id] = time.time()
+
+    def danmus(self, room_id):
+        """直播间的弹幕列表副本，不把直播间载入缓存"""
+        cached = self._cache.get(room_id)
+        if cached is not None:
+            return list(cached[0]["danmus"])
+        return self.store.get_danmus(room_id) if room_id in self._order else []
+
+    def schedules(self):
+        """有定时弹幕的直播间 {room_id: 定时弹幕列表}，不把直播间载入缓存"""
+        result = {room_id: schedules for room_id, schedules in self.store.schedules().items()
+                  if room_id not in self._deleted and room_id not in self._cache}
+        for room_id, (room, _) in list(self._cache.items()):
+            if room.get("schedules"):
+                result[room_id] = room["schedules"]
+        return result
+
+    def sync(self):
+        """把删除、新增、被修改过的直播间和最近使用时间写回数据库"""
+        deleted = set(self._deleted)
+        for room_id in deleted:
+            self.store.delete_room(room_id)
+        for room_id, (room, old) in list(self._cache.items()):
+            new = _snapshot(room)
+            if new == old:
+                continue
+            if old is None:
+                self.store.put_room(room_id, room)
+            else:
+                old_fields, old_danmus = old
+                new_fields, new_danmus = new
+                if new_fields != old_fields:
+                    self.store.put_room(room_id, room, danmus_changed=False)
+                if new_danmus == old_danmus:
+                    pass
+                elif new_danmus[:len(old_danmus)] == old_danmus:
+                    # 只在末尾追加了弹幕，增量写入
+                    self.store.append_danmus(room_id, new_danmus[len(old_danmus):], len(old_danmus))
+                else:
+                    self.store.put_room(room_id, room)
+            if self._cache.get(room_id, (None,))[0] is room:
+                self._cache[room_id] = (room, new)
+        touched = self._touched.copy()
+        for room_id, when in touched.items():
+            self.store.touch(room_id, when)
+        # 写回期间界面线程可能又有修改，只清除已经写回的记录
+        self._deleted -= deleted
+        for room_id, when in touched.items():
+            if self._touched.get(room_id) == when:
+                del self._touched[room_id]
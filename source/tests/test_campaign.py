@@ -0,0 +1,48 @@
+import datetime
+import unittest
+
+from danmu.core import CronExpression
+
+
+def at(text):
+    return datetime.datetime.fromisoformat(text)
+
+
+class CronExpressionTest(unittest.TestCase):
+    # (表达式, 起始时间, 下一次匹配的时间)
+    CASES = (
+        ("*/15 * * * *", "2026-10-18 09:07:30", "2026-10-18 09:15"),
+        ("0 9 * * *", "2026-10-18 09:00", "2026-10-19 09:00"),             # 严格在 moment 之后
+        ("0 9-17/4 * * 1-5", "2026-10-23 17:30", "2026-10-26 09:00"),      # 周五晚上到下周一
+        ("0 8 * * 0", "2026-10-18 09:00", "2026-10-25 08:00"),             # 0 为星期日
+        ("0 0 1 * *", "2026-12-15 10:00", "2027-01-01 00:00"),             # 跨年
+        ("30 23 31 12 *", "2026-12-31 23:30", "2027-12-31 23:30"),
+        ("0 0 31 * *", "2026-04-01 00:00", "2026-05-31 00:00"),            # 跳过只有 30 天的月份
+        ("0 0 29 2 *", "2026-03-01 00:00", "2028-02-29 00:00"),            # 闰年
+        ("5,10 0 * 3 *", "2026-10-18 00:00", "2027-03-01 00:05"),
+        # 日和星期都有限制时满足其一即可：13 日或星期五
+        ("0 12 13 * 5", "2026-10-18 00:00", "2026-10-23 12:00"),
+        ("0 12 13 * 5", "2026-12-12 00:00", "2026-12-13 12:00"),
+        # 只有一个有限制时按该字段匹配
+        ("0 12 * * 5", "2026-12-12 00:00", "2026-12-18 12:00"),
+        ("0 12 13 * *", "2026-12-14 00:00", "2027-01-13 12:00"),
+    )
+
+    def test_next_after(self):
+        for text, moment, expected in self.CASES:
+            with self.subTest(cron=text, moment=moment):
+                self.assertEqual(CronExpression(text).next_after(at(moment)), at(expected))
+
+    def test_never_matches(self):
+        self.assertIsNone(CronExpression("0 0 30 2 *").next_after(at("2026-10-18 00:00")))
+
+    def test_invalid(self):
+        for text in ("* * * *", "60 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "0 0 * * 7",
+                     "5-1 * * * *", "*/0 * * * *", "a * * * *"):
+            with self.subTest(cron=text):
+                with self.assertRaises(ValueError):
+                    CronExpression(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import socket
+import threading
+import time
+import unittest
+
+from danmu.core import DanmuClient
+
+BODY = b'{"code": 0, "message": "", "data": {}}'
+RESPONSE = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: keep-alive\r\n"
+            b"Content-Length: %d\r\n\r\n%s" % (len(BODY), BODY))
+
+
+class RawServer:
+    """收到完整请求后按 mode 处理的 HTTP 服务器：
+    "drop_second" 在同一条连接上回复第一个请求，收到第二个请求后不回复直接断开；
+    "reply_then_close" 回复后在 close_after 秒后关闭连接（模拟服务器关闭空闲的长连接）
+    """
+
+    def __init__(self, mode, close_after=0.05):
+        self.mode = mode
+        self.close_after = close_after
+        self.requests = 0
+        self.connections = 0
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}/msg/send"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def stop(self):
+        self._sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            data = b""
+            for served in range(2):
+                while b"\r\n\r\n" not in data:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        return
+                    data += chunk
+                head, _, data = data.partition(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                while len(data) < length:
+                    data += conn.recv(65536)
+                data = data[length:]
+                self.requests += 1
+                if self.mode == "drop_second" and served == 1:
+                    return
+                conn.sendall(RESPONSE)
+                if self.mode == "reply_then_close":
+                    time.sleep(self.close_after)
+                    return
+
+
+class ClientRetryTest(unittest.TestCase):
+    def send(self, client):
+        return client.send("5", "测试弹幕", "csrf", "csrf", "sessdata", "#FFFFFF", 25, 1)
+
+    def test_post_not_resent_after_request_reached_server(self):
+        server = RawServer("drop_second")
+        self.addCleanup(server.stop)
+        client = DanmuClient(server.url, timeout=2)
+        self.addCleanup(client.close)
+        self.assertTrue(self.send(client).ok)
+        # 复用的连接上请求已经发出，服务器没有回复就断开：不能换连接重发，否则可能发出两条弹幕
+        with self.assertRaises(OSError):
+            self.send(client)
+        time.sleep(0.05)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(server.connections, 1)
+
+    def test_idle_connection_closed_by_server_is_replaced(self):
+        server = RawServer("reply_then_close", close_after=0.05)
+        self.addCleanup(server.stop)
+        client = DanmuClient(server.url, timeout=2)
+        self.addCleanup(client.close)
+        self.assertTrue(self.send(client).ok)
+        time.sleep(0.2)  # 服务器已关闭这条空闲连接
+        self.assertTrue(self.send(client).ok)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(server.connections, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
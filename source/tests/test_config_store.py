@@ -0,0 +1,69 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from danmu.storage import ConfigStore
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class ConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "config.txt")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_writes_snapshot_taken_at_save(self):
+        store = ConfigStore(self.path, delay=0.05)
+        config = {"rooms": ["a"]}
+        store.save(config)
+        config["rooms"].append("b")  # 没有再次 save()，不应写入
+        store.close()
+        self.assertEqual(read_json(self.path), {"rooms": ["a"]})
+
+    def test_writer_survives_errors_from_before_write(self):
+        failures = []
+
+        def before_write(config):
+            if not failures:
+                failures.append(config)
+                raise sqlite3.OperationalError("database is locked")
+            return config
+
+        store = ConfigStore(self.path, delay=0.05, before_write=before_write)
+        with self.assertLogs("danmu.storage.config_store", "ERROR"):
+            store.save({"n": 1})
+            self.assertTrue(wait_for(lambda: os.path.exists(self.path)))
+        self.assertEqual(read_json(self.path), {"n": 1})
+        # 写入线程仍在运行，之后的保存照常写入
+        store.save({"n": 2})
+        self.assertTrue(wait_for(lambda: read_json(self.path) == {"n": 2}))
+        store.close()
+
+    def test_writer_survives_unserializable_config(self):
+        store = ConfigStore(self.path, delay=0.05)
+        with self.assertLogs("danmu.storage.config_store", "ERROR"):
+            store.save({"bad": object()})
+            time.sleep(0.2)
+        store.save({"ok": True})
+        self.assertTrue(wait_for(lambda: os.path.exists(self.path) and read_json(self.path) == {"ok": True}))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
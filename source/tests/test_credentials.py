@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+
+from danmu.core import CredentialError, CredentialManager, DanmuClient, SendEngine, SenderJob
+from danmu.core.result import CODE_NOT_LOGGED_IN
+from danmu.mockserver import MockLiveServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CredentialManagerTest(unittest.TestCase):
+    """用模拟接口的 nav 检查凭据：缓存、合并并发检查和 -101 后失效"""
+
+    def setUp(self):
+        self.server = MockLiveServer(invalid_sessdata=["expired"], user_level=4).start()
+        self.addCleanup(self.server.stop)
+        self.clock = FakeClock()
+        self.credentials = CredentialManager(self.server.nav_url, ttl=60, retry_ttl=5, clock=self.clock)
+        self.addCleanup(self.credentials.close)
+
+    def nav_checks(self):
+        return self.server.stats()["nav_checks"]
+
+    def test_valid_and_cached(self):
+        status = self.credentials.check("good")
+        self.assertTrue(status.valid)
+        self.assertEqual((status.uname, status.level), ("mock-good", 4))
+        self.assertIs(self.credentials.check("good"), status)
+        self.assertIs(self.credentials.require("good"), status)
+        self.assertEqual((self.credentials.requests, self.credentials.hits, self.nav_checks()), (1, 2, 1))
+
+    def test_invalid_raises_and_is_cached(self):
+        with self.assertRaises(CredentialError):
+            self.credentials.require("expired")
+        self.assertEqual(self.credentials.check("expired").code, CODE_NOT_LOGGED_IN)
+        self.assertFalse(self.credentials.check("").valid)  # 没有 SESSDATA 时不发请求
+        self.assertEqual(self.nav_checks(), 1)
+
+    def test_concurrent_checks_make_one_request(self):
+        self.server.latency = 0.2
+        barrier = threading.Barrier(5)
+        results = []
+
+        def check():
+            barrier.wait()
+            results.append(self.credentials.check("good"))
+
+        threads = [threading.Thread(target=check) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(status is results[0] for status in results))
+        self.assertEqual((self.credentials.requests, self.credentials.hits, self.nav_checks()), (1, 4, 1))
+
+    def test_expired_ttl_checks_again(self):
+        first = self.credentials.check("good")
+        self.clock.now += 59
+        self.assertIs(self.credentials.check("good"), first)
+        self.clock.now += 1
+        self.assertIsNot(self.credentials.check("good"), first)
+        self.assertEqual(self.nav_checks(), 2)
+        self.credentials.check("good", force=True)
+        self.assertEqual(self.nav_checks(), 3)
+
+    def test_unknown_result_uses_retry_ttl(self):
+        # 接口返回的不是登录状态（这里是 404）时无法确定，只缓存 retry_ttl 秒，也不阻止发送
+        credentials = CredentialManager(self.server.nav_url + "/missing", ttl=60, retry_ttl=5, clock=self.clock)
+        self.addCleanup(credentials.close)
+        self.assertIsNone(credentials.require("good").valid)
+        self.clock.now += 4
+        credentials.check("good")
+        self.assertEqual(credentials.requests, 1)
+        self.clock.now += 1
+        credentials.check("good")
+        self.assertEqual(credentials.requests, 2)
+
+    def test_forget(self):
+        self.credentials.check("good")
+        self.credentials.check("other")
+        self.credentials.forget("good")
+        self.assertIsNone(self.credentials.cached("good"))
+        self.assertIsNotNone(self.credentials.cached("other"))
+        self.credentials.forget()
+        self.assertIsNone(self.credentials.cached("other"))
+
+    def test_not_logged_in_send_invalidates_cache(self):
+        self.assertTrue(self.credentials.check("good").valid)
+        self.server.invalid_sessdata.add("good")  # 凭据在检查之后失效
+        engine = SendEngine()
+        self.addCleanup(engine.shutdown)
+        client = DanmuClient(self.server.url)
+        self.addCleanup(client.close)
+        job = SenderJob("5", "csrf", "csrf", "good", ["a"], interval=0.05, play_mode="sequential",
+                        engine=engine, client=client, credentials=self.credentials)
+        job.start()
+        deadline = time.monotonic() + 5
+        while job.running and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(job.running)
+        status = self.credentials.cached("good")
+        self.assertFalse(status.valid)
+        self.assertEqual(status.code, CODE_NOT_LOGGED_IN)
+        self.assertEqual(self.nav_checks(), 1)  # 其他直播间不用重新检查就知道凭据无效
+        with self.assertRaises(CredentialError):
+            SenderJob("6", "csrf", "csrf", "good", ["a"], engine=engine, client=client,
+                      credentials=self.credentials).start()
+        self.assertEqual(self.nav_checks(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
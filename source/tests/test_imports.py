@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from danmu.cli import IMPORT_BUDGET, measure_import_time
+
+
+class ImportBudgetTest(unittest.TestCase):
+    def test_cli_import_within_budget_without_gui(self):
+        # 每次都在新的解释器中导入；取三次中最快的一次，避免偶尔的系统抖动导致失败
+        results = [measure_import_time() for _ in range(3)]
+        elapsed = min(seconds for seconds, _ in results)
+        self.assertLessEqual(elapsed, IMPORT_BUDGET, f"import danmu.cli 耗时 {elapsed * 1000:.1f} ms")
+        for _, gui_loaded in results:
+            self.assertFalse(gui_loaded, "import danmu.cli 导入了 tkinter 或 PIL")
+
+    def test_walking_package_names_does_not_import_gui(self):
+        # unittest 的测试发现等工具会对 dir(danmu) 中的每个名称调用 getattr
+        code = (
+            "import sys, danmu\n"
+            "[getattr(danmu, name) for name in dir(danmu)]\n"
+            "print(int('tkinter' in sys.modules or 'PIL' in sys.modules))\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
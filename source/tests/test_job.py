@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+
+from danmu.core import DanmuClient, MessageError, SendEngine, SenderJob
+from danmu.mockserver import MockLiveServer
+
+
+class SenderJobCountTest(unittest.TestCase):
+    def test_count_not_exceeded_with_sends_in_flight(self):
+        # 请求耗时远大于发送间隔，同一任务同时有多个请求在进行
+        with MockLiveServer(latency=0.3) as server:
+            engine = SendEngine()
+            client = DanmuClient(server.url)
+            try:
+                job = SenderJob("5", "csrf", "csrf", "sessdata", ["a", "b"], interval=0.05, play_mode="sequential",
+                                count=3, engine=engine, client=client)
+                job.start()
+                deadline = time.monotonic() + 5
+                while job.running and time.monotonic() < deadline:
+                    time.sleep(0.02)
+                self.assertFalse(job.running)
+                time.sleep(0.4)  # 等可能还在进行的请求完成
+                self.assertEqual(server.stats()["received"], 3)
+                self.assertEqual(job.sent, 3)
+            finally:
+                engine.shutdown()
+                client.close()
+
+
+class SendEngineShutdownTest(unittest.TestCase):
+    def test_stop_from_send_thread_during_shutdown(self):
+        # 任务最后一次发送完成时在发送线程里调用 stop，此时 shutdown 可能已经停止了事件循环
+        engine = SendEngine()
+        entered, release = threading.Event(), threading.Event()
+        stopped = []
+
+        def send():
+            if not entered.is_set():
+                entered.set()
+                release.wait(5)
+                stopped.append(engine.stop("job"))
+
+        engine.submit("job", send, 0.01)
+        self.assertTrue(entered.wait(5))
+        closer = threading.Thread(target=engine.shutdown, kwargs={"wait": True}, daemon=True)
+        closer.start()
+        time.sleep(0.1)
+        release.set()
+        closer.join(5)
+        self.assertFalse(closer.is_alive())
+        self.assertEqual(stopped, [False])
+
+
+class SenderJobPushTest(unittest.TestCase):
+    def test_push_rejected_when_pending_full(self):
+        engine = SendEngine()
+        self.addCleanup(engine.shutdown)
+        job = SenderJob("5", "csrf", "csrf", "sessdata", ["a"], interval=1, play_mode="sequential", engine=engine)
+        job.playlist.maxlen = 1
+        job.push("插播")
+        with self.assertLogs("danmu.core.playlist", "WARNING"), self.assertRaises(MessageError):
+            job.push("放不下")
+        self.assertEqual(job.playlist.next(), "插播")
+
+
+if __name__ == "__main__":
+    unittest.main()
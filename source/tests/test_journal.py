@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from danmu.core.journal import ResumePoint, SendJournal, decode_record, encode_record, read_segment
+
+
+def fake_job(room_id="5", play_mode="sequential", messages=("a", "b", "c"), count=0):
+    playlist = SimpleNamespace(position=0, messages=list(messages))
+    return SimpleNamespace(room_id=room_id, play_mode=play_mode, interval=1.0, count=count, playlist=playlist, sent=0)
+
+
+def fake_result(ok=True, code=0, message="", fatal=False):
+    return SimpleNamespace(ok=ok, code=code, message=message, fatal=fatal)
+
+
+def send(journal, job, count):
+    """模拟任务发送 count 条弹幕，与 SenderJob._send_next 的调用顺序相同"""
+    for _ in range(count):
+        message = job.playlist.messages[job.playlist.position % len(job.playlist.messages)]
+        job.playlist.position += 1
+        journal.sending(job, message, job.playlist.position)
+        job.sent += 1
+        journal.finished(job, message, fake_result())
+
+
+class RecordTest(unittest.TestCase):
+    def test_round_trip(self):
+        record = {"kind": "send", "room": "5", "msg": "你好"}
+        line = encode_record(record)
+        self.assertTrue(line.endswith("\n"))
+        self.assertEqual(decode_record(line), record)
+
+    def test_rejects_damaged_lines(self):
+        line = encode_record({"kind": "send", "msg": "abc"})
+        self.assertIsNone(decode_record(line[:-1]))                     # 没有写完换行
+        self.assertIsNone(decode_record(line[:20] + "\n"))              # 写到一半
+        self.assertIsNone(decode_record(line.replace("abc", "abd")))    # CRC 不符
+        self.assertIsNone(decode_record("zzzzzzzz " + line[9:]))
+
+
+class SendJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = self.dir.name
+
+    def open(self, **kwargs):
+        kwargs.setdefault("flush_interval", 0.01)
+        kwargs.setdefault("fsync", False)
+        journal = SendJournal(self.path, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def segments(self):
+        return sorted(name for name in os.listdir(self.path) if name.endswith(".log"))
+
+    def last_segment(self):
+        return os.path.join(self.path, self.segments()[-1])
+
+    def write_crashed_run(self, count=4):
+        """写入一个发送了 count 条、没有正常停止的任务，返回最后一个日志文件"""
+        journal = self.open()
+        job = fake_job()
+        journal.started(job)
+        send(journal, job, count)
+        journal.close()  # 不记录停止，相当于进程在这里崩溃
+        return self.last_segment()
+
+    def test_resume_after_crash(self):
+        self.write_crashed_run(4)
+        point = self.open().resume_point("5")
+        self.assertEqual((point.position, point.sent, point.play_mode), (4, 4, "sequential"))
+
+    def test_torn_tail_is_truncated(self):
+        path = self.write_crashed_run(4)
+        valid = os.path.getsize(path)
+        torn = encode_record({"kind": "send", "room": "5", "msg": "a", "pos": 5, "sent": 5})
+        with open(path, "ab") as file:
+            file.write(torn[:len(torn) // 2].encode("utf-8"))
+        with self.assertLogs("danmu.core.journal", "WARNING"):
+            journal = self.open()
+        self.assertEqual(os.path.getsize(path), valid)
+        self.assertEqual(journal.resume_point("5").position, 4)
+
+    def test_corrupt_last_record_is_dropped(self):
+        path = self.write_crashed_run(4)
+        with open(path, "rb") as file:
+            lines = file.readlines()
+        # 最后两行是第 4 条的 send 和 result；把 send 行改坏，之后的行也不再读取
+        damaged = lines[-2].replace(b'"pos":4', b'"pos":9')
+        with open(path, "wb") as file:
+            file.writelines(lines[:-2] + [damaged, lines[-1]])
+        with self.assertLogs("danmu.core.journal", "WARNING"):
+            journal = self.open()
+        point = journal.resume_point("5")
+        self.assertEqual((point.position, point.sent), (3, 3))
+        self.assertEqual(len(read_segment(path)[0]), len(lines) - 2)
+        self.assertEqual(len(journal.history()), 3)
+
+    def test_stopped_and_finished_jobs_are_not_resumed(self):
+        journal = self.open()
+        stopped, finished = fake_job("1"), fake_job("2", count=2)
+        journal.started(stopped)
+        journal.started(finished)
+        send(journal, stopped, 1)
+        send(journal, finished, 2)
+        journal.stopped(stopped)
+        journal.close()
+        self.assertEqual(self.open().unfinished(), {})
+
+    def test_fatal_result_ends_job(self):
+        journal = self.open()
+        job = fake_job()
+        journal.started(job)
+        journal.sending(job, "a", 1)
+        journal.finished(job, "a", fake_result(False, -101, "账号未登录", fatal=True))
+        journal.close()
+        self.assertIsNone(self.open().resume_point("5"))
+
+    def test_single_mode_messages(self):
+        journal = self.open()
+        journal.started(fake_job(play_mode="single", messages=["第一行", "第二行"]))
+        journal.close()
+        self.assertEqual(self.open().resume_point("5").messages, ["第一行", "第二行"])
+        # 旧版本只记录了 message
+        point = ResumePoint.from_start({"kind": "start", "room": "5", "message": "旧弹幕"})
+        self.assertEqual(point.messages, ["旧弹幕"])
+
+    def test_rotation_keeps_all_results(self):
+        journal = self.open(segment_size=300, compact_after=100)
+        job = fake_job()
+        journal.started(job)
+        for _ in range(10):
+            send(journal, job, 1)
+            journal.flush()
+        journal.close()
+        self.assertGreater(len(self.segments()), 3)
+        journal = self.open()
+        self.assertEqual([record["msg"] for record in journal.iter_results()], list("abcabcabca"))
+        self.assertEqual(journal.resume_point("5").position, 10)
+
+    def test_compaction_on_open_bounds_segments(self):
+        for i in range(12):
+            journal = self.open(compact_after=3)
+            job = fake_job()
+            if i == 0:
+                journal.started(job)
+            else:
+                job.sent = job.playlist.position = i
+            send(journal, job, 1)
+            journal.close()
+        self.assertLessEqual(len(self.segments()), 5)
+        journal = self.open(compact_after=3)
+        point = journal.resume_point("5")
+        self.assertEqual((point.position, point.sent), (12, 12))
+        self.assertEqual(len(list(journal.iter_results())), 12)
+
+    def test_export(self):
+        journal = self.open()
+        job = fake_job()
+        journal.started(job)
+        send(journal, job, 2)
+        journal.sending(job, "c", 3)
+        journal.finished(job, "c", fake_result(False, 10030, "发送过快"))
+        jsonl = os.path.join(self.path, "history.jsonl")
+        self.assertEqual(journal.export(jsonl), 3)
+        with open(jsonl, encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([(r["msg"], r["ok"], r["code"]) for r in records], [("a", True, 0), ("b", True, 0), ("c", False, 10030)])
+        path = os.path.join(self.path, "history.csv")
+        self.assertEqual(journal.export(path, room_id="5"), 3)
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], ["时间", "直播间", "弹幕", "成功", "错误码", "说明"])
+        self.assertEqual(rows[3][1:], ["5", "c", "0", "10030", "发送过快"])
+        self.assertFalse(os.path.exists(path + ".tmp"))
+        with self.assertRaises(ValueError):
+            journal.export(os.path.join(self.path, "history.xml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from danmu.storage import read_danmus, write_danmus
+
+
+class LibraryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def write_file(self, name, text, encoding="utf-8"):
+        path = self.path(name)
+        with open(path, "w", encoding=encoding, newline="") as file:
+            file.write(text)
+        return path
+
+    def test_txt(self):
+        path = self.write_file("a.txt", "第一条\r\n\n  第二条  \n第一条\n已有\n", encoding="utf-8-sig")
+        result = read_danmus(path, existing=["已有"])
+        self.assertEqual(result.danmus, ["第一条", "第二条"])
+        self.assertEqual((result.empty, result.duplicates, result.skipped), (1, 2, 3))
+
+    def test_csv_skips_header_and_extra_columns(self):
+        path = self.write_file("a.csv", '弹幕,备注\n"含,逗号",x\n第二条\n\n')
+        result = read_danmus(path)
+        self.assertEqual(result.danmus, ["含,逗号", "第二条"])
+        self.assertEqual(result.empty, 1)
+
+    def test_csv_without_header(self):
+        path = self.write_file("a.csv", "第一条\n第二条\n")
+        self.assertEqual(read_danmus(path).danmus, ["第一条", "第二条"])
+
+    def test_jsonl(self):
+        path = self.write_file("a.jsonl", '"字符串"\n{"text": "对象"}\n{"msg": "msg 字段"}\n{"other": 1}\n不是 JSON\n123\n\n')
+        result = read_danmus(path)
+        self.assertEqual(result.danmus, ["字符串", "对象", "msg 字段"])
+        self.assertEqual((result.invalid, result.empty), (3, 1))
+        self.assertIn("无法解析 3 条", result.summary())
+
+    def test_length_limit_follows_account_level(self):
+        path = self.write_file("a.txt", "\n".join(("短", "长" * 21, "长" * 31, "长" * 41)) + "\n")
+        for level, count in ((None, 1), (0, 1), (2, 1), (3, 2), (4, 2), (5, 3), (6, 3)):
+            with self.subTest(level=level):
+                result = read_danmus(path, level=level)
+                self.assertEqual(len(result.danmus), count)
+                self.assertEqual(result.too_long, 4 - count)
+        self.assertEqual(len(read_danmus(path, max_length=100).danmus), 4)
+
+    def test_write_and_read_back(self):
+        danmus = ["第一条", "含,逗号", '含"引号']
+        for fmt in ("txt", "csv", "jsonl"):
+            with self.subTest(fmt=fmt):
+                path = self.path(f"out.{fmt}")
+                self.assertEqual(write_danmus(path, danmus), 3)
+                self.assertEqual(read_danmus(path).danmus, danmus)
+                self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_txt_export_joins_lines(self):
+        path = self.path("out.txt")
+        write_danmus(path, ["两\n行"])
+        self.assertEqual(read_danmus(path).danmus, ["两 行"])
+
+    def test_failed_write_leaves_no_files(self):
+        def danmus():
+            yield "第一条"
+            raise OSError("磁盘已满")
+
+        path = self.path("out.jsonl")
+        with self.assertRaises(OSError):
+            write_danmus(path, danmus())
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            write_danmus(self.path("out.txt"), [], fmt="xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
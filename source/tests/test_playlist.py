@@ -0,0 +1,92 @@
+import random
+import unittest
+from collections import Counter
+
+from danmu.core.playlist import SEQUENTIAL, SHUFFLE, WEIGHTED, Playlist, _weighted_order
+
+
+def take(playlist, count):
+    return [playlist.next() for _ in range(count)]
+
+
+class PlaylistTest(unittest.TestCase):
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Playlist(["a"], "random")
+
+    def test_empty_list(self):
+        for mode in (SEQUENTIAL, SHUFFLE, WEIGHTED):
+            with self.subTest(mode=mode):
+                playlist = Playlist([], mode)
+                self.assertIsNone(playlist.next())
+                self.assertEqual(list(playlist), [])
+
+    def test_sequential(self):
+        playlist = Playlist(["a", "b", "c"])
+        self.assertEqual(take(playlist, 7), list("abcabca"))
+        self.assertEqual(playlist.position, 1)
+        playlist.seek(2)
+        self.assertEqual(take(playlist, 2), ["c", "a"])
+
+    def test_sequential_follows_list_changes(self):
+        messages = ["a", "b"]
+        playlist = Playlist(messages)
+        self.assertEqual(take(playlist, 2), ["a", "b"])
+        messages.append("c")
+        self.assertEqual(take(playlist, 2), ["c", "a"])
+        del messages[1:]
+        self.assertEqual(take(playlist, 2), ["a", "a"])
+
+    def test_shuffle_each_round_is_permutation(self):
+        playlist = Playlist(list("abcde"), SHUFFLE, rng=random.Random(1))
+        rounds = [take(playlist, 5) for _ in range(4)]
+        for sent in rounds:
+            self.assertEqual(sorted(sent), list("abcde"))
+        self.assertGreater(len({tuple(sent) for sent in rounds}), 1)
+
+    def test_shuffle_rebuilds_when_list_changes(self):
+        messages = ["a", "b", "c"]
+        playlist = Playlist(messages, SHUFFLE, rng=random.Random(2))
+        take(playlist, 1)
+        messages.append("d")
+        # 列表长度变化后按新列表重新打乱，当前这一轮从原来的位置继续
+        self.assertEqual(len(set(take(playlist, 3))), 3)
+        self.assertEqual(sorted(take(playlist, 4)), list("abcd"))
+
+    def test_weighted_interleaves(self):
+        playlist = Playlist(["a", "b"], WEIGHTED, weights=[3, 1])
+        self.assertEqual(take(playlist, 8), list("aabaaaba"))
+
+    def test_weighted_counts_and_defaults(self):
+        # 缺少的权重按 1 计算，负数按 0
+        playlist = Playlist(["a", "b", "c", "d"], WEIGHTED, weights=[4, 2, -1])
+        self.assertEqual(Counter(take(playlist, 7)), {"a": 4, "b": 2, "d": 1})
+
+    def test_weighted_all_zero_sends_every_message(self):
+        playlist = Playlist(["a", "b"], WEIGHTED, weights=[0, 0])
+        self.assertEqual(take(playlist, 4), list("abab"))
+
+    def test_weighted_order_reduced_by_gcd(self):
+        self.assertEqual(_weighted_order([60, 30, 10]), _weighted_order([6, 3, 1]))
+        self.assertEqual(len(_weighted_order([10 ** 6, 2 * 10 ** 6])), 3)
+        self.assertEqual(_weighted_order([0, 5]), [1])
+
+    def test_pending_sent_first(self):
+        playlist = Playlist(["a", "b"])
+        self.assertTrue(playlist.push("x"))
+        self.assertTrue(playlist.push("y"))
+        self.assertEqual(playlist.pending, 2)
+        self.assertEqual(take(playlist, 4), ["x", "y", "a", "b"])
+
+    def test_full_pending_rejects_push(self):
+        playlist = Playlist(["a"], maxlen=2)
+        self.assertTrue(playlist.push("x"))
+        self.assertTrue(playlist.push("y"))
+        with self.assertLogs("danmu.core.playlist", "WARNING"):
+            self.assertFalse(playlist.push("z"))
+        self.assertEqual(take(playlist, 3), ["x", "y", "a"])  # 已经插播的弹幕没有被挤掉
+        self.assertTrue(playlist.push("z"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from danmu.core import DanmuClient, Profiler, SendEngine, SenderJob, profiling
+from danmu.mockserver import MockLiveServer
+
+
+class CProfileJobTest(unittest.TestCase):
+    """cProfile 模式下运行发送任务：发送不受影响，结果写入 .prof 文件"""
+
+    def run_job(self):
+        with MockLiveServer() as server, tempfile.TemporaryDirectory() as output_dir:
+            engine = SendEngine()
+            client = DanmuClient(server.url)
+            profiler = Profiler("cprofile", output_dir).start()
+            try:
+                job = SenderJob("5", "csrf", "csrf", "sessdata", ["a", "b"], interval=0.05, play_mode="sequential",
+                                count=3, engine=engine, client=client)
+                job.start()
+                deadline = time.monotonic() + 5
+                while job.running and time.monotonic() < deadline:
+                    time.sleep(0.02)
+            finally:
+                profiler.stop()
+                engine.shutdown(wait=True)  # 最后一次发送的结果在任务停止后才记录
+                client.close()
+            paths = profiler.write()
+            self.assertTrue(any(path.endswith(".prof") and os.path.getsize(path) for path in paths))
+            self.assertEqual(server.stats()["received"], 3)
+            metrics = job.metrics()
+            self.assertEqual(metrics["succeeded"], 3)
+            self.assertEqual(metrics["failed"], 0)
+        self.assertIsNone(profiling.active)
+
+    def test_job_under_cprofile(self):
+        self.run_job()
+
+    def test_job_under_process_wide_cprofile(self):
+        # Python 3.12 起的行为：只有 start() 启用的分析器，发送线程不再单独启用
+        with mock.patch.object(profiling, "PER_THREAD", False):
+            self.run_job()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+
+from danmu.core import DanmuClient, RateController, SendEngine, SenderJob
+from danmu.core.result import CODE_NOT_LOGGED_IN, CODE_OK, CODE_REPEATED, CODE_TOO_FAST
+from danmu.mockserver import MockLiveServer
+
+INVALID_SESSDATA = "expired"
+
+
+class MockEndpointTest(unittest.TestCase):
+    """用本地模拟接口返回各种错误码，检查 SendResult.parse 的解析和 RateController 的调整"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockLiveServer(invalid_sessdata=[INVALID_SESSDATA]).start()
+        cls.client = DanmuClient(cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.reset()
+
+    def send(self, sessdata="valid"):
+        return self.client.send("5", "测试弹幕", "csrf", "csrf", sessdata, "#FFFFFF", 25, 1)
+
+    def test_success(self):
+        result = self.send()
+        self.assertEqual(result.code, CODE_OK)
+        self.assertEqual(result.http_status, 200)
+        self.assertTrue(result.ok)
+        self.assertFalse(result.fatal or result.rate_limited or result.filtered)
+        controller = RateController(1.0)
+        self.assertEqual(controller.observe(result), 1.0)
+
+    def test_rate_limit_codes_back_off(self):
+        self.server.push_codes(CODE_TOO_FAST, CODE_REPEATED)
+        controller = RateController(1.0)
+        intervals = []
+        for code in (CODE_TOO_FAST, CODE_REPEATED):
+            result = self.send()
+            self.assertEqual(result.code, code)
+            self.assertTrue(result.rate_limited)
+            self.assertFalse(result.ok or result.fatal)
+            intervals.append(controller.observe(result))
+        self.assertEqual(intervals, [2.0, 4.0])
+        self.assertEqual(controller.consecutive_failures, 2)
+        self.assertFalse(controller.stopped)
+
+    def test_recovers_after_successes(self):
+        self.server.push_codes(CODE_TOO_FAST, CODE_TOO_FAST, CODE_TOO_FAST)
+        controller = RateController(1.0)
+        for _ in range(3):
+            controller.observe(self.send())
+        self.assertEqual(controller.interval, 8.0)
+        intervals = [controller.observe(self.send()) for _ in range(25)]
+        # 成功后逐步回落，不会一次回到基础间隔，最终停在基础间隔
+        self.assertLess(intervals[0], 8.0)
+        self.assertGreater(intervals[0], 4.0)
+        self.assertEqual(intervals, sorted(intervals, reverse=True))
+        self.assertEqual(intervals[-1], 1.0)
+        self.assertEqual(controller.consecutive_failures, 0)
+
+    def test_not_logged_in_is_fatal(self):
+        result = self.send(INVALID_SESSDATA)
+        self.assertEqual(result.code, CODE_NOT_LOGGED_IN)
+        self.assertTrue(result.fatal)
+        controller = RateController(1.0)
+        controller.observe(result)
+        self.assertTrue(controller.stopped)
+        self.assertIn(str(CODE_NOT_LOGGED_IN), controller.stop_reason)
+
+    def test_fatal_code_stops_running_job(self):
+        engine = SendEngine()
+        try:
+            job = SenderJob("5", "csrf", "csrf", INVALID_SESSDATA, ["测试弹幕"], interval=0.05,
+                            play_mode="sequential", engine=engine, client=self.client)
+            job.start()
+            deadline = time.monotonic() + 5
+            while job.running and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertFalse(job.running)
+            self.assertTrue(job.controller.stopped)
+            # 每个任务最多同时有 2 个请求，停止后不再发送
+            sent = self.server.stats()["received"]
+            self.assertLessEqual(sent, engine.max_in_flight)
+            time.sleep(0.2)
+            self.assertEqual(self.server.stats()["received"], sent)
+        finally:
+            engine.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from danmu.core.receiver import (OP_HEARTBEAT_REPLY, OP_MESSAGE, PROTO_BROTLI, PROTO_ZLIB, DanmuReceiver, DeliveryTracker,
+                                 brotli, encode_batch, encode_danmu, encode_packet, iter_packets)
+from danmu.replayserver import Recorder, ReplayServer, load_recording, synthetic_frames
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Collector:
+    """作为 on_danmu 回调，记录收到的弹幕"""
+
+    def __init__(self, tracker=None):
+        self.danmus = []
+        self.tracker = tracker
+
+    def __call__(self, room_id, message, uid, uname, timestamp):
+        self.danmus.append((room_id, message, uid, uname))
+        if self.tracker is not None:
+            self.tracker.received(room_id, message, uid, uname, timestamp)
+
+
+class DecodeTest(unittest.TestCase):
+    """不经过网络，直接解码各种消息"""
+
+    def decode(self, data):
+        collector = Collector()
+        receiver = DanmuReceiver("5", on_danmu=collector)
+        receiver.handle_message(data)
+        return receiver, [message for _, message, _, _ in collector.danmus]
+
+    def test_plain_packet(self):
+        receiver, danmus = self.decode(encode_danmu("你好", uid=7, uname="观众"))
+        self.assertEqual(danmus, ["你好"])
+        self.assertEqual((receiver.packets, receiver.danmus), (1, 1))
+
+    def test_other_commands_are_skipped(self):
+        other = encode_packet(OP_MESSAGE, json.dumps({"cmd": "INTERACT_WORD", "data": {}}), 0)
+        receiver, danmus = self.decode(encode_batch([other, encode_danmu("a"), other]))
+        self.assertEqual(danmus, ["a"])
+        self.assertEqual((receiver.packets, receiver.danmus), (3, 1))
+
+    def test_zlib_batch_inside_one_frame(self):
+        # 一个 WebSocket 消息里有多个数据包，其中包括压缩的批量数据包
+        data = encode_danmu("第一条") + encode_batch([encode_danmu(f"批量 {i}") for i in range(3)], PROTO_ZLIB)
+        _, danmus = self.decode(bytearray(data))
+        self.assertEqual(danmus, ["第一条", "批量 0", "批量 1", "批量 2"])
+
+    @unittest.skipIf(brotli is None, "没有安装 brotli")
+    def test_brotli_batch(self):
+        _, danmus = self.decode(encode_batch([encode_danmu("x"), encode_danmu("y")], PROTO_BROTLI))
+        self.assertEqual(danmus, ["x", "y"])
+
+    @unittest.skipIf(brotli is not None, "已安装 brotli")
+    def test_brotli_batch_skipped_without_brotli(self):
+        data = encode_packet(OP_MESSAGE, b"\x0b\x00\x80", PROTO_BROTLI) + encode_danmu("z")
+        with self.assertLogs("danmu.core.receiver", "WARNING"):
+            _, danmus = self.decode(data)
+        self.assertEqual(danmus, ["z"])
+
+    def test_heartbeat_reply_sets_popularity(self):
+        receiver, _ = self.decode(encode_packet(OP_HEARTBEAT_REPLY, (1234).to_bytes(4, "big")))
+        self.assertEqual(receiver.popularity, 1234)
+
+    def test_truncated_packet_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(iter_packets(encode_danmu("abc")[:-1]))
+
+
+class DeliveryTrackerTest(unittest.TestCase):
+    def test_matches_in_send_order_and_expires(self):
+        clock = FakeClock()
+        tracker = DeliveryTracker(timeout=10, clock=clock)
+        tracker.expect("5", "a")
+        clock.now += 1
+        tracker.expect("5", "a")
+        tracker.expect("5", "b")
+        clock.now += 2
+        self.assertEqual(tracker.received("5", "a"), 3.0)   # 先配对最早发出的一条
+        self.assertEqual(tracker.received("5", "a"), 2.0)
+        self.assertIsNone(tracker.received("5", "a"))
+        self.assertIsNone(tracker.received("6", "b"))       # 其他直播间的同一弹幕
+        clock.now += 20
+        self.assertEqual(tracker.expire(), 1)
+        summary = tracker.snapshot()
+        self.assertEqual((summary["delivered"], summary["lost"], summary["pending"]), (2, 1, 0))
+
+    def test_only_own_uid(self):
+        tracker = DeliveryTracker(uid=42, clock=FakeClock())
+        tracker.expect("5", "a")
+        self.assertIsNone(tracker.received("5", "a", uid=7))
+        self.assertEqual(tracker.received("5", "a", uid=42), 0.0)
+
+
+class ReplayTest(unittest.TestCase):
+    """从本地回放的信息流接收弹幕"""
+
+    def receive(self, server, collector):
+        receiver = DanmuReceiver("5", on_danmu=collector, url=server.url, reconnect_delay=0.1)
+        receiver.start()
+        self.addCleanup(receiver.stop)
+        self.assertTrue(receiver.connected.wait(5))
+        return receiver
+
+    def test_replays_recording(self):
+        frames = synthetic_frames(25, batch=10) + [(0.0, encode_danmu("最后一条", uid=3, uname="观众"))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "room.jsonl")
+            recorder = Recorder(path)
+            for _, data in frames:
+                recorder(data)
+            recorder.close()
+            recording = load_recording(path)
+        self.assertEqual([data for _, data in recording], [data for _, data in frames])
+
+        collector = Collector()
+        with ReplayServer(recording, speed=100, popularity=99) as server:
+            receiver = self.receive(server, collector)
+            self.assertTrue(wait_for(lambda: receiver.danmus >= 26))
+            self.assertTrue(wait_for(lambda: receiver.popularity == 99))
+        self.assertEqual([message for _, message, _, _ in collector.danmus],
+                         [f"测试弹幕 {i}" for i in range(25)] + ["最后一条"])
+        self.assertEqual(collector.danmus[-1], ("5", "最后一条", 3, "观众"))
+        self.assertEqual(server.auth[0]["roomid"], 5)
+
+    def test_delivery_latency(self):
+        clock = FakeClock()
+        tracker = DeliveryTracker(clock=clock)
+        collector = Collector(tracker)
+        with ReplayServer() as server:
+            self.receive(server, collector)
+            tracker.expect("5", "a")
+            clock.now += 0.25
+            tracker.expect("5", "b")
+            clock.now += 0.5
+            server.push_danmu("别人的弹幕")
+            server.push_danmu("a")
+            server.push_danmu("b")
+            self.assertTrue(wait_for(lambda: len(collector.danmus) == 3))
+        self.assertEqual(list(tracker.latencies), [0.75, 0.5])
+        self.assertEqual(tracker.pending, 0)
+        self.assertEqual(tracker.snapshot()["delivered"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from danmu.core.scheduler import TickScheduler
+
+
+class FakeClock:
+    """测试用时钟，只在调用 advance() 时前进"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TickSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = TickScheduler(2.0, clock=self.clock)
+
+    def run_ticks(self, count, send_time):
+        """模拟发送 count 次：等到截止时间，发送耗时 send_time 秒"""
+        lags = []
+        for _ in range(count):
+            self.clock.advance(self.scheduler.next_delay())
+            lags.append(self.scheduler.tick())
+            self.clock.advance(send_time)
+        return lags
+
+    def assertOnTime(self, lags):
+        self.assertLess(max(lags), 1e-9)
+
+    def test_fixed_deadlines_do_not_drift(self):
+        start = self.clock.now
+        lags = self.run_ticks(100, send_time=0.3)
+        self.assertOnTime(lags)
+        # 第 n 次截止时间是 起点 + n * 间隔，发送耗时不累积
+        self.assertAlmostEqual(self.scheduler.next_delay(), start + 100 * 2.0 - self.clock.now)
+        self.assertEqual(self.scheduler.skipped, 0)
+
+    def test_lag_is_bounded_by_late_wakeup(self):
+        for jitter in (0.0, 0.05, 0.2, 0.1, 0.0):
+            self.clock.advance(self.scheduler.next_delay() + jitter)
+            self.assertAlmostEqual(self.scheduler.tick(), jitter)
+        self.assertAlmostEqual(self.scheduler.max_lag, 0.2)
+        self.assertEqual(self.scheduler.skipped, 0)
+        # 迟到不超过一个间隔时下一次截止时间不变，接下来准时发送
+        self.assertOnTime(self.run_ticks(3, send_time=0.0))
+
+    def test_skips_ahead_when_falling_behind(self):
+        self.run_ticks(1, send_time=0.0)
+        self.clock.advance(7.0)  # 一次发送卡住 7 秒，错过截止时间 102、104、106
+        lag = self.scheduler.tick()
+        self.assertAlmostEqual(lag, 5.0)
+        self.assertEqual(self.scheduler.skipped, 2)
+        # 对齐到下一个截止时间 108，而不是连续补发
+        self.assertAlmostEqual(self.scheduler.next_delay(), 1.0)
+        self.assertOnTime(self.run_ticks(3, send_time=0.0))
+
+    def test_interval_change_applies_to_next_tick(self):
+        self.run_ticks(2, send_time=0.0)
+        last = self.clock.now
+        self.scheduler.interval = 0.5
+        self.assertAlmostEqual(self.scheduler.next_delay(), last + 0.5 - self.clock.now)
+        self.clock.advance(self.scheduler.next_delay())
+        self.assertOnTime([self.scheduler.tick()])
+        self.assertAlmostEqual(self.scheduler.next_delay(), 0.5)
+
+    def test_rejects_non_positive_interval(self):
+        with self.assertRaises(ValueError):
+            TickScheduler(0, clock=self.clock)
+        with self.assertRaises(ValueError):
+            self.scheduler.interval = -1
+
+    def test_rates(self):
+        self.run_ticks(11, send_time=0.0)
+        self.assertAlmostEqual(self.scheduler.target_rate, 0.5)
+        self.assertAlmostEqual(self.scheduler.achieved_rate, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from danmu.storage import PhraseIndex, search
+
+
+def texts(index, entry_ids):
+    return [index.entry(entry_id)[1] for entry_id in entry_ids]
+
+
+def fake_lazy_pinyin(text, style=None, errors=None):
+    """只认识测试中用到的几个字的 lazy_pinyin"""
+    table = {"你": "n", "好": "h", "主": "z", "播": "b"}
+    return [table.get(char, char) for char in text]
+
+
+class PhraseIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = PhraseIndex.build([
+            ("1", ["你好主播", "主播好厉害", "ABC abc"]),
+            ("2", ["好好学习", "你好"]),
+        ], use_pinyin=False)
+
+    def test_single_char_and_bigram(self):
+        self.assertEqual(texts(self.index, self.index.search("好")), ["你好主播", "主播好厉害", "好好学习", "你好"])
+        self.assertEqual(texts(self.index, self.index.search("主播")), ["你好主播", "主播好厉害"])
+        self.assertEqual(texts(self.index, self.index.search("好主")), ["你好主播"])
+        self.assertEqual(self.index.search("播你"), [])
+
+    def test_all_bigrams_present_but_not_substring(self):
+        # "好主人的主播" 含有 "好主播" 的两个二元组 "好主" 和 "主播"，但不含 "好主播"
+        self.index.add("3", "好主人的主播")
+        self.assertEqual(texts(self.index, self.index.search("好主播")), ["你好主播"])
+        self.assertEqual(texts(self.index, self.index.search("好主人")), ["好主人的主播"])
+
+    def test_case_insensitive_and_room_filter(self):
+        self.assertEqual(texts(self.index, self.index.search("Abc")), ["ABC abc"])
+        self.assertEqual(texts(self.index, self.index.search("你好", room_id="2")), ["你好"])
+        self.assertEqual(self.index.search("你好", room_id="9"), [])
+        self.assertEqual(len(self.index.search("好", limit=2)), 2)
+        self.assertEqual(self.index.search(""), [])
+
+    def test_refine_previous_result(self):
+        self.assertEqual(len(self.index.search("主播")), 2)
+        self.assertEqual(texts(self.index, self.index.search("主播好")), ["主播好厉害"])
+        self.assertEqual(texts(self.index, self.index.search("主播好厉")), ["主播好厉害"])
+        self.index.add("2", "主播好厉害呀")  # 索引变化后不再使用上次的结果
+        self.assertEqual(texts(self.index, self.index.search("主播好厉")), ["主播好厉害", "主播好厉害呀"])
+
+    def test_insert_and_remove_update_positions(self):
+        entry_id = self.index.search("主播好")[0]
+        self.assertEqual(self.index.position(entry_id), 1)
+        self.index.insert("1", 0, "第一条")
+        self.assertEqual(self.index.position(entry_id), 2)
+        appended = self.index.add("1", "最后一条")
+        self.assertEqual(self.index.position(appended), 4)
+        self.assertTrue(self.index.remove("1", 0))
+        self.assertEqual(self.index.position(entry_id), 1)
+        self.assertTrue(self.index.remove("1", 3))
+        self.assertEqual(self.index.position(entry_id), 1)
+        self.assertFalse(self.index.remove("1", 3))
+        self.assertEqual(self.index.search("第一"), [])
+        self.assertEqual(self.index.search("最后"), [])
+        self.assertEqual(self.index.position(self.index.search("abc")[0]), 2)
+
+    def test_remove_and_replace_room(self):
+        self.index.set_room("2", ["新的弹幕"])
+        self.assertEqual(texts(self.index, self.index.search("好", room_id="2")), [])
+        self.assertEqual(self.index.position(self.index.search("新的")[0]), 0)
+        self.index.remove_room("1")
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.search("主播"), [])
+        self.assertEqual(self.index._postings.keys(), set("新的弹幕") | {"新的", "的弹", "弹幕"})
+
+
+class PinyinTest(unittest.TestCase):
+    def test_initials_with_fake_pypinyin(self):
+        with mock.patch.object(search, "_pinyin", (fake_lazy_pinyin, None)):
+            index = PhraseIndex.build([("1", ["你好主播", "ABC"])], use_pinyin=True)
+            self.assertEqual(texts(index, index.search("nh")), ["你好主播"])
+            self.assertEqual(texts(index, index.search("NHZB")), ["你好主播"])
+            self.assertEqual(texts(index, index.search("abc")), ["ABC"])  # 不含汉字时不重复索引
+            self.assertEqual(len(index._entries[index.search("abc")[0]][2]), 1)
+
+    @unittest.skipUnless(search.has_pinyin(), "没有安装 pypinyin")
+    def test_initials_with_pypinyin(self):
+        index = PhraseIndex.build([("1", ["你好主播", "谢谢"])])
+        self.assertTrue(index.use_pinyin)
+        self.assertEqual(texts(index, index.search("nh")), ["你好主播"])
+        self.assertEqual(texts(index, index.search("xx")), ["谢谢"])
+
+    def test_missing_pypinyin_logged_once(self):
+        with mock.patch.object(search, "has_pinyin", return_value=False), \
+                mock.patch.object(search, "_pinyin_logged", False):
+            with self.assertLogs("danmu.storage.search", "INFO") as logs:
+                self.assertFalse(PhraseIndex().use_pinyin)
+                self.assertFalse(PhraseIndex().use_pinyin)
+            self.assertEqual(len(logs.records), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
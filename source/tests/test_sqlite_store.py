@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from danmu.storage import RoomStore, RoomsView, SqliteRoomStore
+
+
+def legacy_rooms():
+    """config.txt 中的 common_rooms，越靠后的越近使用过"""
+    return {
+        "1": {"csrf": "a", "csrf_token": "a", "sessdata": "s1", "danmus": ["x", "y"]},
+        "2": {"csrf": "b", "csrf_token": "b", "sessdata": "s2", "danmus": [], "settings": {"time_step": 3}},
+        "3": {"csrf": "c", "csrf_token": "c", "sessdata": "s3", "danmus": ["z"],
+              "schedules": [{"id": "t", "message": "m", "offset": 5}]},
+    }
+
+
+class SqliteRoomStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.db = os.path.join(self.dir.name, "rooms.db")
+
+    def open_view(self):
+        store = SqliteRoomStore(self.db)
+        self.addCleanup(store.close)
+        return RoomsView(store)
+
+    def migrated_view(self):
+        store = SqliteRoomStore(self.db)
+        self.assertTrue(store.migrate(legacy_rooms()))
+        store.close()
+        return self.open_view()
+
+    def test_migrate_round_trip(self):
+        view = self.migrated_view()
+        self.assertEqual(list(view), ["1", "2", "3"])
+        self.assertEqual({room_id: view[room_id] for room_id in view}, legacy_rooms())
+        self.assertEqual(view.schedules(), {"3": legacy_rooms()["3"]["schedules"]})
+        self.assertFalse(view.store.migrate({"9": {"danmus": []}}))  # 只导入一次
+        self.assertNotIn("9", view)
+
+    def test_sync_round_trip(self):
+        view = self.migrated_view()
+        view["1"]["sessdata"] = "new"
+        view["1"]["danmus"].append("appended")      # 只在末尾追加，增量写入
+        del view["3"]["danmus"][0]                   # 其他修改整体写入
+        view["3"]["settings"] = {"color": "#000000"}
+        del view["2"]
+        view["4"] = {"csrf": "d", "csrf_token": "d", "sessdata": "s4"}
+        view.touch("1")
+        self.assertEqual(list(view), ["3", "4", "1"])
+        self.assertEqual(len(view), 3)
+        view.sync()
+
+        reopened = self.open_view()
+        self.assertEqual(list(reopened), ["3", "4", "1"])
+        self.assertNotIn("2", reopened)
+        self.assertEqual(reopened["1"], {"csrf": "a", "csrf_token": "a", "sessdata": "new", "danmus": ["x", "y", "appended"]})
+        self.assertEqual(reopened["3"]["danmus"], [])
+        self.assertEqual(reopened["3"]["settings"], {"color": "#000000"})
+        self.assertEqual(reopened["4"]["danmus"], [])
+        self.assertEqual(reopened.danmus("1"), ["x", "y", "appended"])
+
+    def test_listing_does_not_query_database(self):
+        view = self.migrated_view()
+        with mock.patch.object(view.store, "room_ids", side_effect=AssertionError), \
+                mock.patch.object(view.store, "has_room", side_effect=AssertionError):
+            view["5"] = {"csrf": "", "csrf_token": "", "sessdata": ""}
+            del view["1"]
+            self.assertEqual(len(view), 3)
+            self.assertEqual(list(view), ["2", "3", "5"])
+            self.assertIn("5", view)
+            self.assertNotIn("1", view)
+            with self.assertRaises(KeyError):
+                view["1"]
+
+
+class SqliteRoomStoreConfigTest(unittest.TestCase):
+    """settings.storage 为 "sqlite" 时 RoomStore 的读写"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.config = os.path.join(self.dir.name, "config.txt")
+        self.db = os.path.join(self.dir.name, "rooms.db")
+        with open(self.config, "w", encoding="utf-8") as file:
+            json.dump({"common_rooms": legacy_rooms(), "settings": {"storage": "sqlite"}}, file)
+
+    def test_rooms_saved_to_database_and_config_keeps_backup(self):
+        store = RoomStore(self.config, self.db)
+        self.assertIsInstance(store.rooms, RoomsView)
+        store.add_room("4", "d", "d", "s4")
+        store.add_danmu("1", "新弹幕")
+        store.delete_room("2")
+        store.set_setting("color", "#123456")
+        store.close()
+
+        with open(self.config, encoding="utf-8") as file:
+            saved = json.load(file)
+        self.assertEqual(saved["common_rooms"], legacy_rooms())  # 导入前的备份，不再更新
+        self.assertEqual(saved["settings"]["color"], "#123456")
+
+        store = RoomStore(self.config, self.db)
+        self.assertEqual(list(store.rooms), ["1", "3", "4"])
+        self.assertEqual(store.get_room("1")["danmus"], ["x", "y", "新弹幕"])
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
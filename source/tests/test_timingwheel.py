@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+from danmu.core import TimingWheel
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TimingWheelTest(unittest.TestCase):
+    """直接调用 advance()，不启动后台线程"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.wheel = TimingWheel(tick=1.0, slots=512, clock=self.clock)
+        self.fired = []
+
+    def schedule(self, delay, name):
+        return self.wheel.schedule(self.clock.now + delay, self.fired.append, name)
+
+    def advance(self, seconds):
+        self.clock.now += seconds
+        return self.wheel.advance()
+
+    def test_fires_in_deadline_order(self):
+        self.schedule(2.5, "c")
+        self.schedule(1.5, "a")
+        self.schedule(2.0, "b")
+        self.assertEqual(len(self.wheel), 3)
+        self.assertEqual(self.advance(1.0), 0)
+        self.assertEqual(self.advance(2.0), 3)
+        self.assertEqual(self.fired, ["a", "b", "c"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_not_fired_before_deadline_within_tick(self):
+        self.schedule(5.75, "a")
+        self.assertEqual(self.advance(5.5), 0)
+        self.assertEqual(self.advance(0.25), 1)
+
+    def test_past_deadline_fires_on_next_advance(self):
+        self.wheel.schedule(self.clock.now - 100, self.fired.append, "late")
+        self.assertEqual(self.wheel.advance(), 1)
+        self.assertEqual(self.fired, ["late"])
+
+    def test_cancel(self):
+        timer = self.schedule(3, "a")
+        self.schedule(3, "b")
+        self.assertTrue(self.wheel.cancel(timer))
+        self.assertFalse(self.wheel.cancel(timer))
+        self.assertEqual(len(self.wheel), 1)
+        self.advance(3)
+        self.assertEqual(self.fired, ["b"])
+        self.assertFalse(self.wheel.cancel(timer))
+
+    def test_cancel_after_fired(self):
+        timer = self.schedule(1, "a")
+        self.advance(1)
+        self.assertFalse(self.wheel.cancel(timer))
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_wrap_around_waits_for_later_rounds(self):
+        # 600 秒后与 88 秒后落在同一个槽中（600 - 512 = 88）
+        self.schedule(600, "round 2")
+        self.schedule(88, "round 1")
+        for _ in range(88):
+            self.advance(1)
+        self.assertEqual(self.fired, ["round 1"])
+        for _ in range(511):
+            self.advance(1)
+        self.assertEqual(self.fired, ["round 1"])
+        self.advance(1)
+        self.assertEqual(self.fired, ["round 1", "round 2"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_clock_jump_over_several_rounds(self):
+        for delay in (10, 700, 1500):
+            self.schedule(delay, delay)
+        self.schedule(5000, 5000)
+        self.assertEqual(self.advance(2000), 3)
+        self.assertEqual(self.fired, [10, 700, 1500])
+        self.assertEqual(len(self.wheel), 1)
+
+    def test_callback_error_does_not_stop_others(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        self.wheel.schedule(self.clock.now + 1, fail)
+        self.schedule(1, "ok")
+        with self.assertLogs("danmu.core.timingwheel", "ERROR"):
+            self.assertEqual(self.advance(1), 2)
+        self.assertEqual(self.fired, ["ok"])
+
+    def test_background_thread(self):
+        wheel = TimingWheel(tick=0.01).start()
+        fired = threading.Event()
+        try:
+            wheel.call_later(0.05, fired.set)
+            self.assertTrue(fired.wait(2))
+        finally:
+            wheel.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from danmu.core.validate import BlockedWords, MessageValidator, max_length_for
+
+
+class BlockedWordsTest(unittest.TestCase):
+    def test_overlapping_patterns(self):
+        words = BlockedWords(["he", "she", "his", "hers"])
+        self.assertEqual(words.find("ushers"), "she")  # she 与 he、hers 重叠，最先结束的是 she
+        self.assertEqual(words.find("ahis"), "his")
+        self.assertIsNone(words.find("shh"))
+
+    def test_pattern_inside_longer_pattern(self):
+        # 走到 abc 节点时经失败指针找到 bc
+        words = BlockedWords(["abcd", "bc"])
+        self.assertEqual(words.find("abcx"), "bc")
+        self.assertEqual(words.find("xabcd"), "bc")
+        self.assertEqual(BlockedWords(["abcd"]).find("xabcd"), "abcd")
+
+    def test_failure_links_restart_partial_match(self):
+        words = BlockedWords(["aab"])
+        self.assertEqual(words.find("aaab"), "aab")
+        self.assertIsNone(words.find("abab"))
+
+    def test_match_at_end_of_text(self):
+        words = BlockedWords(["屏蔽词"])
+        self.assertEqual(words.find("这里有屏蔽词"), "屏蔽词")
+        self.assertIsNone(words.find("这里有屏蔽"))
+
+    def test_normalized_matching(self):
+        words = BlockedWords(["ABC", "屏蔽"])
+        self.assertEqual(words.find("xx ａｂｃ"), "ABC")     # 全角、大小写
+        self.assertEqual(words.find("a B c"), "ABC")         # 中间插入空格
+        self.assertEqual(words.find("屏 蔽"), "屏蔽")
+        self.assertIsNone(words.find("屏x蔽"))
+
+    def test_empty_words_ignored(self):
+        words = BlockedWords(["", "  "])
+        self.assertFalse(words)
+        self.assertIsNone(words.find("任何内容"))
+
+
+class LengthLimitTest(unittest.TestCase):
+    def test_max_length_for_each_level(self):
+        for level, limit in ((None, 20), (0, 20), (1, 20), (2, 20), (3, 30), (4, 30), (5, 40), (6, 40)):
+            with self.subTest(level=level):
+                self.assertEqual(max_length_for(level), limit)
+
+    def test_validate_at_level_boundaries(self):
+        validator = MessageValidator()
+        self.assertEqual(validator.longest_limit, 40)
+        for level, limit in ((2, 20), (3, 30), (4, 30), (5, 40)):
+            with self.subTest(level=level):
+                result = validator.validate(["字" * limit, "字" * (limit + 1)], level)
+                self.assertEqual(result.messages, ["字" * limit])
+                self.assertEqual(result.rejected, [("字" * (limit + 1), f"超过 {limit} 字")])
+
+    def test_split_long_uses_level_limit(self):
+        result = MessageValidator(split_long=True).validate(["字" * 65], level=3)
+        self.assertEqual([len(message) for message in result.messages], [30, 30, 5])
+
+    def test_explicit_max_length(self):
+        result = MessageValidator().validate(["字" * 40], level=0, max_length=40)
+        self.assertEqual(result.messages, ["字" * 40])
+
+
+class MessageValidatorTest(unittest.TestCase):
+    def test_lines_normalization_and_blocked_words(self):
+        validator = MessageValidator(["屏蔽"])
+        result = validator.validate(["第一行\n第二  行", "零\u200b宽", "\u200b", "含屏 蔽词"])
+        self.assertEqual(result.messages, ["第一行", "第二 行", "零宽"])
+        self.assertEqual([reason for _, reason in result.rejected], ["只有不可见字符", "包含屏蔽词「屏蔽」"])
+
+
+if __name__ == "__main__":
+    unittest.main()